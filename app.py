@@ -1,6 +1,6 @@
 import os
 import base64
-import pandas as pd
+import threading
 from datetime import datetime
 from pathlib import Path
 import streamlit as st
@@ -8,24 +8,25 @@ import streamlit as st
 import sys
 #sys.path.append(str(Path(__file__).resolve().parent / "src"))
 
-
-from src.healthcare_pdf_hub.utils.chat_model import get_chat_model, ask_chat_model
-from src.healthcare_pdf_hub.utils.faiss_utils import create_faiss_index, retrive_relevant_docs
-from src.healthcare_pdf_hub.config import choose_resource_dirs
+# Only light modules are imported here. The ML stack (langchain, FAISS, sentence-transformers,
+# euriai) is imported by the retrieval and LLM paths when they first run; see startup_budget.
+from src.healthcare_pdf_hub.config import PREWARM_EMBEDDINGS, choose_resource_dirs
 from src.healthcare_pdf_hub.catalogs import MEDICINE_CATALOG, MEDICINE_BRANDS, HOSPITALS_2025
-from src.healthcare_pdf_hub.utils.pdf_utils import (
-    human_size, get_page_count, pdf_preview_html, list_pdfs_from_folder
+from src.healthcare_pdf_hub.utils.catalog_terms import hospital_aliases, medicine_aliases
+from src.healthcare_pdf_hub.prompts import (
+    HOSPITAL_PROMPT_TEMPLATE, MEDICAL_PROMPT_TEMPLATE, MEDICINE_PROMPT_TEMPLATE
+)
+from src.healthcare_pdf_hub.utils.pdf_utils import human_size
+from src.healthcare_pdf_hub.utils.blob_store import read_entry_bytes
+from src.healthcare_pdf_hub.utils.folder_watcher import get_folder_watcher
+from src.healthcare_pdf_hub.utils.zip_cache import build_folder_zip, cached_folder_zip
+from src.healthcare_pdf_hub.utils.metrics import start_metrics_server
+from src.healthcare_pdf_hub.utils.prebuilt_index import prebuilt_dir, read_manifest, stale_files
+from src.healthcare_pdf_hub.ui.components import (
+    build_context, empty_index_message, get_bucket_index, process_uploads, record_session_metrics,
+    render_admin_panel, render_bucket_table, render_ingest_progress, render_streamed_answer, request_profile,
+    retrieve
 )
-from src.healthcare_pdf_hub.ui.components import process_uploads, render_bucket_table
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from src.healthcare_pdf_hub.utils.pdf_utils import extract_text_from_pdf, pdf_preview_html 
-from src.healthcare_pdf_hub.utils.pdf_utils import make_zip_from_items  
-# Code to create/store the index for FAISS and retreive the relevant documents
-
-# langchain vectorstores documentation: https://python.langchain.com/docs/modules/data_connection/vectorstores/integrations/faiss
-from langchain_community.vectorstores import FAISS
-from langchain_community.embeddings import HuggingFaceEmbeddings
-from typing import List
 # Load .env explicitly from project root
 #load_dotenv(dotenv_path=Path(__file__).resolve().parent / ".env")
 
@@ -40,21 +41,51 @@ st.set_page_config(page_title="Healthcare PDF Hub", page_icon="📄", layout="wi
 
 
 
-# Initialize once and cache (prevents re-creating on every rerun)
+# Initialize once and cache (prevents re-creating on every rerun); created on the first question
 @st.cache_resource(show_spinner=False)
 def _init_chat_model():
+    from src.healthcare_pdf_hub.utils.chat_model import get_chat_model
+
     if not EURI_API_KEY:
         raise RuntimeError("EURI_API_KEY is missing. Set it in your .env.")
     return get_chat_model(EURI_API_KEY)
 
-try:
-    chat_model = _init_chat_model()
-except Exception as e:
-    st.error(f"Chat model init failed: {e}")
-    chat_model = None
+def get_app_chat_model():
+    try:
+        return _init_chat_model()
+    except Exception as e:
+        st.error(f"Chat model init failed: {e}")
+        return None
+
+if not EURI_API_KEY:
+    st.error("Chat model init failed: EURI_API_KEY is missing. Set it in your .env.")
+
+# Load the ML stack and the shared embedding model on a background thread, once per process,
+# so the first query doesn't pay for it and the page doesn't wait for it (HPDFHUB_PREWARM=0 skips it)
+@st.cache_resource(show_spinner=False)
+def _start_warm_up():
+    def warm_up():
+        from src.healthcare_pdf_hub.utils.faiss_utils import warm_up_embeddings
+        warm_up_embeddings()
+    threading.Thread(target=warm_up, name="ml-stack-warmup", daemon=True).start()
+
+if PREWARM_EMBEDDINGS:
+    _start_warm_up()
+
+# Operator metrics: /metrics endpoint (if HPDFHUB_METRICS_PORT is set) and admin sidebar
+start_metrics_server()
+record_session_metrics()
+render_admin_panel()
 
 # Resolve default resource folders (env -> absolute -> relative fallback)
 DEFAULT_DIRS = choose_resource_dirs()
+# In-memory catalog of those folders, kept current by a file watcher (one per process)
+FOLDER_WATCHER = get_folder_watcher(DEFAULT_DIRS)
+
+# Prebuilt resource-folder indexes (python -m src.healthcare_pdf_hub.ingest). They are searched
+# through the shared retrieval backend: the retrieval service if HPDFHUB_RETRIEVAL_SERVICE is set,
+# otherwise this process, loading each index on the first folder search and once per build.
+PREBUILT_MANIFESTS = {key: read_manifest(prebuilt_dir(key)) for key in DEFAULT_DIRS}
 
 
 # ---------- UI ----------
@@ -102,13 +133,12 @@ with tabs[1]:
         help="Upload lab reports, prescriptions, discharge summaries, etc.",
     )
 
-    # Cache this upload batch so Submit can use the same PDFs
     if files:
-        last_batch_snapshot = [{"name": f.name, "data": f.getvalue()} for f in files]
         if st.button("Add to Library", type="primary", key="btn_medical"):
-            process_uploads(files, "medical")
-            st.session_state["medical_last_batch"] = last_batch_snapshot
-            st.success("Added to Medical Documents.")
+            # Only the new files are embedded and appended to this tab's index, in the background
+            with st.spinner("Adding documents…"):
+                process_uploads(files, "medical")
+            st.success("Added to Medical Documents; indexing continues in the background.")
 
     st.divider()
 
@@ -123,79 +153,39 @@ with tabs[1]:
         placeholder="e.g., summarize lab report, abnormal values, discharge instructions…"
     )
     submit_med = st.button("Submit Prompt", key="btn_medical_note", disabled=not med_has_docs)
+    st.checkbox("Bypass answer cache", key="med_doc_nocache", disabled=not med_has_docs)
 
     if not med_has_docs:
         st.caption("⬆️ Upload PDFs and click **Add to Library** to enable search & answer.")
 
     if submit_med:
-        # Prefer the most recent batch; fallback to everything already in the Library
-        batch = st.session_state.get("medical_last_batch", [])
-        if not batch:
-            batch = [{"name": it["name"], "data": it["data"]} for it in med_bucket]
-
-        if not batch:
-            st.warning("No PDFs available. Please upload and click Add to Library.")
-        else:
-            # 1) Extract text from each PDF
-            all_content = []
-            for item in batch:
-                text = extract_text_from_pdf(item["data"])
-                if text:
-                    all_content.append(text)
-
-            if not all_content:
-                st.warning("No extractable text found (PDFs may be scanned images).")
+        with request_profile("medical"):
+            med_index = get_bucket_index("medical")
+            if med_index.num_chunks == 0:
+                st.warning(empty_index_message("medical"))
             else:
-                # 2) Split texts into chunks
-                splitter = RecursiveCharacterTextSplitter(
-                    chunk_size=1000,
-                    chunk_overlap=200,
-                    length_function=len,
-                )
-                chunks = []
-                for t in all_content:
-                    chunks.extend(splitter.split_text(t))
-
-                if not chunks:
-                    st.warning("Could not create chunks from the uploaded PDFs.")
+                # Retrieval + LLM
+                prompt = (note_val or "").strip()
+                if not prompt:
+                    st.info("Type a prompt above to run retrieval.")
                 else:
-                    # 3) Build FAISS index from chunks
-                    vectorstore = create_faiss_index(chunks)
-                    st.session_state["medical_vectorstore"] = vectorstore
-                    # st.success(f"Built FAISS index with {len(chunks)} chunks.")
-
-                    # 4) Retrieval + LLM
-                    prompt = (note_val or "").strip()
-                    if not prompt:
-                        st.info("Type a prompt above to run retrieval.")
-                    else:
-                        relevant_docs = retrive_relevant_docs(vectorstore, prompt)
-                        context = "\n\n".join([doc.page_content for doc in relevant_docs])
-
-                        system_prompt = f"""You are MediChat Pro — an intelligent medical document assistant.
-
-Based on the following medical documents, provide accurate and helpful answers.
-If information is not in the documents, say so clearly. Cite sources when used.
-
-# Documents
-{context}
+                    trace, relevant_docs = retrieve(med_index, prompt)
+                    context = build_context(trace, relevant_docs)
 
-# User Question
-{prompt}
-
-# Answer"""
-                        if not chat_model:
-                            st.error("Chat model is not initialized. Check EURI_API_KEY.")
-                        else:
-                            with st.spinner("Generating answer…"):
-                                response = ask_chat_model(chat_model, system_prompt)
-                            st.markdown("### 🧠 MediChat Pro — Answer")
-                            st.write(response)
+                    chat_model = get_app_chat_model()
+                    if not chat_model:
+                        st.error("Chat model is not initialized. Check EURI_API_KEY.")
+                    else:
+                        render_streamed_answer(
+                            chat_model, MEDICAL_PROMPT_TEMPLATE, context, prompt,
+                            bypass_cache=st.session_state.get("med_doc_nocache", False), trace=trace,
+                        )
 
     st.divider()
     st.subheader("Library")
     bucket = st.session_state.get("uploads", {}).get("medical", [])
-    render_bucket_table(bucket)
+    render_ingest_progress("medical")
+    render_bucket_table(bucket, "medical")
 
 
 # ---------- Medicine Details Tab ----------
@@ -209,14 +199,12 @@ with tabs[2]:
         help="Upload medicine leaflets, OTC info sheets, dosage guides, etc.",
     )
 
-    # Cache this upload batch so search can use the same PDFs
     if files:
-        last_batch_snapshot = [{"name": f.name, "data": f.getvalue()} for f in files]
-
         if st.button("Add to Library", type="primary", key="btn_medicine"):
-            process_uploads(files, "medicine")
-            st.session_state["medicine_last_batch"] = last_batch_snapshot
-            st.success("Added to Medicine Details.")
+            # Only the new files are embedded and appended to this tab's index, in the background
+            with st.spinner("Adding documents…"):
+                process_uploads(files, "medicine")
+            st.success("Added to Medicine Details; indexing continues in the background.")
 
     st.divider()
 
@@ -272,14 +260,12 @@ with tabs[2]:
                 "Category": cat,
                 "Brand examples": MEDICINE_BRANDS.get(med, "—"),
             })
-    med_df = pd.DataFrame(rows)
-
     st.subheader("Medicine Table")
-    st.dataframe(med_df, use_container_width=True, hide_index=True)
+    st.dataframe(rows, use_container_width=True, hide_index=True)
 
     med_pick = st.selectbox(
         "Pick a medicine to search in your PDFs",
-        options=sorted(med_df["Medicine"].unique()),
+        options=sorted({row["Medicine"] for row in rows}),
         key="med_table_pick"
     )
 
@@ -292,81 +278,47 @@ with tabs[2]:
         key="btn_med_table_search",
         disabled=not med_has_docs
     )
+    st.checkbox("Bypass answer cache", key="med_table_nocache", disabled=not med_has_docs)
     if not med_has_docs:
         st.caption("⬆️ Upload PDFs and click **Add to Library** to enable search & answer.")
 
     if do_search:
-        # Prefer the most recent batch; fallback to everything already in the Library
-        med_batch = st.session_state.get("medicine_last_batch", [])
-        if not med_batch:
-            med_batch = [{"name": it["name"], "data": it["data"]} for it in med_bucket]
-
-        if not med_batch:
-            st.warning("No PDFs available. Please upload and click Add to Library.")
-        else:
-            # 1) Extract text
-            all_content = []
-            for item in med_batch:
-                txt = extract_text_from_pdf(item["data"])
-                if txt:
-                    all_content.append(txt)
-
-            if not all_content:
-                st.warning("No extractable text found (PDFs may be scanned images).")
+        with request_profile("medicine"):
+            medi_index = get_bucket_index("medicine")
+            if medi_index.num_chunks == 0:
+                st.warning(empty_index_message("medicine"))
             else:
-                # 2) Chunk
-                splitter = RecursiveCharacterTextSplitter(
-                    chunk_size=1000,
-                    chunk_overlap=200,
-                    length_function=len,
-                )
-                chunks = []
-                for t in all_content:
-                    chunks.extend(splitter.split_text(t))
-
-                # 3) Index
-                vectorstore = create_faiss_index(chunks)
-                st.session_state["medicine_vectorstore"] = vectorstore
-                st.success(f"Built FAISS index with {len(chunks)} chunks.")
-
                 # 4) Query from table selection (+ brand aliases)
                 brand_hint = MEDICINE_BRANDS.get(med_pick, "")
                 prompt = f"{med_pick} {brand_hint}".strip()
 
-                relevant_docs = retrive_relevant_docs(vectorstore, prompt)
-                context = "\n\n".join([doc.page_content for doc in relevant_docs])
+                # Passages mentioning the medicine or a brand alias come straight from the
+                # ingestion-time mention index; fall back to retrieval if none do.
+                med_terms = medicine_aliases(med_pick)
+                trace, relevant_docs = retrieve(medi_index, prompt, terms=med_terms)
+                n_docs = len(medi_index.mentions.documents_mentioning(*med_terms))
+                if n_docs:
+                    st.caption(f"{med_pick} is mentioned in {n_docs} PDF(s) of your Library.")
+                else:
+                    st.caption(f"No passage mentions {med_pick} directly; showing the closest passages.")
+                context = build_context(trace, relevant_docs)
 
                 # 5) Ask the chat model
-                system_prompt = f"""You are MediChat Pro — an intelligent medical document assistant for India (IN).
-
-# Mission
-- Answer user questions **based on the provided medical documents first**.
-- Be accurate, cautious, and helpful.
-
-# Citations
-- Cite document sources used, e.g., [Document Title — page/section].
-
-# Uploaded Medicine PDFs (context)
-{context}
-
-# User Question
-{prompt}
-
-# Answer"""
+                chat_model = get_app_chat_model()
                 if not chat_model:
                     st.error("Chat model is not initialized. Check EURI_API_KEY.")
                 else:
-                    with st.spinner("Generating answer…"):
-                        response = ask_chat_model(chat_model, system_prompt)
-
-                    st.markdown("### 🧠 MediChat Pro — Answer")
-                    st.write(response)
+                    render_streamed_answer(
+                        chat_model, MEDICINE_PROMPT_TEMPLATE, context, prompt,
+                        bypass_cache=st.session_state.get("med_table_nocache", False), trace=trace,
+                    )
 
     # ---------- Library (bottom) ----------
     st.divider()
     st.subheader("Library")
     bucket = st.session_state.get("uploads", {}).get("medicine", [])
-    render_bucket_table(bucket)
+    render_ingest_progress("medicine")
+    render_bucket_table(bucket, "medicine")
     
     
     
@@ -381,11 +333,11 @@ with tabs[3]:
         help="Upload hospital brochures, department lists, admission forms, etc.",
     )
     if files:
-        last_batch_snapshot = [{"name": f.name, "data": f.getvalue()} for f in files]
         if st.button("Add to Library", type="primary", key="btn_hospital"):
-            process_uploads(files, "hospital")
-            st.session_state["hospital_last_batch"] = last_batch_snapshot
-            st.success("Added to Hospital Details.")
+            # Only the new files are embedded and appended to this tab's index, in the background
+            with st.spinner("Adding documents…"):
+                process_uploads(files, "hospital")
+            st.success("Added to Hospital Details; indexing continues in the background.")
 
     st.divider()
 
@@ -418,88 +370,45 @@ with tabs[3]:
             placeholder=f"Ask about {chosen['name']} (departments, admission, insurance, OPD timings…)"
         )
         submit_hosp = st.button("Submit Prompt", key="btn_hospital_note", disabled=not hosp_has_docs)
+        st.checkbox("Bypass answer cache", key="hosp_nocache", disabled=not hosp_has_docs)
 
         if not hosp_has_docs:
             st.caption("⬆️ Upload PDFs and click **Add to Library** to enable search & answer.")
 
         if submit_hosp:
-            # Prefer the most recent batch; fallback to everything in the Library
-            hosp_batch = st.session_state.get("hospital_last_batch", [])
-            if not hosp_batch:
-                hosp_batch = [{"name": it["name"], "data": it["data"]} for it in hosp_bucket]
-
-            if not hosp_batch:
-                st.warning("No PDFs available. Please upload and click Add to Library.")
-            else:
-                # 1) Extract text
-                all_content = []
-                for item in hosp_batch:
-                    txt = extract_text_from_pdf(item["data"])
-                    if txt:
-                        all_content.append(txt)
-
-                if not all_content:
-                    st.warning("No extractable text found (PDFs may be scanned images).")
+            with request_profile("hospital"):
+                hosp_index = get_bucket_index("hospital")
+                if hosp_index.num_chunks == 0:
+                    st.warning(empty_index_message("hospital"))
                 else:
-                    # 2) Chunk
-                    splitter = RecursiveCharacterTextSplitter(
-                        chunk_size=1000,
-                        chunk_overlap=200,
-                        length_function=len,
-                    )
-                    chunks = []
-                    for t in all_content:
-                        chunks.extend(splitter.split_text(t))
-
-                    # 3) Index
-                    vectorstore = create_faiss_index(chunks)
-                    st.session_state["hospital_vectorstore"] = vectorstore
-                    #st.success(f"Built FAISS index with {len(chunks)} chunks.")
-
                     # 4) Retrieval using selected hospital + user prompt
                     prompt_query = " ".join(
                         [p for p in [chosen["name"], chosen["city"], (prompt_val or "").strip()] if p]
                     )
-                    relevant_docs = retrive_relevant_docs(vectorstore, prompt_query)
-                    context = "\n\n".join([doc.page_content for doc in relevant_docs])
+                    trace, relevant_docs = retrieve(hosp_index, prompt_query)
+                    context = build_context(trace, relevant_docs)
 
                     # 5) Ask the model
-                    system_prompt = f"""You are MediChat Pro — an intelligent medical document assistant for India (IN).
-
-# Mission
-- Answer questions **based on the uploaded hospital PDFs first** (brochures, department lists, admission/insurance info).
-- Be accurate and cautious; if info isn’t in the documents, say so clearly.
-
-# Citations
-- Cite document sources used, e.g., [Document Title — page/section].
-
-# Uploaded Hospital PDFs (context)
-{context}
-
-# User Question
-{prompt_query}
-
-# Answer"""
+                    chat_model = get_app_chat_model()
                     if not chat_model:
                         st.error("Chat model is not initialized. Check EURI_API_KEY.")
                     else:
-                        with st.spinner("Generating answer…"):
-                            response = ask_chat_model(chat_model, system_prompt)
-                        st.markdown("### 🧠 MediChat Pro — Answer")
-                        st.write(response)
-
-        # ---------- Matching PDFs (by filename) ----------
-        st.markdown("**Matching PDFs (by filename):**")
-        hosp_hits = [
-            item for item in hosp_bucket
-            if chosen["name"].split("(")[0].strip().lower() in item["name"].lower()
-               or chosen["city"].lower() in item["name"].lower()
-               or any(k in item["name"].lower() for k in
-                      ["apollo", "aiims", "yashoda", "gleneagles", "medanta", "hiranandani", "pgimer", "cmc"])
-        ]
+                        render_streamed_answer(
+                            chat_model, HOSPITAL_PROMPT_TEMPLATE, context, prompt_query,
+                            bypass_cache=st.session_state.get("hosp_nocache", False), trace=trace,
+                        )
+
+        # ---------- Matching PDFs (mention index) ----------
+        st.markdown("**Matching PDFs (mentioning this hospital or city):**")
+        # Browsing the catalog alone never builds a bucket index (nor imports the ML stack)
+        hosp_mentions = get_bucket_index("hospital").mentions.documents_mentioning(
+            *hospital_aliases(chosen), chosen["city"]
+        ) if hosp_bucket else {}
+        hosp_hits = [item for item in hosp_bucket if item.get("id") in hosp_mentions]
         if hosp_hits:
             for i, item in enumerate(hosp_hits, start=1):
-                st.write(f"- {i}. **{item['name']}** · {item['pages']} pages · {item['uploaded_at']}")
+                found_on = ", ".join(str(p) for p in hosp_mentions[item["id"]]) or "—"
+                st.write(f"- {i}. **{item['name']}** · mentioned on page(s) {found_on} · {item['uploaded_at']}")
         else:
             st.caption("No matching hospital PDFs yet — upload brochures or department lists above.")
 
@@ -507,7 +416,8 @@ with tabs[3]:
     st.divider()
     st.subheader("Library")
     bucket = st.session_state.get("uploads", {}).get("hospital", [])
-    render_bucket_table(bucket)
+    render_ingest_progress("hospital")
+    render_bucket_table(bucket, "hospital")
 
 # ---------- User Guide Tab ----------
 with tabs[4]:
@@ -523,7 +433,23 @@ with tabs[4]:
     st.markdown("### 📂 Resource Folders")
 
     # Helper to render one folder block with "Download ALL" button
-    def render_folder_expander(title: str, folder: Path,
+    def render_folder_search(bucket_key: str, items, key_prefix: str):
+        """Passage search over the folder's prebuilt index (if one was built)."""
+        manifest = PREBUILT_MANIFESTS.get(bucket_key)
+        if manifest is None:
+            st.caption("Run `python -m src.healthcare_pdf_hub.ingest` to make this folder searchable.")
+            return
+        stale = stale_files(manifest, items)
+        if stale:
+            st.caption(f"Search index is out of date for {len(stale)} PDF(s); run the ingest with `--incremental`.")
+        query = st.text_input("Search this folder", key=f"{key_prefix}_search")
+        if query.strip():
+            from src.healthcare_pdf_hub.utils.retrieval import get_retrieval
+            for doc in get_retrieval().search(bucket_key, query.strip(), k=4):
+                st.markdown(f"**{doc.metadata['source']}** · page {doc.metadata.get('page') or '—'}")
+                st.caption(doc.page_content[:500])
+
+    def render_folder_expander(title: str, folder: Path, bucket_key: str,
                                zip_prefix: str, zip_key_prefix: str, dl_key_prefix: str):
         with st.expander(title):
             if not folder.exists():
@@ -531,38 +457,63 @@ with tabs[4]:
                 return
 
             st.caption(f"Showing PDFs from: `{folder}`")
-            items = list_pdfs_from_folder(folder)
+            # Read from the watcher's catalog; PDF bytes are read when a download is requested
+            items = FOLDER_WATCHER.items(bucket_key)
             if not items:
                 st.info("No PDFs found in this folder.")
                 return
 
-            # ⬇️ One-click ZIP of all PDFs
-            all_zip_bytes = make_zip_from_items(items)
-            st.download_button(
-                label=f"⬇️ Download ALL ({len(items)} PDFs) as ZIP",
-                data=all_zip_bytes,
-                file_name=f"{zip_prefix}_all.zip",
-                mime="application/zip",
-                key=f"{zip_key_prefix}_all",
+            # ⬇️ ZIP of all PDFs: built on request, then reused until the folder changes. The
+            # archive is only handed to st.download_button (which reads it into memory on every
+            # rerun) once this session has asked for it in this expander.
+            zip_prepared_key = f"{zip_key_prefix}_prepared"
+            if st.button(
+                f"📦 Prepare ZIP of ALL ({len(items)} PDFs)",
+                key=f"{zip_key_prefix}_build",
                 use_container_width=True
-            )
+            ):
+                with st.spinner("Building ZIP…"):
+                    st.session_state[zip_prepared_key] = str(build_folder_zip(folder, items))
+            zip_path = cached_folder_zip(folder, items)
+            if zip_path is not None and st.session_state.get(zip_prepared_key) == str(zip_path):
+                with open(zip_path, "rb") as zip_file:
+                    st.download_button(
+                        label=f"⬇️ Download ALL ({len(items)} PDFs) as ZIP",
+                        data=zip_file,
+                        file_name=f"{zip_prefix}_all.zip",
+                        mime="application/zip",
+                        key=f"{zip_key_prefix}_all",
+                        use_container_width=True
+                    )
             st.divider()
 
-            # Per-file list + download
+            render_folder_search(bucket_key, items, dl_key_prefix)
+            st.divider()
+
+            # Per-file list + download of the selected file
             for i, item in enumerate(items, start=1):
                 st.write(f"{i}. {item['name']}  ({item['pages']} pages • {human_size(item['size'])})")
+
+            names = [item["name"] for item in items]
+            pick = st.selectbox("Choose a PDF to download", options=names, key=f"{dl_key_prefix}_pick")
+            item = items[names.index(pick)]
+            prepared_key = f"{dl_key_prefix}_prepared"
+            if st.button("Prepare download", key=f"{dl_key_prefix}_prepare"):
+                st.session_state[prepared_key] = item["key"]
+            if st.session_state.get(prepared_key) == item["key"]:
                 st.download_button(
                     label=f"Download {item['name']}",
-                    data=item["data"],
+                    data=read_entry_bytes(item),
                     file_name=item["name"],
                     mime="application/pdf",
-                    key=f"{dl_key_prefix}_{i}"
+                    key=f"{dl_key_prefix}_file"
                 )
 
     # ---- Medical Reports (from folder) ----
     render_folder_expander(
         "📁 Medical Reports",
         DEFAULT_DIRS["medical"],
+        "medical",
         zip_prefix="medical_reports",
         zip_key_prefix="zip_userguide_med",
         dl_key_prefix="dl_userguide_med_folder",
@@ -572,6 +523,7 @@ with tabs[4]:
     render_folder_expander(
         "📁 Medicine",
         DEFAULT_DIRS["medicine"],
+        "medicine",
         zip_prefix="medicine",
         zip_key_prefix="zip_userguide_medi",
         dl_key_prefix="dl_userguide_medi_folder",
@@ -581,6 +533,7 @@ with tabs[4]:
     render_folder_expander(
         "📁 Hospital",
         DEFAULT_DIRS["hospital"],
+        "hospital",
         zip_prefix="hospital",
         zip_key_prefix="zip_userguide_hosp",
         dl_key_prefix="dl_userguide_hosp_folder",
@@ -591,8 +544,8 @@ with tabs[4]:
  
 # Footer note
 st.caption(
-    "Tip: Install `pypdf` to see page counts. All files remain in memory for this session; "
-    "modify code to persist to disk or cloud storage if needed."
+    "Tip: Install `pypdf` to see page counts. Uploaded files are stored once in a local blob store "
+    "(set `HPDFHUB_BLOB_DIR`); sessions only keep references to them."
 )
 
 # -------- Custom Footer --------
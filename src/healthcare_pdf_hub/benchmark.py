@@ -0,0 +1,249 @@
+"""
+Throughput / latency benchmark for the document pipeline on a synthetic PDF corpus.
+
+    python -m src.healthcare_pdf_hub.benchmark --docs 20 --pages 10 --words 300 --json bench.json
+    python -m src.healthcare_pdf_hub.benchmark --embeddings fake --compare bench.json
+
+The corpus is generated with fpdf from a fixed seed, so the same arguments give the
+same PDFs. The LLM is always a local stub; --embeddings fake swaps the MiniLM model for
+a deterministic hash embedding so the whole run works without network access.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence
+
+from src.healthcare_pdf_hub.catalogs import HOSPITALS_2025, MEDICINE_CATALOG
+
+# Filler vocabulary; catalog names are mixed in so catalog lookups have something to find.
+WORDS = (
+    "patient dose tablet daily fever pain infection clinic report blood pressure "
+    "treatment symptoms chronic acute therapy hospital ward nurse doctor follow-up "
+    "prescription allergy reaction diagnosis test result normal range observed mild "
+    "severe recommended avoid take after before meals water rest weeks months history"
+).split()
+CATALOG_WORDS = [m for meds in MEDICINE_CATALOG.values() for m in meds] + [h["city"] for h in HOSPITALS_2025]
+
+
+class StubChatModel:
+    """Chat model stand-in: streams the first words of the prompt back, without any network I/O."""
+
+    class _Chunk:
+        def __init__(self, content: str):
+            self.content = content
+
+    def __init__(self, answer_words: int = 120):
+        self.answer_words = answer_words
+
+    def stream(self, question: str):
+        for word in question.split()[: self.answer_words]:
+            yield self._Chunk(word + " ")
+
+    def invoke(self, question: str):
+        return self._Chunk("".join(c.content for c in self.stream(question)))
+
+
+def make_pdf(rng: random.Random, pages: int, words_per_page: int) -> bytes:
+    from fpdf import FPDF
+
+    pdf = FPDF()
+    pdf.set_auto_page_break(True, margin=10)
+    pdf.set_font("Helvetica", size=9)
+    for _ in range(pages):
+        pdf.add_page()
+        words = [rng.choice(CATALOG_WORDS) if rng.random() < 0.03 else rng.choice(WORDS)
+                 for _ in range(words_per_page)]
+        text = " ".join(words).encode("latin-1", "ignore").decode("latin-1")
+        pdf.multi_cell(0, 4, text)
+    out = pdf.output(dest="S")
+    # pyfpdf returns a latin-1 str, fpdf2 a bytearray
+    return out.encode("latin-1") if isinstance(out, str) else bytes(out)
+
+
+def make_corpus(folder: Path, docs: int, pages: int, words_per_page: int, seed: int) -> List[bytes]:
+    rng = random.Random(seed)
+    blobs = []
+    for i in range(docs):
+        data = make_pdf(rng, pages, words_per_page)
+        (folder / f"synthetic_{i:04d}.pdf").write_bytes(data)
+        blobs.append(data)
+    return blobs
+
+
+def measure(name: str, fn: Callable, inputs: Sequence, count_items: Callable = lambda result: 1,
+            count_bytes: Callable = lambda arg: 0) -> Dict:
+    """Call fn once per input; returns totals, throughput and per-call latency percentiles."""
+    latencies, items, n_bytes = [], 0, 0
+    for arg in inputs:
+        started = time.perf_counter()
+        result = fn(arg)
+        latencies.append(time.perf_counter() - started)
+        items += count_items(result)
+        n_bytes += count_bytes(arg)
+    seconds = sum(latencies)
+    latencies.sort()
+    return {
+        "name": name,
+        "calls": len(latencies),
+        "items": items,
+        "bytes": n_bytes,
+        "seconds": round(seconds, 4),
+        "items_per_s": round(items / seconds, 2) if seconds > 0 else 0.0,
+        "mb_per_s": round(n_bytes / 1e6 / seconds, 3) if seconds > 0 else 0.0,
+        "p50_ms": round(1000 * statistics.median(latencies), 3) if latencies else 0.0,
+        "p95_ms": round(1000 * latencies[int(0.95 * (len(latencies) - 1))], 3) if latencies else 0.0,
+    }
+
+
+def run(docs: int, pages: int, words_per_page: int, queries: int, seed: int) -> List[Dict]:
+    from src.healthcare_pdf_hub.pipeline import Pipeline, PipelineTrace
+    from src.healthcare_pdf_hub.prompts import MEDICAL_PROMPT_TEMPLATE
+    from src.healthcare_pdf_hub.utils.bucket_index import BucketIndex, split_text
+    from src.healthcare_pdf_hub.utils.faiss_utils import create_faiss_index, get_embeddings, retrive_relevant_docs
+    from src.healthcare_pdf_hub.utils.pdf_utils import (
+        extract_text_from_pdf, get_page_count, list_pdfs_from_folder, make_zip_from_items
+    )
+
+    rows = []
+    rng = random.Random(seed + 1)
+    query_list = [" ".join(rng.choice(WORDS + CATALOG_WORDS) for _ in range(6)) for _ in range(queries)]
+    with tempfile.TemporaryDirectory(prefix="hpdfhub_bench_") as tmp:
+        folder = Path(tmp)
+        started = time.perf_counter()
+        blobs = make_corpus(folder, docs, pages, words_per_page, seed)
+        generate_s = time.perf_counter() - started
+
+        rows.append(measure("get_page_count", get_page_count, blobs,
+                            lambda n: int(n) if n.isdigit() else 0, len))
+        texts = []
+        rows.append(measure("extract_text_from_pdf", lambda b: _collect(texts, [extract_text_from_pdf(b)]),
+                            blobs, len, len))
+        chunks = []
+        rows.append(measure("chunking", lambda t: _collect(chunks, split_text(t)),
+                            texts, len, lambda t: len(t.encode("utf-8"))))
+        get_embeddings().embed_query("warm up")  # model load is not part of the embed numbers
+        rows.append(measure("embedding", get_embeddings().embed_documents, [chunks], len,
+                            lambda c: sum(len(t.encode("utf-8")) for t in c)))
+        stores = []
+        rows.append(measure("create_faiss_index", lambda c: _collect(stores, [create_faiss_index(c)]),
+                            [chunks], lambda _: len(chunks), lambda c: sum(len(t.encode("utf-8")) for t in c)))
+        rows.append(measure("retrive_relevant_docs", lambda q: retrive_relevant_docs(stores[0], q, k=4),
+                            query_list, len, lambda q: len(q.encode("utf-8"))))
+        items = []
+        rows.append(measure("list_pdfs_from_folder", lambda f: _collect(items, list_pdfs_from_folder(f)),
+                            [folder], len))
+        rows.append(measure("make_zip_from_items", lambda it: make_zip_from_items(it).close(), [items], lambda _: 1,
+                            lambda it: sum(i["size"] for i in it)))
+
+        # The same corpus through the shared pipeline (no caches, stub LLM), stage by stage.
+        pipeline = Pipeline()
+        trace = PipelineTrace()
+        index = BucketIndex()
+        loaded = pipeline.load(sorted(folder.glob("*.pdf")), trace)
+        for i, doc in enumerate(pipeline.embed_documents(loaded, trace)):
+            pipeline.index(index, f"doc{i}", f"synthetic_{i:04d}.pdf", doc, trace)
+        chat_model = StubChatModel()
+        for query in query_list:
+            context = pipeline.pack(pipeline.retrieve(index, query, trace), trace).text
+            for _ in pipeline.generate(chat_model, MEDICAL_PROMPT_TEMPLATE, context, query, trace):
+                pass
+        rows.extend(_stage_rows(trace))
+
+    rows.insert(0, {"name": "generate_corpus", "calls": docs, "items": docs * pages,
+                    "bytes": sum(len(b) for b in blobs), "seconds": round(generate_s, 4)})
+    return rows
+
+
+def _collect(target: list, values: list) -> list:
+    """Keep a measured call's output for the next benchmark and hand it back to measure()."""
+    target.extend(values)
+    return values
+
+
+def _stage_rows(trace) -> List[Dict]:
+    """Aggregate the pipeline trace per stage (index / retrieve / generate run many times)."""
+    by_stage: Dict[str, List] = {}
+    for stats in trace.stages:
+        by_stage.setdefault(stats.name, []).append(stats)
+    rows = []
+    for name, runs in by_stage.items():
+        seconds = sum(s.seconds for s in runs)
+        items = sum(s.items for s in runs)
+        n_bytes = sum(s.bytes for s in runs)
+        latencies = sorted(s.seconds for s in runs)
+        rows.append({
+            "name": f"pipeline.{name}",
+            "calls": len(runs),
+            "items": items,
+            "bytes": n_bytes,
+            "seconds": round(seconds, 4),
+            "items_per_s": round(items / seconds, 2) if seconds > 0 else 0.0,
+            "mb_per_s": round(n_bytes / 1e6 / seconds, 3) if seconds > 0 else 0.0,
+            "p50_ms": round(1000 * statistics.median(latencies), 3),
+            "p95_ms": round(1000 * latencies[int(0.95 * (len(latencies) - 1))], 3),
+        })
+    return rows
+
+
+def compare(rows: List[Dict], baseline: List[Dict]) -> Dict[str, Optional[float]]:
+    """Wall time of each row relative to the baseline run (>1.0 means slower)."""
+    before = {row["name"]: row["seconds"] for row in baseline}
+    return {
+        row["name"]: round(row["seconds"] / before[row["name"]], 3) if before.get(row["name"]) else None
+        for row in rows
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=20, help="number of synthetic PDFs")
+    parser.add_argument("--pages", type=int, default=10, help="pages per PDF")
+    parser.add_argument("--words", type=int, default=300, help="words per page (text density)")
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--embeddings", choices=("minilm", "onnx", "fake"), default="minilm",
+                        help="onnx: MiniLM on ONNX Runtime; fake: deterministic hash embeddings, no model download")
+    parser.add_argument("--json", help="write the results to this file")
+    parser.add_argument("--compare", help="results JSON of an earlier run to compare against")
+    args = parser.parse_args(argv)
+
+    if args.embeddings == "fake":
+        from langchain_community.embeddings import DeterministicFakeEmbedding
+        from src.healthcare_pdf_hub.utils.faiss_utils import set_embeddings
+        set_embeddings(DeterministicFakeEmbedding(size=384))
+    elif args.embeddings == "onnx":
+        from src.healthcare_pdf_hub.utils.faiss_utils import load_local_embeddings, set_embeddings
+        set_embeddings(load_local_embeddings("onnx"))
+
+    rows = run(args.docs, args.pages, args.words, args.queries, args.seed)
+    ratios = compare(rows, json.loads(Path(args.compare).read_text(encoding="utf-8"))["results"]) if args.compare else {}
+
+    print(f"{args.docs} docs x {args.pages} pages x {args.words} words/page, {args.queries} queries, "
+          f"embeddings={args.embeddings}")
+    print(f"{'benchmark':<24}{'calls':>7}{'items':>9}{'seconds':>10}{'items/s':>11}{'MB/s':>9}{'p95 ms':>10}"
+          + (f"{'vs base':>9}" if ratios else ""))
+    for row in rows:
+        ratio = ratios.get(row["name"])
+        print(f"{row['name']:<24}{row['calls']:>7}{row['items']:>9}{row['seconds']:>10.3f}"
+              f"{row.get('items_per_s', 0):>11.1f}{row.get('mb_per_s', 0):>9.2f}{row.get('p95_ms', 0):>10.2f}"
+              + (f"{ratio:>9.2f}" if ratio is not None else ("" if not ratios else f"{'-':>9}")))
+    if args.json:
+        report = {
+            "config": {k: getattr(args, k) for k in ("docs", "pages", "words", "queries", "seed", "embeddings")},
+            "environment": {"python": platform.python_version(), "platform": platform.platform(),
+                            "cpus": os.cpu_count()},
+            "results": rows,
+        }
+        Path(args.json).write_text(json.dumps(report, indent=2), encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -45,3 +45,94 @@ def choose_resource_dirs() -> Dict[str, Path]:
 
     return dirs
 
+# Local cache for derived artefacts (FAISS indexes, manifests, ...).
+CACHE_DIR = Path(os.getenv("HPDFHUB_CACHE_DIR", "./.hpdfhub_cache"))
+
+# Upper bound for the on-disk FAISS index cache; least recently used entries go first.
+INDEX_CACHE_MAX_MB = int(os.getenv("HPDFHUB_INDEX_CACHE_MAX_MB", "512"))
+
+# Chunking settings shared by every tab (part of the index cache key).
+CHUNK_SIZE = 1000
+CHUNK_OVERLAP = 200
+
+# Embedding backend: "torch" (sentence-transformers) or "onnx" (ONNX Runtime, int8 unless
+# HPDFHUB_EMBEDDING_QUANTIZE=0), texts per forward pass, and CPU threads (0: library default).
+EMBEDDING_BACKEND = os.getenv("HPDFHUB_EMBEDDING_BACKEND", "torch")
+EMBEDDING_QUANTIZE = os.getenv("HPDFHUB_EMBEDDING_QUANTIZE", "1") == "1"
+EMBEDDING_BATCH_SIZE = int(os.getenv("HPDFHUB_EMBEDDING_BATCH_SIZE", "32"))
+EMBEDDING_THREADS = int(os.getenv("HPDFHUB_EMBEDDING_THREADS", "0"))
+
+# Token budget for the retrieved context placed in the prompt (after merging and de-duplication).
+CONTEXT_TOKEN_BUDGET = int(os.getenv("HPDFHUB_CONTEXT_TOKEN_BUDGET", "1500"))
+
+# Content-addressed store for uploaded PDFs (shared by all sessions of this host).
+BLOB_DIR = Path(os.getenv("HPDFHUB_BLOB_DIR", str(CACHE_DIR / "blobs")))
+
+# Blobs not read or written for this long are pruned (sessions are short-lived).
+BLOB_TTL_HOURS = float(os.getenv("HPDFHUB_BLOB_TTL_HOURS", "24"))
+
+# LLM answer cache: in-memory LRU with TTL, optionally backed by SQLite under CACHE_DIR.
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("HPDFHUB_LLM_CACHE_MAX_ENTRIES", "256"))
+LLM_CACHE_TTL_SECONDS = float(os.getenv("HPDFHUB_LLM_CACHE_TTL_SECONDS", "86400"))
+LLM_CACHE_ON_DISK = os.getenv("HPDFHUB_LLM_CACHE_ON_DISK", "0") == "1"
+
+# Retrieval result cache: queries remembered per bucket index, and the cosine similarity of
+# query embeddings above which a cached result is reused (1.0: exact matches only).
+RETRIEVAL_CACHE_MAX_ENTRIES = int(os.getenv("HPDFHUB_RETRIEVAL_CACHE_MAX_ENTRIES", "128"))
+RETRIEVAL_CACHE_SIMILARITY = float(os.getenv("HPDFHUB_RETRIEVAL_CACHE_SIMILARITY", "0.97"))
+
+# FAISS index type: "auto" picks by corpus size (flat -> hnsw -> ivfpq); or force "flat",
+# "hnsw", "ivf", "ivfpq".
+FAISS_INDEX_KIND = os.getenv("HPDFHUB_FAISS_INDEX", "auto")
+FAISS_HNSW_M = int(os.getenv("HPDFHUB_FAISS_HNSW_M", "32"))
+FAISS_HNSW_EF_SEARCH = int(os.getenv("HPDFHUB_FAISS_HNSW_EF_SEARCH", "64"))
+FAISS_IVF_NPROBE = int(os.getenv("HPDFHUB_FAISS_IVF_NPROBE", "16"))
+
+# Vector storage in the bucket indexes: "float32", "float16" or "int8" (scalar quantized).
+# Compact indexes re-rank FAISS_RERANK_FACTOR x more candidates against float32 copies kept
+# on disk, so retrieval quality stays close to float32.
+FAISS_VECTOR_DTYPE = os.getenv("HPDFHUB_FAISS_VECTORS", "float32")
+FAISS_RERANK_FACTOR = int(os.getenv("HPDFHUB_FAISS_RERANK_FACTOR", "4"))
+
+# Operator metrics (Prometheus text format): written to METRICS_FILE ("" disables) and,
+# with HPDFHUB_METRICS_PORT set, served at http://<host>:<port>/metrics. The endpoint has no
+# authentication, so it listens on loopback unless HPDFHUB_METRICS_HOST says otherwise.
+_metrics_file = os.getenv("HPDFHUB_METRICS_FILE", str(CACHE_DIR / "metrics.prom"))
+METRICS_FILE = Path(_metrics_file) if _metrics_file else None
+METRICS_PORT = int(os.getenv("HPDFHUB_METRICS_PORT", "0"))
+METRICS_HOST = os.getenv("HPDFHUB_METRICS_HOST", "127.0.0.1")
+METRICS_SESSION_TTL_SECONDS = float(os.getenv("HPDFHUB_METRICS_SESSION_TTL_SECONDS", "3600"))
+
+# Admin sidebar (metrics + profiler) and where request profiles are written.
+ADMIN_PANEL = os.getenv("HPDFHUB_ADMIN_PANEL", "0") == "1"
+PROFILE_DIR = Path(os.getenv("HPDFHUB_PROFILE_DIR", str(CACHE_DIR / "profiles")))
+
+# Prebuilt indexes of the resource folders (python -m src.healthcare_pdf_hub.ingest).
+PREBUILT_DIR = Path(os.getenv("HPDFHUB_PREBUILT_DIR", str(CACHE_DIR / "prebuilt")))
+
+# Background indexing after "Add to Library": worker threads shared by all sessions, the
+# bound on queued documents, and how many documents one session may have pending.
+INGEST_WORKERS = int(os.getenv("HPDFHUB_INGEST_WORKERS", "2"))
+INGEST_QUEUE_SIZE = int(os.getenv("HPDFHUB_INGEST_QUEUE_SIZE", "32"))
+INGEST_MAX_PENDING_PER_SESSION = int(os.getenv("HPDFHUB_INGEST_MAX_PENDING_PER_SESSION", "8"))
+
+# Load the ML stack and embedding model on a background thread at startup ("0": on first use).
+PREWARM_EMBEDDINGS = os.getenv("HPDFHUB_PREWARM", "1") == "1"
+
+# Resource folder watcher: poll interval when watchdog (inotify) is not installed, and whether
+# changes also refresh the folders' prebuilt indexes (incremental ingest on the watcher thread).
+WATCH_POLL_SECONDS = float(os.getenv("HPDFHUB_WATCH_POLL_SECONDS", "5"))
+WATCH_REINDEX = os.getenv("HPDFHUB_WATCH_REINDEX", "0") == "1"
+
+# Library table: documents per page (only the selected document is previewed or downloaded).
+LIBRARY_PAGE_SIZE = int(os.getenv("HPDFHUB_LIBRARY_PAGE_SIZE", "10"))
+
+# Shared retrieval service (python -m src.healthcare_pdf_hub.retrieval_server): "host:port" or a
+# Unix socket path. When set, workers embed and search the prebuilt indexes through it instead of
+# loading the embedding model themselves. Connections carry pickles, so they are authenticated
+# with HPDFHUB_RETRIEVAL_AUTHKEY or, if that is unset, a random key the service writes (mode 0600)
+# to HPDFHUB_RETRIEVAL_KEY_FILE; TCP is loopback-only unless HPDFHUB_RETRIEVAL_ALLOW_REMOTE=1.
+RETRIEVAL_SERVICE = os.getenv("HPDFHUB_RETRIEVAL_SERVICE", "")
+RETRIEVAL_AUTHKEY = os.getenv("HPDFHUB_RETRIEVAL_AUTHKEY", "")
+RETRIEVAL_KEY_FILE = Path(os.getenv("HPDFHUB_RETRIEVAL_KEY_FILE", str(CACHE_DIR / "retrieval.key")))
+RETRIEVAL_ALLOW_REMOTE = os.getenv("HPDFHUB_RETRIEVAL_ALLOW_REMOTE", "0") == "1"
@@ -0,0 +1,113 @@
+"""
+Equivalence and speed check of an embedding backend against the current (torch) one.
+
+    python -m src.healthcare_pdf_hub.embedding_check                      # onnx int8 vs torch
+    python -m src.healthcare_pdf_hub.embedding_check --no-quantize --threads 4 --batch-size 64
+    python -m src.healthcare_pdf_hub.embedding_check --texts .hpdfhub_cache/prebuilt/medical/chunks.jsonl
+
+Embeds the same texts (prebuilt chunk rows if given, otherwise synthetic chunk-sized
+texts) with both backends and reports the per-text cosine similarity, how many of each
+query's top-k neighbours agree, and the throughput of each. Exits 1 when the candidate
+falls below --min-cosine or --min-overlap, so it can gate switching the backend.
+"""
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+from typing import List
+
+import numpy as np
+
+from src.healthcare_pdf_hub.benchmark import CATALOG_WORDS, WORDS
+from src.healthcare_pdf_hub.config import CHUNK_SIZE, EMBEDDING_BATCH_SIZE, EMBEDDING_THREADS
+from src.healthcare_pdf_hub.utils.faiss_utils import EMBEDDING_BACKENDS, effective_backend, load_local_embeddings
+
+
+def synthetic_texts(n: int, seed: int) -> List[str]:
+    rng = random.Random(seed)
+    texts = []
+    for _ in range(n):
+        n_chars = rng.randint(CHUNK_SIZE // 10, CHUNK_SIZE)
+        words = []
+        while sum(len(w) + 1 for w in words) < n_chars:
+            words.append(rng.choice(CATALOG_WORDS) if rng.random() < 0.05 else rng.choice(WORDS))
+        texts.append(" ".join(words))
+    return texts
+
+
+def read_texts(path: Path, limit: int) -> List[str]:
+    with open(path, encoding="utf-8") as fh:
+        rows = [json.loads(line) for line in fh if line.strip()]
+    return [row["text"] for row in rows[:limit]]
+
+
+def embed(embeddings, texts: List[str]):
+    started = time.perf_counter()
+    vectors = np.asarray(embeddings.embed_documents(texts), dtype="float32")
+    return vectors, time.perf_counter() - started
+
+
+def _normalise(vectors: np.ndarray) -> np.ndarray:
+    return vectors / np.clip(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12, None)
+
+
+def topk_overlap(reference: np.ndarray, candidate: np.ndarray, k: int) -> float:
+    """Mean fraction of each text's k nearest neighbours (by cosine) that both backends agree on."""
+    ref, cand = _normalise(reference), _normalise(candidate)
+    k = min(k, len(ref) - 1)
+    if k < 1:
+        return 1.0
+    ref_nn = np.argsort(-(ref @ ref.T), axis=1)[:, 1:k + 1]
+    cand_nn = np.argsort(-(cand @ cand.T), axis=1)[:, 1:k + 1]
+    return float(np.mean([len(set(a) & set(b)) / k for a, b in zip(ref_nn, cand_nn)]))
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", choices=EMBEDDING_BACKENDS, default="onnx", help="candidate backend")
+    parser.add_argument("--no-quantize", action="store_true", help="candidate without int8 quantization")
+    parser.add_argument("--batch-size", type=int, default=EMBEDDING_BATCH_SIZE)
+    parser.add_argument("--threads", type=int, default=EMBEDDING_THREADS, help="intra-op threads (0: default)")
+    parser.add_argument("--texts", help="chunks.jsonl of a prebuilt index to embed instead of synthetic texts")
+    parser.add_argument("-n", type=int, default=512, help="number of texts")
+    parser.add_argument("-k", type=int, default=10, help="neighbours compared per text")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--min-cosine", type=float, default=0.98, help="lowest allowed mean cosine")
+    parser.add_argument("--min-overlap", type=float, default=0.8, help="lowest allowed top-k agreement")
+    args = parser.parse_args(argv)
+
+    if effective_backend(args.backend) != args.backend:
+        print(f"{args.backend} backend is not available (install onnxruntime and transformers)")
+        return 1
+    texts = read_texts(Path(args.texts), args.n) if args.texts else synthetic_texts(args.n, args.seed)
+    reference_model = load_local_embeddings("torch", args.batch_size, args.threads)
+    candidate_model = load_local_embeddings(args.backend, args.batch_size, args.threads, not args.no_quantize)
+    for model in (reference_model, candidate_model):
+        model.embed_query("warm up")  # model load and first-call setup are not timed
+
+    reference, ref_s = embed(reference_model, texts)
+    candidate, cand_s = embed(candidate_model, texts)
+    cosine = np.sum(_normalise(reference) * _normalise(candidate), axis=1)
+    overlap = topk_overlap(reference, candidate, args.k)
+    chars = sum(len(t) for t in texts)
+
+    print(f"{len(texts)} texts, {chars / len(texts):.0f} chars on average")
+    print(f"  torch           {len(texts) / ref_s:8.1f} texts/s")
+    print(f"  {args.backend:<15} {len(texts) / cand_s:8.1f} texts/s ({ref_s / cand_s:.2f}x)")
+    print(f"cosine vs torch: mean {cosine.mean():.4f}, min {cosine.min():.4f}; "
+          f"top-{args.k} neighbour agreement {overlap:.3f}")
+
+    ok = True
+    if cosine.mean() < args.min_cosine:
+        print(f"FAIL: mean cosine {cosine.mean():.4f} < {args.min_cosine}")
+        ok = False
+    if overlap < args.min_overlap:
+        print(f"FAIL: top-{args.k} agreement {overlap:.3f} < {args.min_overlap}")
+        ok = False
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
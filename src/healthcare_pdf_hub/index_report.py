@@ -0,0 +1,66 @@
+"""
+Recall-vs-latency report for the FAISS index kinds in faiss_utils.
+
+    python -m src.healthcare_pdf_hub.index_report --index-dir .hpdfhub_cache/indexes/<key>
+    python -m src.healthcare_pdf_hub.index_report --synthetic 50000 --json report.json
+
+Vectors come from a saved (flat) FAISS index or are generated; queries are corpus
+vectors with a little noise, so the exact flat index defines the ground truth.
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+import faiss
+import numpy as np
+
+from src.healthcare_pdf_hub.utils.faiss_utils import recall_report
+
+
+def _load_vectors(args) -> np.ndarray:
+    if args.index_dir:
+        index = faiss.read_index(str(Path(args.index_dir) / "index.faiss"))
+        return index.reconstruct_n(0, index.ntotal)
+    rng = np.random.default_rng(args.seed)
+    # Clustered data is closer to real embeddings than uniform noise.
+    centers = rng.normal(size=(max(args.synthetic // 200, 1), args.dim))
+    vectors = centers[rng.integers(0, len(centers), args.synthetic)] + 0.3 * rng.normal(size=(args.synthetic, args.dim))
+    return vectors.astype("float32")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--index-dir", help="folder with an index.faiss saved by FAISS.save_local")
+    source.add_argument("--synthetic", type=int, help="number of synthetic vectors to generate")
+    parser.add_argument("--dim", type=int, default=384, help="dimension of synthetic vectors (MiniLM: 384)")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="also write the rows to this file")
+    args = parser.parse_args(argv)
+
+    vectors = _load_vectors(args)
+    rng = np.random.default_rng(args.seed + 1)
+    picks = rng.choice(len(vectors), min(args.queries, len(vectors)), replace=False)
+    queries = vectors[picks] + 0.05 * rng.normal(size=(len(picks), vectors.shape[1])).astype("float32")
+
+    rows = recall_report(vectors, queries, k=args.k)
+    print(f"{len(vectors)} vectors x {vectors.shape[1]} dims, {len(queries)} queries, recall@{args.k}")
+    print(f"{'kind':<7}{'param':<14}{'recall':>8}{'ms/query':>10}{'build s':>9}{'MB':>9}")
+    for row in rows:
+        param = " ".join(filter(None, [
+            f"nprobe={row['nprobe']}" if "nprobe" in row else "",
+            f"ef={row['ef_search']}" if "ef_search" in row else "",
+            row.get("dtype", ""),
+        ])) or "-"
+        print(f"{row['kind']:<7}{param:<14}{row['recall_at_k']:>8.3f}{row['ms_per_query']:>10.3f}"
+              f"{row['build_s']:>9.2f}{row['index_bytes'] / 1e6:>9.2f}")
+    if args.json:
+        Path(args.json).write_text(json.dumps(rows, indent=2), encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
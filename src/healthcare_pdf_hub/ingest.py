@@ -0,0 +1,144 @@
+"""
+Pre-build search indexes for the resource folders (config.choose_resource_dirs()).
+
+    python -m src.healthcare_pdf_hub.ingest                      # all folders, full rebuild
+    python -m src.healthcare_pdf_hub.ingest --incremental        # only new / changed PDFs
+    python -m src.healthcare_pdf_hub.ingest --bucket medicine --workers 8
+
+Each folder gets an index, its vectors, chunk texts and a manifest under
+HPDFHUB_PREBUILT_DIR/<bucket>; the app loads them at startup. PDFs are extracted on a
+pool of worker processes and embedded in batches through the shared pipeline.
+With --incremental, unchanged files (same size and mtime, or same content) keep their
+stored chunks and vectors and only the rest is extracted and embedded.
+"""
+import argparse
+import hashlib
+import sys
+import time
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+
+from src.healthcare_pdf_hub.config import CHUNK_OVERLAP, CHUNK_SIZE, PREBUILT_DIR, choose_resource_dirs
+from src.healthcare_pdf_hub.pipeline import PipelineTrace, get_pipeline
+from src.healthcare_pdf_hub.utils.faiss_utils import build_faiss_index, embedding_id, index_kind
+from src.healthcare_pdf_hub.utils.pdf_utils import set_extract_workers
+from src.healthcare_pdf_hub.utils.prebuilt_index import prebuilt_dir, read_chunks, read_manifest, save_prebuilt
+
+BUCKETS = ("medical", "medicine", "hospital")
+
+
+def _settings() -> dict:
+    return {"chunk_size": CHUNK_SIZE, "chunk_overlap": CHUNK_OVERLAP, "model": embedding_id()}
+
+
+def _file_digest(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def ingest_folder(folder: Path, out_dir: Path, incremental: bool = False, batch: int = 16,
+                  kind: str = "auto", trace: Optional[PipelineTrace] = None) -> dict:
+    """Build (or refresh) the prebuilt index of one folder; returns the new manifest."""
+    trace = trace if trace is not None else PipelineTrace()
+    pipeline = get_pipeline()
+    old = read_manifest(out_dir) if incremental else None
+    if old is not None and old.get("settings") != _settings():
+        old = None  # chunking or model changed: nothing can be reused
+    old_files = (old or {}).get("files", {})
+    old_rows, old_vectors = read_chunks(out_dir) if old is not None else ([], None)
+
+    paths = sorted(Path(folder).glob("*.pdf"))
+    files, keep, todo = {}, set(), []
+    for path in paths:
+        stat = path.stat()
+        prev = old_files.get(path.name)
+        if prev and (prev["size"], prev["mtime"]) == (stat.st_size, stat.st_mtime):
+            files[path.name] = prev
+            keep.add(path.name)
+            continue
+        digest = _file_digest(path)  # the bytes are read again per batch, not held for the whole folder
+        if prev and prev["sha256"] == digest:
+            files[path.name] = {**prev, "size": stat.st_size, "mtime": stat.st_mtime}
+            keep.add(path.name)
+            continue
+        files[path.name] = {"size": stat.st_size, "mtime": stat.st_mtime, "sha256": digest, "chunks": 0}
+        todo.append(path)
+
+    rows: List[dict] = []
+    vectors: List[np.ndarray] = []
+    if keep and old_vectors is not None:
+        kept = [i for i, row in enumerate(old_rows) if row["source"] in keep]
+        rows.extend(old_rows[i] for i in kept)
+        vectors.append(np.asarray(old_vectors[kept], dtype="float32"))
+
+    for start in range(0, len(todo), batch):
+        chunk_of_files = todo[start:start + batch]
+        blobs = pipeline.load([path.read_bytes() for path in chunk_of_files], trace)
+        for path, doc in zip(chunk_of_files, pipeline.embed_documents(blobs, trace)):
+            files[path.name]["chunks"] = len(doc.texts)
+            rows.extend(
+                {"text": text, "source": path.name, "page": page, "chunk": i}
+                for i, (text, page) in enumerate(zip(doc.texts, doc.pages))
+            )
+            if doc.vectors:
+                vectors.append(np.asarray(doc.vectors, dtype="float32"))
+
+    matrix = np.concatenate(vectors) if vectors else np.zeros((0, 0), dtype="float32")
+    index = None
+    with trace.stage("index") as stats:
+        if len(matrix):
+            index = build_faiss_index(matrix, kind)
+        stats.items = len(matrix)
+        stats.bytes = matrix.nbytes
+    manifest = {
+        "folder": str(Path(folder).resolve()),
+        "settings": _settings(),
+        "built_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "kind": index_kind(index) if index is not None else None,
+        "reused_files": len(keep),
+        "embedded_files": len(todo),
+        "files": files,
+    }
+    save_prebuilt(out_dir, manifest, rows, matrix, index)
+    return manifest
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bucket", choices=BUCKETS + ("all",), default="all")
+    parser.add_argument("--incremental", action="store_true", help="only process new or changed PDFs")
+    parser.add_argument("--workers", type=int, default=None, help="extraction processes (default: CPU count)")
+    parser.add_argument("--batch", type=int, default=16, help="PDFs extracted and embedded per batch")
+    parser.add_argument("--kind", default="auto", help="FAISS index kind: auto, flat, hnsw, ivf, ivfpq")
+    parser.add_argument("--out", default=str(PREBUILT_DIR), help="root directory of the prebuilt indexes")
+    args = parser.parse_args(argv)
+
+    if args.workers:
+        set_extract_workers(args.workers)
+    dirs = choose_resource_dirs()
+    buckets = BUCKETS if args.bucket == "all" else (args.bucket,)
+    for bucket in buckets:
+        folder = dirs[bucket]
+        if not folder.exists():
+            print(f"{bucket}: folder not found ({folder}), skipped")
+            continue
+        trace = PipelineTrace()
+        started = time.perf_counter()
+        manifest = ingest_folder(folder, prebuilt_dir(bucket, Path(args.out)), args.incremental,
+                                 args.batch, args.kind, trace)
+        chunks = sum(f["chunks"] for f in manifest["files"].values())
+        print(f"{bucket}: {len(manifest['files'])} PDFs ({manifest['embedded_files']} embedded, "
+              f"{manifest['reused_files']} reused), {chunks} chunks, {manifest['kind'] or 'empty'} index "
+              f"in {time.perf_counter() - started:.1f}s")
+        if trace.stages:
+            print(f"  {trace.summary()}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,310 @@
+"""
+The document pipeline shared by the Medical, Medicine and Hospital tabs:
+
+    load -> extract -> chunk -> embed -> index          (when PDFs are added to the Library)
+    retrieve -> pack -> generate                        (when a question is asked)
+
+Every stage is a plain callable on Pipeline, so it can be swapped (e.g. another
+extractor or embedder), and records wall time, item count and bytes processed in a
+PipelineTrace and in the process-wide metrics. The embed stage is cached per PDF
+(index cache, which also skips extract and chunk on a hit) and the generate stage
+per answer (LLM cache), and the retrieve stage per query and index version (retrieval
+cache); pass None for any cache to disable it.
+"""
+import logging
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Sequence
+
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+
+from src.healthcare_pdf_hub.config import CHUNK_OVERLAP, CHUNK_SIZE, CONTEXT_TOKEN_BUDGET
+from src.healthcare_pdf_hub.utils.blob_store import read_entry_bytes
+from src.healthcare_pdf_hub.utils.bucket_index import BucketIndex, EmbeddedDocument, split_pages
+from src.healthcare_pdf_hub.utils.chat_model import (
+    CHAT_MODEL_NAME, CHAT_TEMPERATURE, GenerationStats, stream_chat_model
+)
+from src.healthcare_pdf_hub.utils.context_packing import PackedContext, pack_context
+from src.healthcare_pdf_hub.utils.faiss_utils import embedding_id, get_embeddings
+from src.healthcare_pdf_hub.utils.index_cache import IndexCache, get_index_cache, index_cache_key
+from src.healthcare_pdf_hub.utils.llm_cache import LLMCache, get_llm_cache, llm_cache_key
+from src.healthcare_pdf_hub.utils.metrics import BATCH_BUCKETS, Metrics, get_metrics
+from src.healthcare_pdf_hub.utils.pdf_utils import extract_pages_batch, human_size
+from src.healthcare_pdf_hub.utils.retrieval_cache import RetrievalCache, get_retrieval_cache
+
+logger = logging.getLogger(__name__)
+
+STAGES = ("load", "extract", "chunk", "embed", "index", "retrieve", "pack", "generate")
+
+
+@dataclass
+class StageStats:
+    name: str
+    seconds: float = 0.0
+    items: int = 0     # documents, pages, chunks or tokens, depending on the stage
+    bytes: int = 0     # input bytes (PDFs) or text bytes handled by the stage
+    cached: int = 0    # items served from the stage's cache
+    extra: Dict[str, float] = field(default_factory=dict)
+
+
+@dataclass
+class PipelineTrace:
+    stages: List[StageStats] = field(default_factory=list)
+    on_stage: Optional[Callable[[str], None]] = None  # called with the name as each stage starts
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[StageStats]:
+        """Time the enclosed block as one stage; the block fills in items / bytes / cached."""
+        stats = StageStats(name)
+        if self.on_stage is not None:
+            self.on_stage(name)
+        started = time.perf_counter()
+        try:
+            yield stats
+        finally:
+            stats.seconds = time.perf_counter() - started
+            self.stages.append(stats)
+            logger.info("pipeline %s: %.3fs items=%d bytes=%d cached=%d",
+                        name, stats.seconds, stats.items, stats.bytes, stats.cached)
+            metrics = get_metrics()
+            metrics.observe("hpdfhub_stage_seconds", stats.seconds, stage=name)
+            metrics.inc("hpdfhub_stage_items_total", stats.items, stage=name)
+            metrics.inc("hpdfhub_stage_bytes_total", stats.bytes, stage=name)
+            if stats.cached:
+                metrics.inc("hpdfhub_stage_cached_total", stats.cached, stage=name)
+            metrics.write_file()
+
+    def get(self, name: str) -> Optional[StageStats]:
+        return next((s for s in reversed(self.stages) if s.name == name), None)
+
+    @property
+    def total_seconds(self) -> float:
+        return sum(s.seconds for s in self.stages)
+
+    def summary(self) -> str:
+        parts = []
+        for s in self.stages:
+            detail = f"{s.items} items, {human_size(s.bytes)}"
+            if s.cached:
+                detail += f", {s.cached} cached"
+            parts.append(f"{s.name} {s.seconds:.2f}s ({detail})")
+        return " • ".join(parts)
+
+    def as_rows(self) -> List[dict]:
+        return [
+            {"stage": s.name, "seconds": round(s.seconds, 4), "items": s.items,
+             "bytes": s.bytes, "cached": s.cached, **s.extra}
+            for s in self.stages
+        ]
+
+
+def load_source(source) -> bytes:
+    """PDF bytes from raw bytes, a path, a Library entry or an uploaded file object."""
+    if isinstance(source, (bytes, bytearray)):
+        return bytes(source)
+    if isinstance(source, (str, Path)):
+        return Path(source).read_bytes()
+    if isinstance(source, dict):
+        return read_entry_bytes(source)
+    return source.read()
+
+
+def embed_texts(texts: List[str]) -> List[List[float]]:
+    return get_embeddings().embed_documents(texts)
+
+
+def default_retriever(index: BucketIndex, query: str, k: int, terms: Sequence[str] = (),
+                      query_vector: Optional[List[float]] = None) -> List[Document]:
+    """Catalog mentions when terms are given and found, hybrid search otherwise."""
+    if terms:
+        docs = index.mention_chunks(*terms, k=k)
+        if docs:
+            return docs
+    return index.search(query, k=k, query_vector=query_vector)
+
+
+def _text_bytes(texts) -> int:
+    return sum(len(t.encode("utf-8")) for t in texts)
+
+
+@dataclass
+class Pipeline:
+    loader: Callable[[object], bytes] = load_source
+    extractor: Callable = extract_pages_batch            # blobs -> (pages per PDF, stats)
+    chunker: Callable = split_pages                      # pages -> (chunks, start page per chunk)
+    embedder: Callable[[List[str]], List[List[float]]] = embed_texts
+    retriever: Callable = default_retriever
+    packer: Callable[[Sequence[Document], int], PackedContext] = pack_context
+    embed_cache: Optional[IndexCache] = None
+    answer_cache: Optional[LLMCache] = None
+    retrieval_cache: Optional[RetrievalCache] = None
+
+    # ---- ingestion ----
+    def load(self, sources, trace: PipelineTrace) -> List[bytes]:
+        with trace.stage("load") as stats:
+            blobs = [self.loader(source) for source in sources]
+            stats.items = len(blobs)
+            stats.bytes = sum(len(b) for b in blobs)
+        return blobs
+
+    def embed_documents(self, pdf_blobs: List[bytes], trace: PipelineTrace) -> List[EmbeddedDocument]:
+        """
+        Extract, chunk and embed a batch of PDFs; one EmbeddedDocument per PDF. PDFs found
+        in the embed cache (in any session) skip all three stages; misses are extracted
+        together, in parallel.
+        """
+        results = [EmbeddedDocument() for _ in pdf_blobs]
+        keys = [index_cache_key([data], CHUNK_SIZE, CHUNK_OVERLAP, embedding_id()) for data in pdf_blobs]
+
+        misses = list(range(len(pdf_blobs)))
+        cache_seconds = 0.0
+        if self.embed_cache is not None:
+            started = time.perf_counter()
+            misses = []
+            for i, key in enumerate(keys):
+                cached = self.embed_cache.load(key, get_embeddings())
+                if cached is None:
+                    misses.append(i)
+                    continue
+                n = cached.index.ntotal
+                docs = [cached.docstore.search(cached.index_to_docstore_id[j]) for j in range(n)]
+                results[i] = EmbeddedDocument(
+                    texts=[d.page_content for d in docs],
+                    vectors=cached.index.reconstruct_n(0, n).tolist(),
+                    pages=[d.metadata.get("page") for d in docs],
+                )
+            cache_seconds = time.perf_counter() - started
+
+        with trace.stage("extract") as stats:
+            extracted, extraction = self.extractor([pdf_blobs[i] for i in misses])
+            stats.items = extraction.pages
+            stats.bytes = sum(len(pdf_blobs[i]) for i in misses)
+            stats.extra["cached_documents"] = float(len(pdf_blobs) - len(misses))
+            stats.extra["pages_per_second"] = round(extraction.pages_per_second, 1)
+            stats.extra["parallel"] = float(extraction.parallel)
+
+        with trace.stage("chunk") as stats:
+            chunked = [self.chunker(pages) for pages in extracted]
+            stats.items = sum(len(texts) for texts, _ in chunked)
+            stats.bytes = sum(_text_bytes(pages) for pages in extracted)
+
+        with trace.stage("embed") as stats:
+            for i, (texts, chunk_pages) in zip(misses, chunked):
+                if not texts:
+                    continue
+                vectors = self.embedder(texts)
+                get_metrics().observe("hpdfhub_embed_document_chunks", len(texts), buckets=BATCH_BUCKETS)
+                if self.embed_cache is not None:
+                    self.embed_cache.save(keys[i], _cache_entry(texts, vectors, chunk_pages))
+                results[i] = EmbeddedDocument(texts=texts, vectors=vectors, pages=chunk_pages)
+                stats.items += len(texts)
+                stats.bytes += _text_bytes(texts)
+            missed = set(misses)
+            stats.cached = sum(len(doc.texts) for i, doc in enumerate(results) if i not in missed)
+            stats.extra["cache_lookup_seconds"] = round(cache_seconds, 4)
+        return results
+
+    def index(self, bucket_index: BucketIndex, doc_id: str, name: str, doc: EmbeddedDocument,
+              trace: PipelineTrace) -> None:
+        with trace.stage("index") as stats:
+            bucket_index.add_document(doc_id, name, doc.texts, doc.vectors, doc.pages)
+            stats.items = len(doc.texts)
+            stats.bytes = sum(len(v) for v in doc.vectors) * 4
+
+    # ---- question answering ----
+    def retrieve(self, bucket_index: BucketIndex, query: str, trace: PipelineTrace, k: int = 4,
+                 terms: Sequence[str] = ()) -> List[Document]:
+        with trace.stage("retrieve") as stats:
+            cache, version = self.retrieval_cache, bucket_index.version
+            docs, query_vector = cache.get(bucket_index, query, k, terms) if cache is not None else (None, None)
+            if docs is not None:
+                stats.cached = len(docs)
+            else:
+                # The query embedding made for the cache lookup is reused by the search.
+                extra = {"query_vector": query_vector} if query_vector is not None else {}
+                docs = self.retriever(bucket_index, query, k, terms, **extra)
+                if cache is not None:
+                    cache.put(bucket_index, query, k, terms, docs, query_vector, version)
+            stats.items = len(docs)
+            stats.bytes = _text_bytes(d.page_content for d in docs)
+        return docs
+
+    def pack(self, docs: Sequence[Document], trace: PipelineTrace,
+             token_budget: int = CONTEXT_TOKEN_BUDGET) -> PackedContext:
+        """Merge overlapping neighbours, drop near-duplicates and fit the token budget."""
+        with trace.stage("pack") as stats:
+            packed = self.packer(docs, token_budget)
+            stats.items = len(packed.passages)
+            stats.bytes = len(packed.text.encode("utf-8"))
+            stats.extra.update(tokens_in=packed.tokens_in, tokens_out=packed.tokens_out,
+                               tokens_saved=packed.tokens_saved)
+            get_metrics().inc("hpdfhub_context_tokens_total", packed.tokens_out)
+            get_metrics().inc("hpdfhub_context_tokens_saved_total", packed.tokens_saved)
+        return packed
+
+    def generate(self, chat_model, template: str, context: str, question: str, trace: PipelineTrace,
+                 bypass_cache: bool = False) -> Iterator[str]:
+        """
+        Stream the answer. Answers are cached on (template, context, question, model,
+        temperature); bypass_cache forces a fresh generation that still refreshes the cache.
+        The stage is recorded in the trace once the stream is exhausted.
+        """
+        with trace.stage("generate") as stats:
+            key = llm_cache_key(template, context, question, CHAT_MODEL_NAME, CHAT_TEMPERATURE)
+            cached = None
+            if self.answer_cache is not None and not bypass_cache:
+                cached = self.answer_cache.get(key)
+            if cached is not None:
+                stats.items, stats.cached, stats.bytes = 1, 1, len(cached.encode("utf-8"))
+                yield cached
+                return
+
+            generation = GenerationStats()
+            parts = []
+            prompt = template.format(context=context, question=question)
+            for text in stream_chat_model(chat_model, prompt, generation):
+                parts.append(text)
+                yield text
+            answer = "".join(parts)
+            if self.answer_cache is not None:
+                self.answer_cache.put(key, answer)
+            stats.items = generation.chunks
+            stats.bytes = len(answer.encode("utf-8"))
+            metrics = get_metrics()
+            metrics.observe("hpdfhub_llm_seconds", generation.total_time)
+            metrics.inc("hpdfhub_llm_tokens_total", generation.chunks)
+            if generation.time_to_first_token is not None:
+                stats.extra["time_to_first_token"] = round(generation.time_to_first_token, 4)
+                metrics.observe("hpdfhub_llm_first_token_seconds", generation.time_to_first_token)
+
+
+def _cache_entry(texts: List[str], vectors: List[List[float]], pages: List[Optional[int]]) -> FAISS:
+    return FAISS.from_embeddings(list(zip(texts, vectors)), get_embeddings(), metadatas=[{"page": p} for p in pages])
+
+
+_pipeline: Optional[Pipeline] = None
+
+
+def _collect_cache_metrics(metrics: Metrics) -> None:
+    answers, indexes, retrievals = get_llm_cache(), get_index_cache(), get_retrieval_cache()
+    metrics.set_counter("hpdfhub_llm_cache_hits_total", answers.hits)
+    metrics.set_counter("hpdfhub_llm_cache_misses_total", answers.misses)
+    metrics.set_counter("hpdfhub_index_cache_hits_total", indexes.hits)
+    metrics.set_counter("hpdfhub_index_cache_misses_total", indexes.misses)
+    metrics.set_counter("hpdfhub_retrieval_cache_hits_total", retrievals.exact_hits, match="exact")
+    metrics.set_counter("hpdfhub_retrieval_cache_hits_total", retrievals.semantic_hits, match="semantic")
+    metrics.set_counter("hpdfhub_retrieval_cache_misses_total", retrievals.misses)
+
+
+def get_pipeline() -> Pipeline:
+    """Process-wide pipeline with the default stages and all caches enabled."""
+    global _pipeline
+    if _pipeline is None:
+        _pipeline = Pipeline(embed_cache=get_index_cache(), answer_cache=get_llm_cache(),
+                             retrieval_cache=get_retrieval_cache())
+        get_metrics().add_collector(_collect_cache_metrics)
+    return _pipeline
+
@@ -0,0 +1,54 @@
+"""
+Shared retrieval service for all Streamlit worker processes on this host.
+
+    python -m src.healthcare_pdf_hub.retrieval_server --address 127.0.0.1:8765
+    python -m src.healthcare_pdf_hub.retrieval_server --address /tmp/hpdfhub-retrieval.sock
+
+Loads the embedding model once and serves embedding calls and searches over the
+prebuilt folder indexes (memory-mapped, picked up again after each ingest). Start the
+app with HPDFHUB_RETRIEVAL_SERVICE set to the same address so no worker loads the
+model itself.
+Clients authenticate with HPDFHUB_RETRIEVAL_AUTHKEY or, if it is unset, the random key
+this service writes to HPDFHUB_RETRIEVAL_KEY_FILE (owner-only). TCP addresses must be
+on loopback unless HPDFHUB_RETRIEVAL_ALLOW_REMOTE=1.
+"""
+import argparse
+import logging
+import sys
+from pathlib import Path
+
+from src.healthcare_pdf_hub.config import PREBUILT_DIR, RETRIEVAL_SERVICE
+from src.healthcare_pdf_hub.utils.faiss_utils import load_local_embeddings
+from src.healthcare_pdf_hub.utils.retrieval import LocalRetrieval, load_authkey, parse_address, serve
+
+BUCKETS = ("medical", "medicine", "hospital")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--address", default=RETRIEVAL_SERVICE or "127.0.0.1:8765",
+                        help="host:port or Unix socket path (default: HPDFHUB_RETRIEVAL_SERVICE)")
+    parser.add_argument("--prebuilt", default=str(PREBUILT_DIR), help="root directory of the prebuilt indexes")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    try:
+        address = parse_address(args.address)
+        authkey = load_authkey(create=True)
+    except (ValueError, RuntimeError, OSError) as exc:
+        print(f"retrieval service not started: {exc}")
+        return 1
+
+    backend = LocalRetrieval(embeddings=load_local_embeddings(), root=Path(args.prebuilt))
+    backend.embed_query("warm up")
+    for bucket in BUCKETS:
+        backend.store(bucket)  # map the indexes before the first request
+    print(f"retrieval service ready: {backend.info()['indexes'] or 'no prebuilt indexes'}")
+    try:
+        serve(address, backend, authkey)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
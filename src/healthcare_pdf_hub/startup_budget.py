@@ -0,0 +1,93 @@
+"""
+Cold-start import budget for app.py.
+
+    python -m src.healthcare_pdf_hub.startup_budget
+    python -m src.healthcare_pdf_hub.startup_budget --budget-ms 800 --json importtime.json
+    python -m src.healthcare_pdf_hub.startup_budget --baseline importtime.json
+
+Imports every module app.py imports at top level in a fresh interpreter under
+`python -X importtime` and fails (exit code 1) when the ML stack is among them or the
+total import time exceeds the budget. The per-module timings can be written as JSON
+and compared against an earlier run.
+"""
+import argparse
+import ast
+import json
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List
+
+APP_PATH = Path(__file__).resolve().parents[2] / "app.py"
+
+# Must only be imported once a retrieval / LLM path runs.
+HEAVY_MODULES = (
+    "langchain", "langchain_community", "langchain_core", "langchain_text_splitters",
+    "faiss", "torch", "sentence_transformers", "transformers", "euriai", "pandas",
+)
+
+
+def app_top_level_imports(app_path: Path = APP_PATH) -> List[str]:
+    """Modules imported at module level of app.py (function-level imports are lazy by design)."""
+    tree = ast.parse(app_path.read_text(encoding="utf-8"))
+    modules = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            modules.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            modules.append(node.module)
+    return list(dict.fromkeys(modules))
+
+
+def measure_imports(modules: List[str], cwd: Path = APP_PATH.parent) -> List[Dict]:
+    """Rows of {module, self_us, cumulative_us} from one `python -X importtime` run."""
+    code = "; ".join(f"import {module}" for module in modules)
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=str(cwd),
+                          capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"importing the app modules failed:\n{proc.stderr[-2000:]}")
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append({"module": name.strip(), "self_us": int(self_us), "cumulative_us": int(cumulative_us)})
+    return rows
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--budget-ms", type=float, default=1500.0, help="allowed total import time")
+    parser.add_argument("--top", type=int, default=15, help="slowest modules to print")
+    parser.add_argument("--json", help="write the per-module timings to this file")
+    parser.add_argument("--baseline", help="timings JSON of an earlier run to compare against")
+    args = parser.parse_args(argv)
+
+    modules = app_top_level_imports()
+    rows = measure_imports(modules)
+    total_ms = sum(row["self_us"] for row in rows) / 1000
+    heavy = sorted({row["module"] for row in rows if row["module"].split(".")[0] in HEAVY_MODULES})
+
+    print(f"app.py top-level imports: {len(modules)} statements, {len(rows)} modules, {total_ms:.0f} ms "
+          f"(budget {args.budget_ms:.0f} ms)")
+    for row in sorted(rows, key=lambda r: r["cumulative_us"], reverse=True)[: args.top]:
+        print(f"  {row['cumulative_us'] / 1000:8.1f} ms  {row['module']}")
+    if args.baseline:
+        before = json.loads(Path(args.baseline).read_text(encoding="utf-8"))["total_ms"]
+        print(f"baseline {before:.0f} ms -> {total_ms:.0f} ms ({total_ms / before:.2f}x)" if before else "")
+    if args.json:
+        Path(args.json).write_text(json.dumps({"total_ms": round(total_ms, 1), "modules": rows}, indent=2),
+                                   encoding="utf-8")
+
+    ok = True
+    if heavy:
+        print(f"FAIL: ML stack imported at startup: {', '.join(heavy[:10])}")
+        ok = False
+    if total_ms > args.budget_ms:
+        print(f"FAIL: startup imports take {total_ms:.0f} ms, over the {args.budget_ms:.0f} ms budget")
+        ok = False
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
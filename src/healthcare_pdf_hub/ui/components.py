@@ -1,47 +1,335 @@
+import sys
+import uuid
+from contextlib import contextmanager
 from datetime import datetime
+from functools import partial
+from pathlib import Path
+from typing import TYPE_CHECKING
 import streamlit as st
+from src.healthcare_pdf_hub.config import ADMIN_PANEL, LIBRARY_PAGE_SIZE
+from src.healthcare_pdf_hub.utils.blob_store import get_blob_store, read_entry_bytes
+from src.healthcare_pdf_hub.utils.ingest_queue import IngestJob, get_ingest_queue
+from src.healthcare_pdf_hub.utils.metrics import get_metrics
+from src.healthcare_pdf_hub.utils.profiling import profile_request
 from src.healthcare_pdf_hub.utils.pdf_utils import human_size, pdf_preview_html
+from src.healthcare_pdf_hub.utils.thumbnails import THUMBNAIL_WIDTH, first_page_thumbnail
+
+# The pipeline and bucket indexes pull in langchain / FAISS; they are imported on first use
+# so pages that never index or retrieve don't pay for the ML stack.
+if TYPE_CHECKING:
+    from src.healthcare_pdf_hub.pipeline import PipelineTrace
+    from src.healthcare_pdf_hub.utils.bucket_index import BucketIndex
+
+BUCKETS = ("medical", "medicine", "hospital")
+
+def get_bucket_index(bucket_key: str) -> "BucketIndex":
+    """Return this session's long-lived vector index for the bucket (tab)."""
+    if "indexes" not in st.session_state:
+        from src.healthcare_pdf_hub.utils.bucket_index import BucketIndex
+
+        st.session_state.indexes = {key: BucketIndex() for key in BUCKETS}
+    return st.session_state.indexes[bucket_key]
+
+def _session_id() -> str:
+    if "session_id" not in st.session_state:
+        st.session_state.session_id = uuid.uuid4().hex
+    return st.session_state.session_id
+
+# Job state while a pipeline stage runs.
+_STAGE_STATES = {"extract": "extracting", "chunk": "extracting", "embed": "embedding", "index": "indexing"}
+
+def _index_entry(index: "BucketIndex", entry: dict, pdf_bytes: bytes, job: IngestJob) -> int:
+    """Worker side of process_uploads: embed one upload and append it to the bucket index."""
+    from src.healthcare_pdf_hub.pipeline import PipelineTrace, get_pipeline
+
+    pipeline = get_pipeline()
+    trace = PipelineTrace(on_stage=lambda name: job.advance(_STAGE_STATES.get(name, job.state)))
+    doc = pipeline.embed_documents(pipeline.load([pdf_bytes], trace), trace)[0]
+    if job.cancelled:
+        return 0
+    # Also runs the catalog mention matcher over every chunk
+    pipeline.index(index, entry["id"], entry["name"], doc, trace)
+    if job.cancelled:
+        index.remove_document(entry["id"])  # removed from the Library while indexing
+    entry["chunks"] = len(doc.texts)
+    return len(doc.texts)
 
 def process_uploads(files, bucket_key: str):
-    """Persist uploaded files in session_state under the given bucket (tab)."""
+    """
+    Queue each uploaded file for background indexing and, once the queue has accepted it,
+    store it in the shared blob store, keeping only a handle plus metadata in session_state
+    under the given bucket (tab). Files the ingest queue refuses (it is full) are not added
+    and nothing of them is stored.
+    """
     if "uploads" not in st.session_state:
-        st.session_state.uploads = {"medical": [], "medicine": [], "hospital": []}
+        st.session_state.uploads = {key: [] for key in BUCKETS}
+    jobs = st.session_state.setdefault("ingest_jobs", {})
     bucket = st.session_state.uploads[bucket_key]
+    index = get_bucket_index(bucket_key)
+    store = get_blob_store()
+    ingest = get_ingest_queue()
 
+    refused = []
     for f in files:
         pdf_bytes = f.read()
         entry = {
+            "id": uuid.uuid4().hex,
             "name": f.name,
             "size": len(pdf_bytes),
             "pages": "—",  # page count will be computed in preview
             "uploaded_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            "data": pdf_bytes,
+            "chunks": None,  # set once the document is indexed
         }
+        # The job carries the bytes until a worker has indexed them, so storing the blob
+        # after submit() can't race the worker.
+        job = IngestJob(entry["id"], entry["name"], _session_id(),
+                        run=partial(_index_entry, index, entry, pdf_bytes))
+        if not ingest.submit(job):
+            refused.append(f.name)
+            continue
+        entry["blob"] = store.put(pdf_bytes)  # SHA-256 handle; identical PDFs are stored once
+        jobs[entry["id"]] = job
         bucket.append(entry)
+    if refused:
+        st.warning(f"Indexing is busy; not added: {', '.join(refused)}. Try again once the current documents are indexed.")
+
+def pending_jobs(bucket_key: str):
+    """This session's documents in the bucket that are still waiting for or being indexed."""
+    jobs = st.session_state.get("ingest_jobs", {})
+    bucket = st.session_state.get("uploads", {}).get(bucket_key, [])
+    return [jobs[item["id"]] for item in bucket if item["id"] in jobs and not jobs[item["id"]].done]
+
+def empty_index_message(bucket_key: str) -> str:
+    if pending_jobs(bucket_key):
+        return "Your documents are still being indexed; try again in a moment."
+    return "No extractable text found in the Library (PDFs may be scanned images)."
+
+def _render_ingest_progress(bucket_key: str):
+    pending = pending_jobs(bucket_key)
+    for job in pending:
+        st.progress(job.progress, text=f"{job.name}: {job.state}…")
+    flag = f"{bucket_key}_ingest_active"
+    if pending:
+        st.session_state[flag] = True
+    elif st.session_state.get(flag):
+        # Everything finished: rerun the page once so the Library table shows the results.
+        st.session_state[flag] = False
+        st.rerun()
+
+# Poll the workers every second without rerunning the whole page (Streamlit >= 1.37).
+if hasattr(st, "fragment"):
+    render_ingest_progress = st.fragment(run_every=1.0)(_render_ingest_progress)
+else:
+    render_ingest_progress = _render_ingest_progress
+
+def _ingest_status(job) -> str:
+    if job is None or job.state == "indexed":
+        return "Indexed"
+    if job.state == "failed":
+        return f"Failed: {job.error}"
+    return f"{job.state.capitalize()}…"
+
+def remove_upload(bucket_key: str, doc_id: str):
+    """Drop a document from the Library bucket and its chunks from the bucket index."""
+    bucket = st.session_state.get("uploads", {}).get(bucket_key, [])
+    st.session_state.uploads[bucket_key] = [item for item in bucket if item.get("id") != doc_id]
+    job = st.session_state.get("ingest_jobs", {}).pop(doc_id, None)
+    if job is not None:
+        job.cancelled = True
+    get_bucket_index(bucket_key).remove_document(doc_id)
+
+def retrieve(bucket_index: "BucketIndex", query: str, terms=()):
+    """Run the pipeline's retrieve stage; returns (trace, documents) for the answer that follows."""
+    from src.healthcare_pdf_hub.pipeline import PipelineTrace, get_pipeline
+
+    trace = PipelineTrace()
+    return trace, get_pipeline().retrieve(bucket_index, query, trace, terms=terms)
+
+def build_context(trace: "PipelineTrace", docs) -> str:
+    """Prompt context from the retrieved docs, packed into the token budget (pack stage)."""
+    from src.healthcare_pdf_hub.pipeline import get_pipeline
+
+    return get_pipeline().pack(docs, trace).text
+
+def render_streamed_answer(chat_model, template: str, context: str, question: str,
+                           bypass_cache: bool = False, trace: "PipelineTrace" = None) -> str:
+    """
+    Render the MediChat answer for template/context/question, token by token, through the
+    pipeline's (cached) generate stage; bypass_cache forces a fresh generation.
+    """
+    from src.healthcare_pdf_hub.pipeline import PipelineTrace, get_pipeline
+
+    st.markdown("### 🧠 MediChat Pro — Answer")
+    trace = trace if trace is not None else PipelineTrace()
+    response = st.write_stream(get_pipeline().generate(
+        chat_model, template, context, question, trace, bypass_cache=bypass_cache
+    ))
+    generate = trace.get("generate")
+    if generate is not None and generate.cached:
+        st.caption("Served from the answer cache.")
+    elif generate is not None and "time_to_first_token" in generate.extra:
+        st.caption(f"First token after {generate.extra['time_to_first_token']:.2f}s • total {generate.seconds:.2f}s")
+    pack = trace.get("pack")
+    if pack is not None and pack.extra.get("tokens_saved"):
+        st.caption(f"Context: ~{pack.extra['tokens_out']:.0f} tokens "
+                   f"(~{pack.extra['tokens_saved']:.0f} fewer than the raw retrieved chunks).")
+    st.caption(trace.summary())
+    return response
+
+def _library_page(bucket, bucket_key: str):
+    """The slice of the bucket shown on the current Library page (all of it if it fits on one)."""
+    n_pages = max(1, -(-len(bucket) // LIBRARY_PAGE_SIZE))
+    if n_pages == 1:
+        return bucket
+    page = st.number_input(f"Page (of {n_pages})", min_value=1, max_value=n_pages, value=1, step=1,
+                           key=f"{bucket_key or 'library'}_page")
+    start = (int(page) - 1) * LIBRARY_PAGE_SIZE
+    return bucket[start:start + LIBRARY_PAGE_SIZE]
 
-def render_bucket_table(bucket):
+def render_document_preview(item: dict, key_prefix: str):
+    """
+    Preview and download of one document. Only a cached first-page thumbnail is sent by
+    default; the full PDF goes over the websocket only when its preview or download is asked for.
+    """
+    thumbnail = first_page_thumbnail(item)
+    if thumbnail is not None:
+        st.image(str(thumbnail), caption="Page 1", width=THUMBNAIL_WIDTH)
+    try:
+        if st.checkbox("Show full PDF", key=f"{key_prefix}_full"):
+            st.components.v1.html(pdf_preview_html(read_entry_bytes(item)), height=620, scrolling=True)
+
+        prepared_key = f"{key_prefix}_prepared"
+        doc_key = item.get("id") or item["name"]
+        if st.button("Prepare download", key=f"{key_prefix}_prepare"):
+            st.session_state[prepared_key] = doc_key
+        if st.session_state.get(prepared_key) == doc_key:
+            st.download_button(
+                label="Download PDF",
+                data=read_entry_bytes(item),
+                file_name=item["name"],
+                mime="application/pdf",
+                key=f"{key_prefix}_file",
+            )
+    except FileNotFoundError:  # blob pruned after the session sat idle past the TTL
+        st.warning("The stored copy of this document has expired; upload it again to preview or download it.")
+
+def render_bucket_table(bucket, bucket_key: str = None):
     if not bucket:
         st.info("No PDFs uploaded yet.")
         return
 
+    jobs = st.session_state.get("ingest_jobs", {})
+    page = _library_page(bucket, bucket_key)
     rows = [
         {"File name": item["name"], "Size": human_size(item["size"]),
-         "Pages": item.get("pages", "—"), "Uploaded": item["uploaded_at"]}
-        for item in bucket
+         "Pages": item.get("pages", "—"), "Uploaded": item["uploaded_at"],
+         "Chunks": item.get("chunks"), "Status": _ingest_status(jobs.get(item.get("id")))}
+        for item in page
     ]
     st.dataframe(rows, use_container_width=True)
+    if bucket_key:
+        mem = get_bucket_index(bucket_key).memory_report()
+        get_metrics().set("hpdfhub_index_vectors", mem["vectors"], bucket=bucket_key)
+        get_metrics().set("hpdfhub_index_bytes", mem["index_bytes"], bucket=bucket_key)
+        if mem["vectors"]:
+            st.caption(
+                f"Index: {mem['vectors']} chunks • {mem['kind']} / {mem['dtype']} • "
+                f"{human_size(mem['index_bytes'])} in memory (float32 vectors: {human_size(mem['float32_bytes'])})"
+            )
 
     with st.expander("Preview & download", expanded=False):
-        for i, item in enumerate(bucket, start=1):
-            st.subheader(f"{i}. {item['name']}")
-            st.caption(f"Size: {human_size(item['size'])} • Pages: {item.get('pages','—')} • Uploaded: {item['uploaded_at']}")
-            st.components.v1.html(pdf_preview_html(item["data"]), height=620, scrolling=True)
-            st.download_button(
-                label="Download PDF",
-                data=item["data"],
-                file_name=item["name"],
-                mime="application/pdf",
-                key=f"dl_{item['name']}_{item['uploaded_at']}",
+        key_prefix = f"lib_{bucket_key or 'bucket'}"
+        labels = [f"{item['name']} ({item['uploaded_at']})" for item in page]
+        pick = st.selectbox("Document", options=range(len(page)), format_func=labels.__getitem__,
+                            key=f"{key_prefix}_pick")
+        item = page[pick]
+        st.caption(f"Size: {human_size(item['size'])} • Pages: {item.get('pages','—')} • Uploaded: {item['uploaded_at']}")
+        render_document_preview(item, key_prefix)
+        if bucket_key:
+            st.button(
+                "Remove from Library",
+                key=f"rm_{item['id']}",
+                on_click=remove_upload,
+                args=(bucket_key, item["id"]),
             )
-            st.divider()
 
+def _uploads_bytes(uploads) -> int:
+    """Approximate bytes the session's uploads metadata holds (PDF bytes live in the blob store)."""
+    total = sys.getsizeof(uploads)
+    for bucket in uploads.values():
+        total += sys.getsizeof(bucket)
+        for entry in bucket:
+            total += sys.getsizeof(entry) + sum(sys.getsizeof(v) for v in entry.values())
+    return total
+
+def record_session_metrics():
+    """
+    Report this session's uploads footprint to the process-wide metrics, and keep the
+    blobs it still lists from being pruned.
+    """
+    uploads = st.session_state.get("uploads", {})
+    get_metrics().record_session_memory(_session_id(), _uploads_bytes(uploads))
+    get_blob_store().touch(entry["blob"] for bucket in uploads.values() for entry in bucket if entry.get("blob"))
+
+@contextmanager
+def request_profile(label: str):
+    """Profile the enclosed request once the admin panel has armed the profiler for this session."""
+    if not st.session_state.get("profile_armed"):
+        yield
+        return
+    min_seconds = float(st.session_state.get("admin_profile_min_seconds", 0.0))
+    with profile_request(label, min_seconds) as result:
+        yield
+    if result.path is not None:
+        st.session_state.profile_armed = False
+        st.session_state.last_profile = str(result.path)
+
+def _arm_profiler():
+    st.session_state.profile_armed = True
+
+def render_admin_panel():
+    """Sidebar with stage latencies, cache hit rates and the request profiler (HPDFHUB_ADMIN_PANEL=1)."""
+    if not ADMIN_PANEL:
+        return
+    metrics = get_metrics()
+    exposition = metrics.render()
+    with st.sidebar:
+        st.header("Admin")
+        rows = [
+            {"Stage": dict(labels)["stage"], "Runs": hist.count, "Mean s": round(hist.sum / hist.count, 3),
+             "p95 s ≤": hist.quantile(0.95)}
+            for labels, hist in metrics.histograms("hpdfhub_stage_seconds").items() if hist.count
+        ]
+        if rows:
+            st.dataframe(rows, use_container_width=True, hide_index=True)
+        else:
+            st.caption("No pipeline runs yet.")
+
+        # Filled in by the pipeline's cache collector once the pipeline is in use
+        for label, prefix in (("Answer cache", "hpdfhub_llm_cache"), ("Index cache", "hpdfhub_index_cache")):
+            hits, misses = metrics.value(f"{prefix}_hits_total"), metrics.value(f"{prefix}_misses_total")
+            if hits is not None:
+                rate = hits / (hits + misses) if hits + misses else 0.0
+                st.caption(f"{label}: {hits:g} hits / {misses:g} misses ({rate:.0%})")
+        exact = metrics.value("hpdfhub_retrieval_cache_hits_total", match="exact")
+        if exact is not None:
+            semantic = metrics.value("hpdfhub_retrieval_cache_hits_total", match="semantic")
+            misses = metrics.value("hpdfhub_retrieval_cache_misses_total")
+            total = exact + semantic + misses
+            rate = (exact + semantic) / total if total else 0.0
+            st.caption(f"Retrieval cache: {exact:g} exact + {semantic:g} similar hits / {misses:g} misses ({rate:.0%})")
+
+        st.subheader("Profiler")
+        st.number_input("Keep profiles of requests slower than (s)", min_value=0.0, value=0.0, step=0.5,
+                        key="admin_profile_min_seconds")
+        if st.session_state.get("profile_armed"):
+            st.caption("Armed: the next request of this session over the threshold is profiled.")
+        else:
+            st.button("Profile next slow request", on_click=_arm_profiler, key="admin_profile_arm")
+        last = st.session_state.get("last_profile")
+        if last and Path(last).exists():
+            with st.expander(f"Last profile: {Path(last).name}"):
+                st.code(Path(last).read_text(encoding="utf-8"), language="text")
+
+        with st.expander("Prometheus metrics"):
+            st.code(exposition, language="text")
@@ -0,0 +1,108 @@
+# Content-addressed, deduplicating store for uploaded PDFs.
+#
+# Each unique PDF is written once under its SHA-256; session entries keep only the
+# handle plus metadata. Reads go through mmap so the bytes live in the OS page cache
+# (shared by every worker process) instead of in each session. Blobs untouched for
+# HPDFHUB_BLOB_TTL_HOURS are pruned; sessions touch the blobs they still list, and a
+# reader must expect FileNotFoundError for an entry whose session outlived the TTL.
+import hashlib
+import io
+import mmap
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional
+
+from src.healthcare_pdf_hub.config import BLOB_DIR, BLOB_TTL_HOURS
+
+PRUNE_INTERVAL_SECONDS = 3600
+
+
+class BlobStore:
+    def __init__(self, root: Path, ttl_seconds: float):
+        self.root = Path(root)
+        self.ttl_seconds = ttl_seconds
+        self._last_prune = 0.0
+        self._lock = threading.Lock()
+
+    def path(self, handle: str) -> Path:
+        return self.root / handle[:2] / handle
+
+    def put(self, data: bytes) -> str:
+        """Store data (once) and return its handle."""
+        handle = hashlib.sha256(data).hexdigest()
+        path = self.path(handle)
+        try:
+            os.utime(path, None)
+        except FileNotFoundError:  # new, or pruned since it was last seen
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_name(f".{handle}.{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp.write_bytes(data)
+            os.replace(tmp, path)
+        self._maybe_prune()
+        return handle
+
+    def touch(self, handles) -> None:
+        """Mark blobs as still in use so the pruner keeps them; missing ones are ignored."""
+        for handle in handles:
+            try:
+                os.utime(self.path(handle), None)
+            except OSError:
+                continue
+
+    def size(self, handle: str) -> int:
+        return self.path(handle).stat().st_size
+
+    @contextmanager
+    def open_view(self, handle: str) -> Iterator[mmap.mmap]:
+        """Read-only memory map of a blob (file-like: read/seek/tell)."""
+        path = self.path(handle)
+        os.utime(path, None)
+        with open(path, "rb") as fh:
+            if os.fstat(fh.fileno()).st_size == 0:
+                yield io.BytesIO(b"")  # mmap can't map empty files
+                return
+            view = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                yield view
+            finally:
+                view.close()
+
+    def read(self, handle: str) -> bytes:
+        with self.open_view(handle) as view:
+            return view.read()
+
+    def _maybe_prune(self) -> None:
+        now = time.time()
+        with self._lock:
+            if now - self._last_prune < PRUNE_INTERVAL_SECONDS:
+                return
+            self._last_prune = now
+        cutoff = now - self.ttl_seconds
+        for path in self.root.glob("*/*"):
+            try:
+                if path.stat().st_mtime < cutoff:
+                    path.unlink()
+            except OSError:
+                continue
+
+
+_blob_store: Optional[BlobStore] = None
+
+
+def get_blob_store() -> BlobStore:
+    global _blob_store
+    if _blob_store is None:
+        _blob_store = BlobStore(BLOB_DIR, BLOB_TTL_HOURS * 3600)
+    return _blob_store
+
+
+def read_entry_bytes(entry: dict) -> bytes:
+    """Bytes of a Library entry: blob handle for uploads, path for folder items."""
+    if entry.get("blob"):
+        return get_blob_store().read(entry["blob"])
+    if entry.get("data") is not None:
+        return entry["data"]
+    return Path(entry["path"]).read_bytes()
@@ -0,0 +1,76 @@
+# In-memory BM25 inverted index over the same chunks as the FAISS index.
+#
+# Dense MiniLM embeddings match bare drug / hospital names poorly; a lexical index
+# answers those exactly, and reciprocal rank fusion combines both for free-text queries.
+import math
+import re
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset({"a", "an", "and", "e", "eg", "for", "g", "in", "is", "of", "on", "or", "the", "to", "with"})
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in TOKEN_RE.findall(text.lower()) if t not in STOPWORDS]
+
+
+class BM25Index:
+    """Okapi BM25 over chunks that can be added and removed one at a time."""
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, Dict[str, int]] = defaultdict(dict)
+        self.doc_len: Dict[str, int] = {}
+        self.docs: Dict[str, object] = {}
+        self._total_len = 0
+
+    def __len__(self) -> int:
+        return len(self.doc_len)
+
+    def add(self, chunk_id: str, text: str, doc: object) -> None:
+        tokens = tokenize(text)
+        for term, tf in Counter(tokens).items():
+            self.postings[term][chunk_id] = tf
+        self.doc_len[chunk_id] = len(tokens)
+        self.docs[chunk_id] = doc
+        self._total_len += len(tokens)
+
+    def remove(self, chunk_id: str, text: str) -> None:
+        if chunk_id not in self.doc_len:
+            return
+        for term in set(tokenize(text)):
+            plist = self.postings.get(term)
+            if plist is not None:
+                plist.pop(chunk_id, None)
+                if not plist:
+                    del self.postings[term]
+        self._total_len -= self.doc_len.pop(chunk_id)
+        self.docs.pop(chunk_id, None)
+
+    def search(self, query: str, k: int = 4) -> List[Tuple[str, float]]:
+        """Top-k (chunk_id, score) for the query; chunks with no query term are never returned."""
+        n = len(self.doc_len)
+        if n == 0:
+            return []
+        avg_len = self._total_len / n or 1.0
+        scores: Dict[str, float] = defaultdict(float)
+        for term in set(tokenize(query)):
+            plist = self.postings.get(term)
+            if not plist:
+                continue
+            idf = math.log(1 + (n - len(plist) + 0.5) / (len(plist) + 0.5))
+            for chunk_id, tf in plist.items():
+                norm = self.k1 * (1 - self.b + self.b * self.doc_len[chunk_id] / avg_len)
+                scores[chunk_id] += idf * tf * (self.k1 + 1) / (tf + norm)
+        return sorted(scores.items(), key=lambda kv: kv[1], reverse=True)[:k]
+
+
+def reciprocal_rank_fusion(rankings: Iterable[Sequence[str]], k: int = 60) -> List[str]:
+    """Fuse ranked id lists: score(id) = sum(1 / (k + rank))."""
+    fused: Dict[str, float] = defaultdict(float)
+    for ranking in rankings:
+        for rank, chunk_id in enumerate(ranking, start=1):
+            fused[chunk_id] += 1.0 / (k + rank)
+    return sorted(fused, key=fused.get, reverse=True)
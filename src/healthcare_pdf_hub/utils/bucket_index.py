@@ -0,0 +1,256 @@
+# Long-lived vector index per Library bucket (medical / medicine / hospital).
+#
+# Documents are embedded once when they are added to the Library and their chunks are
+# appended to the bucket's FAISS index; deleting a document removes only its chunks.
+# Queries are then pure retrieval.
+import bisect
+import threading
+import uuid
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import faiss
+import numpy as np
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+
+from src.healthcare_pdf_hub.config import (
+    CHUNK_OVERLAP, CHUNK_SIZE, FAISS_RERANK_FACTOR, FAISS_VECTOR_DTYPE
+)
+from src.healthcare_pdf_hub.utils.bm25 import BM25Index, reciprocal_rank_fusion
+from src.healthcare_pdf_hub.utils.catalog_terms import catalog_terms, is_catalog_query
+from src.healthcare_pdf_hub.utils.faiss_utils import (
+    build_faiss_index, choose_index_kind, get_embeddings, index_dtype,
+    index_kind, index_memory_bytes, retrive_relevant_docs, vectorstore_from_embeddings
+)
+from src.healthcare_pdf_hub.utils.full_vectors import FullPrecisionVectors, rerank_exact
+from src.healthcare_pdf_hub.utils.mention_index import MentionIndex
+
+# Candidates fetched from each retriever before rank fusion, as a multiple of k.
+HYBRID_FETCH_FACTOR = 3
+
+
+def _splitter(add_start_index: bool = False) -> RecursiveCharacterTextSplitter:
+    return RecursiveCharacterTextSplitter(
+        chunk_size=CHUNK_SIZE,
+        chunk_overlap=CHUNK_OVERLAP,
+        length_function=len,
+        add_start_index=add_start_index,
+    )
+
+
+def split_text(text: str) -> List[str]:
+    return _splitter().split_text(text)
+
+
+def split_pages(pages: List[str]) -> Tuple[List[str], List[int]]:
+    """
+    Chunk a document exactly like split_text("\\n".join(pages).strip()) and also return
+    the 1-based page on which each chunk starts.
+    """
+    joined = "\n".join(pages)
+    text = joined.strip()
+    lead = len(joined) - len(joined.lstrip())
+    page_starts, pos = [], 0
+    for page in pages:
+        page_starts.append(pos - lead)
+        pos += len(page) + 1
+    docs = _splitter(add_start_index=True).create_documents([text]) if text else []
+    chunk_pages = [max(1, bisect.bisect_right(page_starts, d.metadata["start_index"])) for d in docs]
+    return [d.page_content for d in docs], chunk_pages
+
+
+@dataclass
+class EmbeddedDocument:
+    texts: List[str] = field(default_factory=list)
+    vectors: List[List[float]] = field(default_factory=list)
+    pages: List[Optional[int]] = field(default_factory=list)  # page each chunk starts on
+
+
+class BucketIndex:
+    """
+    FAISS + BM25 index for one bucket that grows and shrinks one document at a time.
+    With dtype "float16" / "int8" the FAISS index holds compact codes and dense hits are
+    re-ranked against float32 copies kept on disk.
+    """
+
+    def __init__(self, dtype: str = FAISS_VECTOR_DTYPE):
+        self.dtype = dtype
+        self.vectorstore: Optional[FAISS] = None
+        self.full_vectors: Optional[FullPrecisionVectors] = None
+        self._trained_on = 0  # vectors the scalar quantizer was last trained on
+        self._memory: Optional[Tuple[int, Dict[str, object]]] = None
+        self.lexical = BM25Index()
+        self.mentions = MentionIndex(catalog_terms())
+        self.doc_chunks: Dict[str, List[Tuple[str, str]]] = {}  # doc_id -> [(chunk_id, text)]
+        self.version = 0
+        self._lock = threading.RLock()
+
+    @property
+    def num_chunks(self) -> int:
+        return self.vectorstore.index.ntotal if self.vectorstore is not None else 0
+
+    def add_document(self, doc_id: str, name: str, texts: List[str], vectors: List[List[float]],
+                     pages: Optional[List[Optional[int]]] = None) -> None:
+        if not texts:
+            return
+        ids = [uuid.uuid4().hex for _ in texts]
+        pages = pages or [None] * len(texts)
+        metadatas = [
+            {"doc_id": doc_id, "source": name, "chunk": i, "chunk_id": chunk_id, "page": page}
+            for i, (chunk_id, page) in enumerate(zip(ids, pages))
+        ]
+        with self._lock:
+            # Anything that trains an index (and so can fail) runs before the bucket changes.
+            if self.vectorstore is None:
+                vectorstore = vectorstore_from_embeddings(texts, vectors, metadatas, ids,
+                                                          kind=choose_index_kind(len(texts)), dtype=self.dtype)
+                upgraded = None
+            else:
+                vectorstore = self.vectorstore
+                upgraded = self._upgraded_index(vectors)
+            if self.dtype != "float32":
+                if self.full_vectors is None:
+                    self.full_vectors = FullPrecisionVectors(len(vectors[0]))
+                self.full_vectors.add(ids, vectors)
+            if self.vectorstore is None:
+                self.vectorstore = vectorstore
+                self._trained_on = len(texts)
+            else:
+                self.vectorstore.add_embeddings(list(zip(texts, vectors)), metadatas=metadatas, ids=ids)
+                if upgraded is not None:
+                    self.vectorstore.index = upgraded
+                    self._trained_on = upgraded.ntotal
+            for chunk_id, text, metadata in zip(ids, texts, metadatas):
+                self.lexical.add(chunk_id, text, Document(page_content=text, metadata=metadata))
+                self.mentions.add_chunk(doc_id, metadata["chunk"], chunk_id, text, metadata["page"])
+            self.doc_chunks[doc_id] = list(zip(ids, texts))
+            self.version += 1
+
+    def remove_document(self, doc_id: str) -> None:
+        with self._lock:
+            chunks = self.doc_chunks.get(doc_id, [])
+            if chunks and self.vectorstore is not None:
+                chunk_ids = [chunk_id for chunk_id, _ in chunks]
+                if index_kind(self.vectorstore.index) == "flat":
+                    self.vectorstore.delete(chunk_ids)
+                else:
+                    # HNSW can't remove vectors, and IVF removes them without renumbering the
+                    # rest (LangChain renumbers its position map, so the two would disagree).
+                    self._rebuild_without(chunk_ids)
+                if self.full_vectors is not None:
+                    self.full_vectors.remove(chunk_ids)
+                for chunk_id, text in chunks:
+                    self.lexical.remove(chunk_id, text)
+                self.mentions.remove_document(doc_id)
+                self.version += 1
+            self.doc_chunks.pop(doc_id, None)
+
+    def _vectors(self, positions: List[int]) -> np.ndarray:
+        """Full-precision vectors at the given index positions."""
+        vs = self.vectorstore
+        if not positions:
+            return np.empty((0, vs.index.d), dtype="float32")
+        if self.full_vectors is not None:
+            return self.full_vectors.get([vs.index_to_docstore_id[pos] for pos in positions])
+        ivf = faiss.try_extract_index_ivf(vs.index)
+        if ivf is not None and ivf.direct_map.type == faiss.DirectMap.NoMap:
+            ivf.make_direct_map()  # IVF lists can only reconstruct by position through it
+        return np.stack([vs.index.reconstruct(pos) for pos in positions])
+
+    def _upgraded_index(self, new_vectors: List[List[float]]) -> Optional[faiss.Index]:
+        """
+        The index to switch to once new_vectors are added: approximate search once the bucket
+        outgrows a flat index, or int8 quantizers retrained once the bucket has doubled since
+        they were trained. None when the current index can simply take the new vectors.
+        """
+        index = self.vectorstore.index
+        n = index.ntotal + len(new_vectors)
+        current = index_kind(index)
+        target = choose_index_kind(n)
+        retrain = self.dtype == "int8" and n >= 2 * self._trained_on
+        if target == current and not retrain:
+            return None
+        # flat / hnsw float32 vectors reconstruct exactly; compact ones come from full_vectors
+        if self.full_vectors is None and current not in ("flat", "hnsw"):
+            return None
+        vectors = np.concatenate([self._vectors(sorted(self.vectorstore.index_to_docstore_id)),
+                                  np.asarray(new_vectors, dtype="float32")])
+        return build_faiss_index(vectors, target, dtype=self.dtype)
+
+    def _rebuild_without(self, chunk_ids: List[str]) -> None:
+        vs = self.vectorstore
+        drop = set(chunk_ids)
+        keep = [pos for pos, _id in sorted(vs.index_to_docstore_id.items()) if _id not in drop]
+        # Build first: if training fails the bucket is left as it was.
+        index = build_faiss_index(self._vectors(keep), index_kind(vs.index), dtype=self.dtype) \
+            if keep else faiss.IndexFlatL2(vs.index.d)
+        vs.docstore.delete(chunk_ids)
+        vs.index_to_docstore_id = {new: vs.index_to_docstore_id[old] for new, old in enumerate(keep)}
+        vs.index = index
+        self._trained_on = len(keep)
+
+    def _dense_search(self, query: str, k: int, query_vector: Optional[List[float]] = None) -> List[Document]:
+        if self.full_vectors is None:
+            if query_vector is not None:
+                return self.vectorstore.similarity_search_by_vector(query_vector, k=k)
+            return retrive_relevant_docs(self.vectorstore, query, k=k)
+        # Over-fetch from the compact index, then order by exact float32 distance.
+        if query_vector is None:
+            query_vector = get_embeddings().embed_query(query)
+        candidates = self.vectorstore.similarity_search_by_vector(query_vector, k=k * FAISS_RERANK_FACTOR)
+        by_id = {doc.metadata["chunk_id"]: doc for doc in candidates}
+        return [by_id[chunk_id] for chunk_id in rerank_exact(query_vector, list(by_id), self.full_vectors, k)]
+
+    def memory_report(self) -> Dict[str, object]:
+        """Vector count, index kind / storage dtype and bytes held by the FAISS index."""
+        with self._lock:
+            if self._memory is None or self._memory[0] != self.version:
+                index = self.vectorstore.index if self.vectorstore is not None else None
+                n = index.ntotal if index is not None else 0
+                self._memory = (self.version, {
+                    "vectors": n,
+                    "kind": index_kind(index) if index is not None else "flat",
+                    "dtype": index_dtype(index) if index is not None else self.dtype,
+                    "index_bytes": index_memory_bytes(index) if index is not None else 0,
+                    "float32_bytes": n * index.d * 4 if index is not None else 0,
+                    "rerank_bytes_on_disk": self.full_vectors.disk_bytes if self.full_vectors else 0,
+                })
+            return dict(self._memory[1])
+
+    def search(self, query: str, k: int = 4, query_vector: Optional[List[float]] = None) -> List[Document]:
+        """
+        Hybrid retrieval. Exact catalog terms (medicine, brand, hospital, city) are answered
+        by the BM25 index alone, without embedding the query; everything else fuses dense
+        and lexical rankings with reciprocal rank fusion. Pass query_vector if the query
+        is already embedded.
+        """
+        with self._lock:
+            if self.num_chunks == 0:
+                return []
+            lexical_hits = self.lexical.search(query, k=k * HYBRID_FETCH_FACTOR)
+            if lexical_hits and is_catalog_query(query):
+                return [self.lexical.docs[chunk_id] for chunk_id, _ in lexical_hits[:k]]
+
+            dense_docs = self._dense_search(query, k * HYBRID_FETCH_FACTOR, query_vector)
+            by_id = {doc.metadata["chunk_id"]: doc for doc in dense_docs}
+            by_id.update({chunk_id: self.lexical.docs[chunk_id] for chunk_id, _ in lexical_hits})
+            fused = reciprocal_rank_fusion([
+                [doc.metadata["chunk_id"] for doc in dense_docs],
+                [chunk_id for chunk_id, _ in lexical_hits],
+            ])
+            return [by_id[chunk_id] for chunk_id in fused[:k]]
+
+    def mention_chunks(self, *terms: str, k: int = 4) -> List[Document]:
+        """Chunks that mention any of the catalog terms (mention index lookup, no retrieval)."""
+        with self._lock:
+            # Postings come ordered by (document, chunk); take the first chunk of every
+            # document before a second chunk of any, so the context covers all sources.
+            seen: Dict[str, int] = {}
+            ranked = []
+            for posting in self.mentions.lookup(*terms):
+                ranked.append((seen.get(posting.doc_id, 0), posting))
+                seen[posting.doc_id] = seen.get(posting.doc_id, 0) + 1
+            ranked.sort(key=lambda item: item[0])
+            return [self.lexical.docs[posting.chunk_id] for _, posting in ranked[:k]]
@@ -0,0 +1,74 @@
+# Entity terms derived from catalogs.py (medicines, brand aliases, hospitals, cities).
+import re
+from functools import lru_cache
+from typing import Dict, FrozenSet, List, Tuple
+
+from src.healthcare_pdf_hub.catalogs import HOSPITALS_2025, MEDICINE_BRANDS, MEDICINE_CATALOG
+from src.healthcare_pdf_hub.utils.bm25 import tokenize
+
+
+def _name_aliases(name: str) -> List[str]:
+    """Full name, name without the parenthetical, and ALL-CAPS abbreviations in parentheses."""
+    aliases = [name]
+    base = re.sub(r"\s*\(.*?\)", "", name).strip()
+    if base and base != name:
+        aliases.append(base)
+    aliases.extend(a.strip() for a in re.findall(r"\((.*?)\)", name) if a.strip().isupper())
+    return aliases
+
+
+def brand_aliases(medicine: str) -> List[str]:
+    """'e.g., Crocin, Calpol' -> ['Crocin', 'Calpol'] (also via abbreviations such as ORS)."""
+    brands = []
+    for key in _name_aliases(medicine):
+        hint = re.sub(r"^\s*e\.g\.,?\s*", "", MEDICINE_BRANDS.get(key, ""))
+        brands.extend(b.strip() for b in hint.split(",") if b.strip())
+    return brands
+
+
+def medicine_aliases(medicine: str) -> List[str]:
+    return _name_aliases(medicine) + brand_aliases(medicine)
+
+
+def hospital_aliases(hospital: dict) -> List[str]:
+    """Name aliases plus the short brand before a dash ('Medanta – The Medicity' -> 'Medanta')."""
+    aliases = _name_aliases(hospital["name"])
+    short = re.split(r"\s+[–-]\s+", aliases[1] if len(aliases) > 1 else aliases[0])[0].strip()
+    if short and short not in aliases:
+        aliases.append(short)
+    return aliases
+
+
+@lru_cache(maxsize=1)
+def catalog_terms() -> Tuple[str, ...]:
+    """Every surface form we look for: medicines, brand aliases, hospital aliases, cities."""
+    terms: Dict[str, None] = {}
+    for meds in MEDICINE_CATALOG.values():
+        for med in meds:
+            terms.update(dict.fromkeys(medicine_aliases(med)))
+    for hospital in HOSPITALS_2025:
+        terms.update(dict.fromkeys(hospital_aliases(hospital) + [hospital["city"]]))
+    return tuple(terms)
+
+
+def _normalize(query: str) -> str:
+    return " ".join(tokenize(query))
+
+
+@lru_cache(maxsize=1)
+def _catalog_queries() -> FrozenSet[str]:
+    queries = {_normalize(term) for term in catalog_terms()}
+    # The Medicine tab queries "<medicine> <brand hint>", the Hospital tab "<name> <city>".
+    for meds in MEDICINE_CATALOG.values():
+        for med in meds:
+            queries.add(_normalize(f"{med} {MEDICINE_BRANDS.get(med, '')}"))
+    for hospital in HOSPITALS_2025:
+        for alias in hospital_aliases(hospital):
+            queries.add(_normalize(f"{alias} {hospital['city']}"))
+    queries.discard("")
+    return frozenset(queries)
+
+
+def is_catalog_query(query: str) -> bool:
+    """True when the query is exactly a catalog entity (optionally with its brand hint / city)."""
+    return _normalize(query) in _catalog_queries()
@@ -1,12 +1,48 @@
-from euriai.langchain import create_chat_model # Import the function to create a chat model - this is a wrapper around Langchain's ChatOpenAI built by EURON
+import logging
+import time
+from dataclasses import dataclass
+from typing import Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+CHAT_MODEL_NAME = "gpt-4.1-nano"
+CHAT_TEMPERATURE = 0.7
 
 def get_chat_model(api_key: str):
+    # Imported here: euriai loads langchain's OpenAI stack, which only the LLM path needs
+    from euriai.langchain import create_chat_model # Import the function to create a chat model - this is a wrapper around Langchain's ChatOpenAI built by EURON
 
     return create_chat_model(api_key=api_key, 
-                             model="gpt-4.1-nano", 
-                             temperature=0.7)
+                             model=CHAT_MODEL_NAME, 
+                             temperature=CHAT_TEMPERATURE)
     
 def ask_chat_model(chat_model, question: str):
 
     response = chat_model.invoke(question)
-    return response.content
\ No newline at end of file
+    return response.content
+
+@dataclass
+class GenerationStats:
+    time_to_first_token: Optional[float] = None  # seconds
+    total_time: float = 0.0  # seconds
+    chunks: int = 0
+
+def stream_chat_model(chat_model, question: str, stats: Optional[GenerationStats] = None) -> Iterator[str]:
+    """Yield the answer text as it arrives, recording time-to-first-token and total time in stats."""
+    stats = stats if stats is not None else GenerationStats()
+    started = time.perf_counter()
+    try:
+        for chunk in chat_model.stream(question):
+            text = chunk.content if hasattr(chunk, "content") else str(chunk)
+            if not text:
+                continue
+            if stats.time_to_first_token is None:
+                stats.time_to_first_token = time.perf_counter() - started
+            stats.chunks += 1
+            yield text
+    finally:
+        stats.total_time = time.perf_counter() - started
+        logger.info(
+            "chat stream: ttft=%.3fs total=%.3fs chunks=%d",
+            stats.time_to_first_token or 0.0, stats.total_time, stats.chunks,
+        )
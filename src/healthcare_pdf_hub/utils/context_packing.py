@@ -0,0 +1,140 @@
+# Assembling retrieved chunks into the LLM context.
+#
+# Neighbouring chunks of one document share up to CHUNK_OVERLAP characters, so hits that
+# sit next to each other repeat text. Chunks of the same document with consecutive chunk
+# numbers are merged into one passage (the shared text kept once), passages that repeat an
+# earlier one are dropped, and the rest fill a token budget in relevance order.
+import math
+import re
+from dataclasses import dataclass, field
+from typing import List, Optional, Sequence, Set
+
+from src.healthcare_pdf_hub.config import CHUNK_OVERLAP
+
+# Rough token count without a tokenizer: ~4 characters per token for English prose.
+CHARS_PER_TOKEN = 4
+# Word 5-gram Jaccard similarity at or above which a passage counts as a near-duplicate.
+DUPLICATE_SIMILARITY = 0.8
+SHINGLE_WORDS = 5
+
+_WORD = re.compile(r"\w+")
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+@dataclass
+class Passage:
+    text: str
+    rank: int            # best (lowest) retrieval rank among the merged chunks
+    source: Optional[str] = None
+    pages: List[int] = field(default_factory=list)
+    chunks: int = 1
+
+
+@dataclass
+class PackedContext:
+    text: str
+    passages: List[Passage]
+    chunks_in: int = 0
+    tokens_in: int = 0       # tokens of the chunks as retrieved (what "\n\n".join would send)
+    tokens_out: int = 0
+    merged: int = 0          # chunks folded into a neighbour (or retrieved twice)
+    duplicates: int = 0      # passages dropped as near-duplicates
+    over_budget: int = 0     # passages that did not fit the budget
+
+    @property
+    def tokens_saved(self) -> int:
+        return max(0, self.tokens_in - self.tokens_out)
+
+
+def join_overlapping(left: str, right: str, max_overlap: int = CHUNK_OVERLAP) -> str:
+    """left + right with the longest suffix of left that starts right written once."""
+    for n in range(min(len(left), len(right), max_overlap), 0, -1):
+        if left.endswith(right[:n]):
+            return left + right[n:]
+    return f"{left}\n{right}"
+
+
+def _shingles(text: str) -> Set[tuple]:
+    words = _WORD.findall(text.lower())
+    if len(words) <= SHINGLE_WORDS:
+        return {tuple(words)}
+    return {tuple(words[i:i + SHINGLE_WORDS]) for i in range(len(words) - SHINGLE_WORDS + 1)}
+
+
+def _similar(a: Set[tuple], b: Set[tuple]) -> bool:
+    if not a or not b:
+        return False
+    return len(a & b) / len(a | b) >= DUPLICATE_SIMILARITY
+
+
+def merge_neighbours(docs: Sequence) -> List[Passage]:
+    """One passage per run of consecutive chunks of the same document, ordered by best rank."""
+    passages: List[Passage] = []
+    runs = {}  # (document, chunk number) -> passage whose run currently ends there
+    ordered = sorted(
+        enumerate(docs),
+        key=lambda item: (str(item[1].metadata.get("doc_id") or item[1].metadata.get("source")),
+                          item[1].metadata.get("chunk") if item[1].metadata.get("chunk") is not None else -1,
+                          item[0]),
+    )
+    for rank, doc in ordered:
+        meta = doc.metadata or {}
+        document = meta.get("doc_id") or meta.get("source")
+        chunk = meta.get("chunk")
+        page = meta.get("page")
+        if chunk is not None and (document, chunk) in runs:
+            continue  # the same chunk retrieved twice (e.g. dense and lexical hit)
+        previous = runs.pop((document, chunk - 1), None) if chunk is not None and document else None
+        if previous is not None:
+            previous.text = join_overlapping(previous.text, doc.page_content)
+            previous.rank = min(previous.rank, rank)
+            previous.chunks += 1
+            if page is not None and page not in previous.pages:
+                previous.pages.append(page)
+            passage = previous
+        else:
+            passage = Passage(doc.page_content, rank, meta.get("source"), [page] if page is not None else [])
+            passages.append(passage)
+        if chunk is not None and document:
+            runs[(document, chunk)] = passage
+    return sorted(passages, key=lambda p: p.rank)
+
+
+def pack_context(docs: Sequence, token_budget: int, separator: str = "\n\n") -> PackedContext:
+    """
+    Merge, de-duplicate and budget the retrieved docs (most relevant first). A passage that
+    does not fit is skipped so a shorter, less relevant one can still use the room; if not
+    even the best passage fits, it is cut to the budget rather than sending no context.
+    """
+    packed = PackedContext("", [], chunks_in=len(docs),
+                           tokens_in=estimate_tokens(separator.join(d.page_content for d in docs)))
+    passages = merge_neighbours(docs)
+    packed.merged = len(docs) - len(passages)
+
+    kept: List[Passage] = []
+    kept_shingles: List[Set[tuple]] = []
+    used = 0
+    sep_tokens = estimate_tokens(separator)
+    for passage in passages:
+        shingles = _shingles(passage.text)
+        if any(passage.text in k.text or _similar(shingles, s) for k, s in zip(kept, kept_shingles)):
+            packed.duplicates += 1
+            continue
+        cost = estimate_tokens(passage.text) + (sep_tokens if kept else 0)
+        if used + cost > token_budget:
+            if kept:
+                packed.over_budget += 1
+                continue
+            passage.text = passage.text[: token_budget * CHARS_PER_TOKEN]
+            cost = estimate_tokens(passage.text)
+        kept.append(passage)
+        kept_shingles.append(shingles)
+        used += cost
+
+    packed.passages = kept
+    packed.text = separator.join(p.text for p in kept)
+    packed.tokens_out = estimate_tokens(packed.text)
+    return packed
@@ -1,15 +1,281 @@
 # Code to create/store the index for FAISS and retreive the relevant documents
 
 # langchain vectorstores documentation: https://python.langchain.com/docs/modules/data_connection/vectorstores/integrations/faiss
-from typing import List
+import logging
+import math
+import threading
+import time
+import uuid
+from typing import Dict, List, Optional, Sequence
+
+import faiss
+import numpy as np
+from langchain_community.docstore.in_memory import InMemoryDocstore
 from langchain_community.vectorstores import FAISS
 from langchain_community.embeddings import HuggingFaceEmbeddings
+from langchain_core.documents import Document
+
+from src.healthcare_pdf_hub.config import (
+    EMBEDDING_BACKEND, EMBEDDING_BATCH_SIZE, EMBEDDING_QUANTIZE, EMBEDDING_THREADS,
+    FAISS_HNSW_EF_SEARCH, FAISS_HNSW_M, FAISS_INDEX_KIND, FAISS_IVF_NPROBE, RETRIEVAL_SERVICE
+)
+from src.healthcare_pdf_hub.utils.onnx_embeddings import HAS_ONNXRUNTIME, OnnxEmbeddings
+
+# Use a lighter model to reduce load + avoid big downloads
+EMBEDDING_MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"  # lighter than all-mpnet-base-v2
+EMBEDDING_BACKENDS = ("torch", "onnx")
+
+logger = logging.getLogger(__name__)
+
+
+def effective_backend(backend: str = EMBEDDING_BACKEND) -> str:
+    """The backend actually used: "onnx" falls back to "torch" without onnxruntime."""
+    return "onnx" if backend == "onnx" and HAS_ONNXRUNTIME else "torch"
+
+
+def embedding_id(backend: str = EMBEDDING_BACKEND, quantize: bool = EMBEDDING_QUANTIZE) -> str:
+    """Model plus backend; part of every cache key, since int8 vectors differ slightly."""
+    if effective_backend(backend) == "onnx":
+        return f"{EMBEDDING_MODEL_NAME}@onnx{'-int8' if quantize else ''}"
+    return EMBEDDING_MODEL_NAME
+
+# One embeddings object per process, shared by every tab and session.
+_embeddings: Optional[HuggingFaceEmbeddings] = None
+_embeddings_lock = threading.Lock()
+_warmup_thread: Optional[threading.Thread] = None
+
+def load_local_embeddings(backend: str = EMBEDDING_BACKEND, batch_size: int = EMBEDDING_BATCH_SIZE,
+                          threads: int = EMBEDDING_THREADS, quantize: bool = EMBEDDING_QUANTIZE):
+    """Load the embedding model into this process on the configured backend."""
+    if backend == "onnx":
+        if HAS_ONNXRUNTIME:
+            return OnnxEmbeddings(EMBEDDING_MODEL_NAME, batch_size=batch_size, threads=threads, quantize=quantize)
+        logger.warning("HPDFHUB_EMBEDDING_BACKEND=onnx but onnxruntime is not installed; using torch")
+    if threads:
+        import torch
+        torch.set_num_threads(threads)
+    # sentence-transformers already sorts each call's texts by length before batching.
+    return HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL_NAME, encode_kwargs={"batch_size": batch_size})
+
+def get_embeddings() -> HuggingFaceEmbeddings:
+    """
+    Return the process-wide embeddings, loading the model on first use. With
+    HPDFHUB_RETRIEVAL_SERVICE set, the model lives in the retrieval service instead.
+    """
+    global _embeddings
+    if _embeddings is None:
+        with _embeddings_lock:
+            if _embeddings is None:
+                if RETRIEVAL_SERVICE:
+                    from src.healthcare_pdf_hub.utils.retrieval import ServiceEmbeddings, get_retrieval
+                    _embeddings = ServiceEmbeddings(get_retrieval())
+                else:
+                    _embeddings = load_local_embeddings()
+    return _embeddings
+
+def set_embeddings(embeddings) -> None:
+    """Replace the process-wide embeddings (e.g. a deterministic fake for offline benchmarks)."""
+    global _embeddings
+    with _embeddings_lock:
+        _embeddings = embeddings
+
+def warm_up_embeddings() -> None:
+    """Load the embedding model on a background thread (no-op after the first call)."""
+    global _warmup_thread
+    if _embeddings is not None or _warmup_thread is not None:
+        return
+    with _embeddings_lock:
+        if _warmup_thread is None:
+            _warmup_thread = threading.Thread(target=_warm_up, name="embeddings-warmup", daemon=True)
+            _warmup_thread.start()
+
+def _warm_up() -> None:
+    try:
+        # Run one tiny query so lazy weights/tokenizer state are initialised too.
+        get_embeddings().embed_query("warm up")
+    except Exception:
+        # The foreground call to get_embeddings() will surface the real error.
+        pass
+
+# ---- Index factory ----
+# Exact search is fine for a few thousand chunks; past that, graph (HNSW) and then
+# compressed inverted-file (IVF-PQ) indexes keep search time and memory in check.
+INDEX_KINDS = ("flat", "hnsw", "ivf", "ivfpq")
+AUTO_HNSW_MIN_VECTORS = 20_000
+AUTO_IVFPQ_MIN_VECTORS = 200_000
+IVF_TRAIN_POINTS_PER_LIST = 64
+PQ_BITS = 8
+# Each PQ sub-quantizer trains 2**PQ_BITS centroids, so IVF-PQ needs at least that many vectors.
+IVFPQ_MIN_VECTORS = 2 ** PQ_BITS
+
+# Scalar-quantized storage: 2 bytes (float16) or 1 byte (int8) per dimension instead of 4.
+VECTOR_DTYPES = ("float32", "float16", "int8")
+_SQ_TYPES = {
+    "float16": faiss.ScalarQuantizer.QT_fp16,
+    "int8": faiss.ScalarQuantizer.QT_8bit,
+}
+
+def choose_index_kind(n_vectors: int, kind: str = FAISS_INDEX_KIND) -> str:
+    """
+    The index kind for n_vectors: kind itself when forced, unless there are too few vectors
+    to train it (IVF-PQ falls back to IVF, IVF to flat); "auto" picks by corpus size.
+    """
+    if kind == "auto":
+        if n_vectors >= AUTO_IVFPQ_MIN_VECTORS:
+            return "ivfpq"
+        if n_vectors >= AUTO_HNSW_MIN_VECTORS:
+            return "hnsw"
+        return "flat"
+    if kind == "ivfpq" and n_vectors < IVFPQ_MIN_VECTORS:
+        kind = "ivf"
+    if kind == "ivf" and n_vectors < 1:
+        kind = "flat"
+    return kind
+
+def _ivf_nlist(n_vectors: int) -> int:
+    # ~4*sqrt(n) lists, but never more than the training sample can support
+    return max(1, min(int(4 * math.sqrt(n_vectors)), n_vectors // IVF_TRAIN_POINTS_PER_LIST or 1))
+
+def _pq_subquantizers(dim: int) -> int:
+    for m in (dim // 8, dim // 12, dim // 16, 16, 8, 4, 2):
+        if m and dim % m == 0:
+            return m
+    return 1
+
+def build_faiss_index(vectors: np.ndarray, kind: str = "auto", nprobe: int = FAISS_IVF_NPROBE,
+                      ef_search: int = FAISS_HNSW_EF_SEARCH, seed: int = 0,
+                      dtype: str = "float32") -> "faiss.Index":
+    """
+    Build a populated L2 index of the given kind ("auto" chooses from the corpus size).
+    dtype "float16" / "int8" stores scalar-quantized vectors (ignored for ivfpq, which
+    compresses with its own product quantizer).
+    """
+    vectors = np.ascontiguousarray(vectors, dtype="float32")
+    n, dim = vectors.shape
+    kind = choose_index_kind(n, kind)
+    if dtype not in VECTOR_DTYPES:
+        raise ValueError(f"Unknown vector dtype: {dtype!r} (expected one of {VECTOR_DTYPES})")
+    qtype = _SQ_TYPES.get(dtype)
+    sample = vectors
+    if kind == "flat":
+        index = faiss.IndexFlatL2(dim) if qtype is None else faiss.IndexScalarQuantizer(dim, qtype, faiss.METRIC_L2)
+    elif kind == "hnsw":
+        index = faiss.IndexHNSWFlat(dim, FAISS_HNSW_M) if qtype is None else faiss.IndexHNSWSQ(dim, qtype, FAISS_HNSW_M)
+    elif kind in ("ivf", "ivfpq"):
+        nlist = _ivf_nlist(n)
+        quantizer = faiss.IndexFlatL2(dim)
+        if kind == "ivfpq":
+            index = faiss.IndexIVFPQ(quantizer, dim, nlist, _pq_subquantizers(dim), PQ_BITS)
+        elif qtype is None:
+            index = faiss.IndexIVFFlat(quantizer, dim, nlist)
+        else:
+            index = faiss.IndexIVFScalarQuantizer(quantizer, dim, nlist, qtype, faiss.METRIC_L2)
+        # Train on a random sample; k-means needs far fewer points than the whole corpus.
+        sample_size = min(n, max(nlist * IVF_TRAIN_POINTS_PER_LIST, 256 * 40))
+        sample = vectors[np.random.default_rng(seed).choice(n, sample_size, replace=False)]
+    else:
+        raise ValueError(f"Unknown FAISS index kind: {kind!r} (expected auto or one of {INDEX_KINDS})")
+    if not index.is_trained:
+        index.train(sample)
+    index.add(vectors)
+    set_search_params(index, nprobe, ef_search)
+    return index
+
+def set_search_params(index: "faiss.Index", nprobe: Optional[int] = FAISS_IVF_NPROBE,
+                      ef_search: Optional[int] = FAISS_HNSW_EF_SEARCH) -> "faiss.Index":
+    """
+    Tune recall vs latency on an existing index (ignored for kinds that don't use the knob).
+    The defaults are the HPDFHUB_FAISS_* settings; search parameters are not saved with an
+    index, so every load applies them again.
+    """
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None and nprobe is not None:
+        ivf.nprobe = min(nprobe, ivf.nlist)
+    if hasattr(index, "hnsw") and ef_search is not None:
+        index.hnsw.efSearch = ef_search
+    return index
+
+def index_kind(index: "faiss.Index") -> str:
+    if isinstance(index, faiss.IndexHNSW):
+        return "hnsw"
+    if isinstance(index, faiss.IndexIVFPQ):
+        return "ivfpq"
+    if faiss.try_extract_index_ivf(index) is not None:
+        return "ivf"
+    return "flat"
+
+def index_dtype(index: "faiss.Index") -> str:
+    """How vectors are stored: float32, float16, int8 (or "pq" for product quantization)."""
+    if isinstance(index, faiss.IndexHNSW):
+        index = faiss.downcast_index(index.storage)
+    if isinstance(index, faiss.IndexIVFPQ):
+        return "pq"
+    sq = getattr(index, "sq", None)
+    if sq is not None:
+        return next((name for name, qtype in _SQ_TYPES.items() if qtype == sq.qtype), "sq")
+    return "float32"
+
+def index_memory_bytes(index: "faiss.Index") -> int:
+    """Bytes the index occupies (its serialized size: codes, graph links, inverted lists)."""
+    return int(faiss.serialize_index(index).size)
+
+def vectorstore_from_embeddings(texts: List[str], vectors: Sequence[Sequence[float]],
+                                metadatas: Optional[List[dict]] = None, ids: Optional[List[str]] = None,
+                                kind: str = "auto", dtype: str = "float32") -> FAISS:
+    """LangChain FAISS store over precomputed vectors, backed by an index from build_faiss_index."""
+    ids = ids or [uuid.uuid4().hex for _ in texts]
+    metadatas = metadatas or [{} for _ in texts]
+    index = build_faiss_index(np.asarray(vectors, dtype="float32"), kind, dtype=dtype)
+    docstore = InMemoryDocstore({
+        _id: Document(page_content=text, metadata=metadata)
+        for _id, text, metadata in zip(ids, texts, metadatas)
+    })
+    return FAISS(get_embeddings(), index, docstore, dict(enumerate(ids)))
 
 def create_faiss_index(texts: List[str]) -> FAISS:
-    # Use a lighter model to reduce load + avoid big downloads
-    model_name = "sentence-transformers/all-MiniLM-L6-v2"  # lighter than all-mpnet-base-v2
-    embeddings = HuggingFaceEmbeddings(model_name=model_name)
-    return FAISS.from_texts(texts, embeddings)
+    return vectorstore_from_embeddings(texts, get_embeddings().embed_documents(texts))
+
+def recall_report(vectors: np.ndarray, queries: np.ndarray, k: int = 10,
+                  configs: Optional[List[Dict]] = None) -> List[Dict]:
+    """
+    Recall@k and per-query latency of approximate indexes against the exact flat index.
+    Each config is {"kind": ..., "nprobe": ..., "ef_search": ..., "dtype": ...}; the float32
+    flat baseline is row one. Compact dtypes are measured without full-precision re-ranking.
+    """
+    vectors = np.ascontiguousarray(vectors, dtype="float32")
+    queries = np.ascontiguousarray(queries, dtype="float32")
+    configs = configs or [
+        {"kind": "hnsw", "ef_search": ef} for ef in (16, 32, 64, 128)
+    ] + [
+        {"kind": kind, "nprobe": nprobe} for kind in ("ivf", "ivfpq") for nprobe in (1, 4, 16, 64)
+    ] + [
+        {"kind": kind, "dtype": dtype} for kind in ("flat", "hnsw") for dtype in ("float16", "int8")
+    ]
+    rows = []
+    exact_ids = None
+    for config in [{"kind": "flat"}] + configs:
+        started = time.perf_counter()
+        index = build_faiss_index(vectors, config["kind"],
+                                  nprobe=config.get("nprobe", FAISS_IVF_NPROBE),
+                                  ef_search=config.get("ef_search", FAISS_HNSW_EF_SEARCH),
+                                  dtype=config.get("dtype", "float32"))
+        build_s = time.perf_counter() - started
+        started = time.perf_counter()
+        _, ids = index.search(queries, k)
+        search_s = time.perf_counter() - started
+        if exact_ids is None:
+            exact_ids = ids
+        recall = float(np.mean([
+            len(set(found[found >= 0]) & set(truth)) / k for found, truth in zip(ids, exact_ids)
+        ]))
+        rows.append({
+            **config,
+            "recall_at_k": round(recall, 4),
+            "ms_per_query": round(1000 * search_s / max(len(queries), 1), 4),
+            "build_s": round(build_s, 3),
+            "index_bytes": index_memory_bytes(index),
+        })
+    return rows
 
 def retrive_relevant_docs(vectorstore: FAISS, query: str, k: int = 4):
     return vectorstore.similarity_search(query, k=k)
@@ -0,0 +1,139 @@
+# Metadata-only scanning of the resource folders.
+#
+# Files are listed with stat() only; page counts are computed the first time they are
+# asked for and remembered in a JSON manifest keyed by (path, size, mtime), so an
+# unchanged file is never opened again. PDF bytes are read only for downloads.
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from src.healthcare_pdf_hub.config import CACHE_DIR
+
+try:
+    from pypdf import PdfReader
+    HAS_PYPDF = True
+except Exception:
+    HAS_PYPDF = False
+
+
+def _file_key(path: Path, size: int, mtime: float) -> str:
+    return f"{path}|{size}|{mtime}"
+
+
+class FolderManifest:
+    """Per-folder cache of file metadata, persisted next to the other local caches."""
+
+    def __init__(self, folder: Path, manifest_path: Path):
+        self.folder = Path(folder)
+        self.manifest_path = Path(manifest_path)
+        self._entries: Dict[str, dict] = {}
+        self._dirty = False
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            self._entries = json.loads(self.manifest_path.read_text(encoding="utf-8"))
+        except Exception:
+            self._entries = {}
+
+    def save(self) -> None:
+        with self._lock:
+            if not self._dirty:
+                return
+            self.manifest_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.manifest_path.with_suffix(f".{os.getpid()}.tmp")
+            tmp.write_text(json.dumps(self._entries), encoding="utf-8")
+            os.replace(tmp, self.manifest_path)
+            self._dirty = False
+
+    def scan(self) -> List[dict]:
+        """List the folder's PDFs (name, size, mtime, path) without reading them."""
+        items = []
+        if not self.folder.exists():
+            return items
+        for p in sorted(self.folder.glob("*.pdf")):
+            item = self.stat_item(p)
+            if item is not None:
+                items.append(item)
+        self.keep_only({item["key"] for item in items})
+        return items
+
+    def stat_item(self, p: Path) -> Optional[dict]:
+        """Folder item for one PDF from stat() alone; None if the file is gone."""
+        try:
+            st = p.stat()
+        except OSError:
+            return None
+        return {
+            "name": p.name,
+            "size": st.st_size,
+            "mtime": st.st_mtime,
+            "uploaded_at": datetime.fromtimestamp(st.st_mtime).strftime("%Y-%m-%d %H:%M:%S"),
+            "path": str(p),
+            "key": _file_key(p, st.st_size, st.st_mtime),
+        }
+
+    def keep_only(self, live) -> None:
+        """Drop manifest entries whose (path, size, mtime) key is not in live."""
+        with self._lock:
+            stale = [k for k in self._entries if k not in live]
+            for k in stale:
+                del self._entries[k]
+            self._dirty = self._dirty or bool(stale)
+
+    def page_count(self, item: dict) -> str:
+        """Page count for a scanned item, parsed at most once per (path, size, mtime)."""
+        with self._lock:
+            cached = self._entries.get(item["key"], {}).get("pages")
+        if cached is not None:
+            return cached
+        pages = count_pdf_pages(Path(item["path"]))
+        with self._lock:
+            self._entries.setdefault(item["key"], {})["pages"] = pages
+            self._dirty = True
+        return pages
+
+
+def count_pdf_pages(path: Path) -> str:
+    if not HAS_PYPDF:
+        return "—"
+    try:
+        # Opening by path lets pypdf seek to the page tree instead of loading the whole file.
+        with open(path, "rb") as fh:
+            return str(len(PdfReader(fh).pages))
+    except Exception:
+        return "?"
+
+
+_manifests: Dict[str, FolderManifest] = {}
+_manifests_lock = threading.Lock()
+
+
+def get_folder_manifest(folder: Path) -> FolderManifest:
+    folder_id = str(Path(folder).resolve())
+    with _manifests_lock:
+        manifest = _manifests.get(folder_id)
+        if manifest is None:
+            digest = hashlib.sha1(folder_id.encode("utf-8")).hexdigest()[:16]
+            manifest = FolderManifest(Path(folder), CACHE_DIR / "manifests" / f"{digest}.json")
+            _manifests[folder_id] = manifest
+    return manifest
+
+
+def scan_pdf_folder(folder_path: Path) -> List[dict]:
+    """
+    Metadata-only replacement for list_pdfs_from_folder: entries carry "path" instead of
+    "data" and their "pages" come from the manifest.
+    """
+    manifest = get_folder_manifest(folder_path)
+    items = manifest.scan()
+    for item in items:
+        item["pages"] = manifest.page_count(item)
+    manifest.save()
+    return items
+
@@ -0,0 +1,212 @@
+# In-process catalog of the resource folders, kept current by a file watcher.
+#
+# One full scan per folder at start; after that only changed files are looked at.
+# Changes come from watchdog (inotify on Linux, FSEvents / ReadDirectoryChangesW
+# elsewhere) when it is installed, otherwise from polling (size, mtime) per file. Every
+# add / modify / delete updates the page-count manifest, drops stale "Download ALL"
+# archives and is passed on to listeners (e.g. prebuilt index refresh).
+import logging
+import os
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from src.healthcare_pdf_hub.config import WATCH_POLL_SECONDS, WATCH_REINDEX
+from src.healthcare_pdf_hub.utils.folder_manifest import get_folder_manifest
+from src.healthcare_pdf_hub.utils.zip_cache import invalidate_folder_zips
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+    HAS_WATCHDOG = True
+except Exception:
+    HAS_WATCHDOG = False
+
+logger = logging.getLogger(__name__)
+
+# Events arriving within this window are applied together (editors and copies write in bursts).
+DEBOUNCE_SECONDS = 0.5
+
+
+@dataclass
+class FolderEvent:
+    bucket: str
+    kind: str  # "added", "modified" or "deleted"
+    name: str
+
+
+class FolderWatcher:
+    def __init__(self, folders: Dict[str, Path], poll_seconds: float = WATCH_POLL_SECONDS):
+        self.folders = {bucket: Path(folder) for bucket, folder in folders.items()}
+        self.poll_seconds = poll_seconds
+        self.version = 0  # bumped on every applied change
+        self._catalog: Dict[str, Dict[str, dict]] = {bucket: {} for bucket in self.folders}
+        self._listeners: List[Callable[[List[FolderEvent]], None]] = []
+        self._changed: "queue.Queue[tuple]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._observer = None
+        for bucket in self.folders:
+            self._full_scan(bucket)
+
+    # ---- reads (what a Streamlit rerun does) ----
+    def items(self, bucket: str) -> List[dict]:
+        """Current items of the folder, sorted by name (copies; safe to annotate)."""
+        with self._lock:
+            return [dict(item) for _, item in sorted(self._catalog[bucket].items())]
+
+    def add_listener(self, listener: Callable[[List[FolderEvent]], None]) -> None:
+        self._listeners.append(listener)
+
+    # ---- change tracking ----
+    def start(self) -> "FolderWatcher":
+        if HAS_WATCHDOG:
+            try:
+                self._observer = Observer()
+                handler = _Handler(self)
+                for folder in self.folders.values():
+                    if folder.exists():
+                        self._observer.schedule(handler, str(folder), recursive=False)
+                self._observer.daemon = True
+                self._observer.start()
+            except Exception:
+                logger.warning("file watcher unavailable, polling resource folders instead", exc_info=True)
+                self._observer = None
+        if self._observer is None:
+            threading.Thread(target=self._poll, name="folder-poll", daemon=True).start()
+        threading.Thread(target=self._apply_changes, name="folder-watch", daemon=True).start()
+        return self
+
+    def notify(self, path: str) -> None:
+        """A path in one of the folders may have changed (called by the watcher backend)."""
+        p = Path(path)
+        if p.suffix.lower() != ".pdf":
+            return
+        for bucket, folder in self.folders.items():
+            if p.parent == folder or p.parent.resolve() == folder.resolve():
+                self._changed.put((bucket, p))
+
+    def _poll(self) -> None:
+        # scandir() returns names and stats without opening any PDF; only files whose
+        # (size, mtime) differ from the catalog are queued.
+        while True:
+            time.sleep(self.poll_seconds)
+            for bucket, folder in self.folders.items():
+                try:
+                    entries = {e.name: e for e in os.scandir(folder) if e.name.lower().endswith(".pdf")}
+                except OSError:
+                    entries = {}
+                with self._lock:
+                    known = dict(self._catalog[bucket])
+                for name in set(known) - set(entries):
+                    self._changed.put((bucket, folder / name))
+                for name, entry in entries.items():
+                    try:
+                        st = entry.stat()
+                    except OSError:
+                        continue
+                    item = known.get(name)
+                    if item is None or (item["size"], item["mtime"]) != (st.st_size, st.st_mtime):
+                        self._changed.put((bucket, folder / name))
+
+    def _apply_changes(self) -> None:
+        while True:
+            pending = {self._changed.get()}
+            deadline = time.monotonic() + DEBOUNCE_SECONDS
+            while (left := deadline - time.monotonic()) > 0:
+                try:
+                    pending.add(self._changed.get(timeout=left))
+                except queue.Empty:
+                    break
+            events = [event for bucket, path in sorted(pending) if (event := self._refresh(bucket, path))]
+            if events:
+                self._after_change(events)
+
+    def _refresh(self, bucket: str, path: Path) -> Optional[FolderEvent]:
+        """Re-stat one file and update the catalog; the event, or None if nothing changed."""
+        manifest = get_folder_manifest(self.folders[bucket])
+        item = manifest.stat_item(path) if path.suffix.lower() == ".pdf" else None
+        with self._lock:
+            known = self._catalog[bucket].get(path.name)
+        if item is None:
+            if known is None:
+                return None
+            with self._lock:
+                self._catalog[bucket].pop(path.name, None)
+            return FolderEvent(bucket, "deleted", path.name)
+        if known is not None and known["key"] == item["key"]:
+            return None
+        item["pages"] = manifest.page_count(item)  # only the changed file is opened
+        with self._lock:
+            self._catalog[bucket][path.name] = item
+        return FolderEvent(bucket, "modified" if known else "added", path.name)
+
+    def _after_change(self, events: List[FolderEvent]) -> None:
+        for bucket in {event.bucket for event in events}:
+            manifest = get_folder_manifest(self.folders[bucket])
+            with self._lock:
+                manifest.keep_only({item["key"] for item in self._catalog[bucket].values()})
+            manifest.save()
+            invalidate_folder_zips(self.folders[bucket])
+        with self._lock:
+            self.version += 1
+        logger.info("resource folders changed: %s", ", ".join(f"{e.kind} {e.bucket}/{e.name}" for e in events))
+        for listener in self._listeners:
+            try:
+                listener(events)
+            except Exception:
+                logger.exception("folder watcher listener failed")
+
+    def _full_scan(self, bucket: str) -> None:
+        manifest = get_folder_manifest(self.folders[bucket])
+        items = manifest.scan()
+        for item in items:
+            item["pages"] = manifest.page_count(item)
+        manifest.save()
+        with self._lock:
+            self._catalog[bucket] = {item["name"]: item for item in items}
+
+
+if HAS_WATCHDOG:
+    class _Handler(FileSystemEventHandler):
+        def __init__(self, watcher: FolderWatcher):
+            self.watcher = watcher
+
+        def on_any_event(self, event):
+            if event.is_directory:
+                return
+            self.watcher.notify(event.src_path)
+            dest = getattr(event, "dest_path", None)
+            if dest:
+                self.watcher.notify(dest)
+
+
+def refresh_prebuilt_indexes(watcher: FolderWatcher, events: List[FolderEvent]) -> None:
+    """Incrementally re-ingest changed folders that already have a prebuilt index."""
+    from src.healthcare_pdf_hub.ingest import ingest_folder
+    from src.healthcare_pdf_hub.utils.prebuilt_index import prebuilt_dir, read_manifest
+
+    for bucket in sorted({event.bucket for event in events}):
+        out_dir = prebuilt_dir(bucket)
+        if read_manifest(out_dir) is None:
+            continue  # never built; the ingest CLI decides which folders get an index
+        ingest_folder(watcher.folders[bucket], out_dir, incremental=True)
+        logger.info("refreshed prebuilt index of %s", bucket)
+
+
+_watcher: Optional[FolderWatcher] = None
+_watcher_lock = threading.Lock()
+
+
+def get_folder_watcher(folders: Dict[str, Path]) -> FolderWatcher:
+    """Process-wide watcher over the resource folders, started on first use."""
+    global _watcher
+    with _watcher_lock:
+        if _watcher is None:
+            watcher = FolderWatcher(folders)
+            if WATCH_REINDEX:
+                watcher.add_listener(lambda events: refresh_prebuilt_indexes(watcher, events))
+            _watcher = watcher.start()
+    return _watcher
@@ -0,0 +1,71 @@
+# float32 copies of the vectors behind a compact (float16 / int8) FAISS index.
+#
+# They live in an unlinked file under CACHE_DIR and are read back through a memory map,
+# so they cost page cache rather than process memory; only the few candidates of each
+# query are touched when re-ranking.
+import tempfile
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from src.healthcare_pdf_hub.config import CACHE_DIR
+
+
+class FullPrecisionVectors:
+    """Append-only float32 vector file keyed by chunk id; removed rows are compacted lazily."""
+
+    def __init__(self, dim: int, directory=None):
+        self.dim = dim
+        directory = directory or CACHE_DIR / "vectors"  # not /tmp, which is often RAM-backed
+        directory.mkdir(parents=True, exist_ok=True)
+        self._file = tempfile.TemporaryFile(dir=directory)
+        self._rows: Dict[str, int] = {}
+        self._n_rows = 0
+        self._view: Optional[np.memmap] = None
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    @property
+    def disk_bytes(self) -> int:
+        return self._n_rows * self.dim * 4
+
+    def add(self, ids: Sequence[str], vectors) -> None:
+        block = np.ascontiguousarray(vectors, dtype="float32").reshape(-1, self.dim)
+        self._file.seek(self._n_rows * self.dim * 4)
+        self._file.write(block.tobytes())
+        self._file.flush()
+        for offset, _id in enumerate(ids):
+            self._rows[_id] = self._n_rows + offset
+        self._n_rows += len(block)
+        self._view = None
+
+    def get(self, ids: Sequence[str]) -> np.ndarray:
+        if not ids:
+            return np.empty((0, self.dim), dtype="float32")
+        if self._view is None:
+            self._view = np.memmap(self._file, dtype="float32", mode="r", shape=(self._n_rows, self.dim))
+        return np.asarray(self._view[[self._rows[_id] for _id in ids]])
+
+    def remove(self, ids: Sequence[str]) -> None:
+        for _id in ids:
+            self._rows.pop(_id, None)
+        if self._n_rows > 2 * len(self._rows) + 1024:
+            self._compact()
+
+    def _compact(self) -> None:
+        live: List[str] = list(self._rows)
+        vectors = self.get(live)
+        self._view = None
+        self._file.truncate(0)
+        self._rows, self._n_rows = {}, 0
+        self.add(live, vectors)
+
+
+def rerank_exact(query: np.ndarray, ids: List[str], store: FullPrecisionVectors, k: int) -> List[str]:
+    """Order candidate ids by exact L2 distance to the query and keep the best k."""
+    if not ids:
+        return []
+    vectors = store.get(ids)
+    distances = ((vectors - np.asarray(query, dtype="float32")) ** 2).sum(axis=1)
+    return [ids[i] for i in np.argsort(distances, kind="stable")[:k]]
@@ -0,0 +1,104 @@
+# On-disk, content-addressed cache of FAISS indexes.
+#
+# An index is keyed by the SHA-256 of the source PDF bytes plus the chunking and
+# embedding settings, so an unchanged library is loaded back instead of re-embedded.
+import hashlib
+import json
+import os
+import shutil
+from pathlib import Path
+from typing import Iterable, Optional
+
+from langchain_community.vectorstores import FAISS
+
+from src.healthcare_pdf_hub.config import CACHE_DIR, INDEX_CACHE_MAX_MB
+
+# Bump when the layout of a cached entry changes (2: per-chunk page numbers), so entries
+# written by an older version are missed instead of loaded without the new fields.
+CACHE_FORMAT_VERSION = 2
+
+
+def index_cache_key(pdf_blobs: Iterable[bytes], chunk_size: int, chunk_overlap: int, model_name: str) -> str:
+    """Hash the PDF contents (in order) together with the settings that shape the index."""
+    h = hashlib.sha256()
+    settings = {"chunk_size": chunk_size, "chunk_overlap": chunk_overlap, "model": model_name,
+                "format": CACHE_FORMAT_VERSION}
+    h.update(json.dumps(settings, sort_keys=True).encode("utf-8"))
+    for data in pdf_blobs:
+        h.update(hashlib.sha256(data).digest())
+    return h.hexdigest()
+
+
+def _dir_size(path: Path) -> int:
+    return sum(f.stat().st_size for f in path.rglob("*") if f.is_file())
+
+
+class IndexCache:
+    """Directory of saved FAISS indexes with LRU eviction by total size."""
+
+    def __init__(self, root: Path, max_bytes: int):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    def _entry_dir(self, key: str) -> Path:
+        return self.root / key
+
+    def load(self, key: str, embeddings) -> Optional[FAISS]:
+        entry = self._entry_dir(key)
+        if not (entry / "index.faiss").exists():
+            self.misses += 1
+            return None
+        try:
+            # Entries are written by this process family only, never by users.
+            vectorstore = FAISS.load_local(str(entry), embeddings, allow_dangerous_deserialization=True)
+        except Exception:
+            shutil.rmtree(entry, ignore_errors=True)
+            self.misses += 1
+            return None
+        from src.healthcare_pdf_hub.utils.faiss_utils import set_search_params
+
+        set_search_params(vectorstore.index)  # nprobe / efSearch are not stored with the index
+        os.utime(entry, None)  # mark as most recently used
+        self.hits += 1
+        return vectorstore
+
+    def save(self, key: str, vectorstore: FAISS) -> None:
+        entry = self._entry_dir(key)
+        if entry.exists():
+            os.utime(entry, None)
+            return
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp = self.root / f".{key}.{os.getpid()}.tmp"
+        try:
+            vectorstore.save_local(str(tmp))
+            os.replace(tmp, entry)
+        except OSError:
+            # Another worker published the same key first; keep theirs.
+            shutil.rmtree(tmp, ignore_errors=True)
+        self.evict()
+
+    def evict(self) -> None:
+        if not self.root.exists():
+            return
+        entries = []
+        for p in self.root.iterdir():
+            if p.is_dir() and not p.name.startswith("."):
+                entries.append((p.stat().st_mtime, _dir_size(p), p))
+        total = sum(size for _, size, _ in entries)
+        for _, size, p in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(p, ignore_errors=True)
+            total -= size
+
+
+_index_cache: Optional[IndexCache] = None
+
+
+def get_index_cache() -> IndexCache:
+    global _index_cache
+    if _index_cache is None:
+        _index_cache = IndexCache(CACHE_DIR / "indexes", INDEX_CACHE_MAX_MB * 1024 * 1024)
+    return _index_cache
@@ -0,0 +1,108 @@
+# Background indexing of Library uploads.
+#
+# "Add to Library" stores the PDF and queues an IngestJob; a fixed pool of worker
+# threads (shared by every session) extracts, embeds and indexes it outside the
+# Streamlit script run. The queue is bounded: when it is full, or a session already
+# has too many documents pending, submit() refuses the job instead of piling up work.
+import logging
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional
+
+from src.healthcare_pdf_hub.config import INGEST_MAX_PENDING_PER_SESSION, INGEST_QUEUE_SIZE, INGEST_WORKERS
+
+logger = logging.getLogger(__name__)
+
+# Progress reported for each state (extraction and embedding dominate the time).
+PROGRESS = {"queued": 0.0, "extracting": 0.1, "embedding": 0.5, "indexing": 0.9, "indexed": 1.0, "failed": 1.0}
+
+
+@dataclass
+class IngestJob:
+    doc_id: str
+    name: str
+    session_id: str
+    # Does the work, calls job.advance(), returns chunks indexed; dropped once the job is done.
+    run: Optional[Callable[["IngestJob"], int]]
+    state: str = "queued"
+    chunks: int = 0
+    error: Optional[str] = None
+    cancelled: bool = False
+    seconds: float = 0.0
+    done_event: threading.Event = field(default_factory=threading.Event, repr=False)
+
+    @property
+    def progress(self) -> float:
+        return PROGRESS.get(self.state, 0.0)
+
+    @property
+    def done(self) -> bool:
+        return self.done_event.is_set()
+
+    def advance(self, state: str) -> None:
+        self.state = state
+
+
+class IngestQueue:
+    def __init__(self, workers: int, max_queued: int, max_pending_per_session: int):
+        self.max_pending_per_session = max_pending_per_session
+        self._queue: "queue.Queue[IngestJob]" = queue.Queue(maxsize=max_queued)
+        self._pending: dict = {}  # session id -> jobs not finished yet
+        self._lock = threading.Lock()
+        self._workers: List[threading.Thread] = [
+            threading.Thread(target=self._work, name=f"ingest-{i}", daemon=True) for i in range(max(1, workers))
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def submit(self, job: IngestJob) -> bool:
+        """Queue job; False (job not queued) when the queue or the session's quota is full."""
+        with self._lock:
+            if self._pending.get(job.session_id, 0) >= self.max_pending_per_session:
+                return False
+            try:
+                self._queue.put_nowait(job)
+            except queue.Full:
+                return False
+            self._pending[job.session_id] = self._pending.get(job.session_id, 0) + 1
+        return True
+
+    @property
+    def queued(self) -> int:
+        return self._queue.qsize()
+
+    def _work(self) -> None:
+        while True:
+            job = self._queue.get()
+            started = time.perf_counter()
+            try:
+                if not job.cancelled:
+                    job.chunks = job.run(job)
+                    job.advance("indexed")
+            except Exception as e:
+                logger.exception("indexing %s failed", job.name)
+                job.error = str(e)
+                job.advance("failed")
+            finally:
+                job.run = None  # the closure holds the upload's bytes; the session keeps the job
+                job.seconds = time.perf_counter() - started
+                with self._lock:
+                    self._pending[job.session_id] -= 1
+                    if not self._pending[job.session_id]:
+                        del self._pending[job.session_id]
+                job.done_event.set()
+                self._queue.task_done()
+
+
+_ingest_queue: Optional[IngestQueue] = None
+_ingest_queue_lock = threading.Lock()
+
+
+def get_ingest_queue() -> IngestQueue:
+    global _ingest_queue
+    with _ingest_queue_lock:
+        if _ingest_queue is None:
+            _ingest_queue = IngestQueue(INGEST_WORKERS, INGEST_QUEUE_SIZE, INGEST_MAX_PENDING_PER_SESSION)
+    return _ingest_queue
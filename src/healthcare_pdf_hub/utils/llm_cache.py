@@ -0,0 +1,102 @@
+# Cache of MediChat answers.
+#
+# Keyed by a hash of (prompt template, retrieved context, user question, model,
+# temperature), so the same question over the same passages is answered once.
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional, Tuple
+
+from src.healthcare_pdf_hub.config import (
+    CACHE_DIR, LLM_CACHE_MAX_ENTRIES, LLM_CACHE_ON_DISK, LLM_CACHE_TTL_SECONDS
+)
+
+
+def llm_cache_key(template: str, context: str, question: str, model: str, temperature: float) -> str:
+    payload = json.dumps([template, context, question, model, temperature], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """LRU + TTL answer cache with an optional SQLite backend shared across processes."""
+
+    def __init__(self, max_entries: int, ttl_seconds: float, db_path: Optional[Path] = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        if db_path is not None:
+            db_path.parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(str(db_path), check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS answers (key TEXT PRIMARY KEY, created REAL, answer TEXT)"
+            )
+            self._db.commit()
+
+    def _expired(self, created: float) -> bool:
+        return time.time() - created > self.ttl_seconds
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None and self._db is not None:
+                row = self._db.execute("SELECT created, answer FROM answers WHERE key = ?", (key,)).fetchone()
+                entry = tuple(row) if row else None
+                if entry is not None:
+                    self._remember(key, entry)
+            if entry is None or self._expired(entry[0]):
+                if entry is not None:
+                    self._forget(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: str, answer: str) -> None:
+        if not answer:
+            return
+        entry = (time.time(), answer)
+        with self._lock:
+            self._remember(key, entry)
+            if self._db is not None:
+                self._db.execute("INSERT OR REPLACE INTO answers VALUES (?, ?, ?)", (key, entry[0], answer))
+                self._db.execute("DELETE FROM answers WHERE created < ?", (entry[0] - self.ttl_seconds,))
+                self._db.commit()
+
+    def _remember(self, key: str, entry: Tuple[float, str]) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _forget(self, key: str) -> None:
+        self._entries.pop(key, None)
+        if self._db is not None:
+            self._db.execute("DELETE FROM answers WHERE key = ?", (key,))
+            self._db.commit()
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+_llm_cache: Optional[LLMCache] = None
+_llm_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> LLMCache:
+    global _llm_cache
+    with _llm_cache_lock:
+        if _llm_cache is None:
+            db_path = CACHE_DIR / "llm_answers.sqlite3" if LLM_CACHE_ON_DISK else None
+            _llm_cache = LLMCache(LLM_CACHE_MAX_ENTRIES, LLM_CACHE_TTL_SECONDS, db_path)
+    return _llm_cache
@@ -0,0 +1,109 @@
+# Catalog mention index built at ingestion time.
+#
+# A single Aho-Corasick pass over each chunk finds every medicine name, brand alias,
+# hospital name/alias and city from catalogs.py, producing a posting list
+# term -> (document, page, chunk). Catalog lookups then never touch the embeddings.
+import re
+from collections import defaultdict, deque
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+
+def _normalize(text: str) -> str:
+    """Collapse whitespace and unify dashes so PDF line breaks don't hide multi-word terms."""
+    return re.sub(r"\s+", " ", text.replace("\u2013", "-").replace("\u2014", "-"))
+
+
+class AhoCorasick:
+    """Case-insensitive multi-pattern matcher that reports whole-word matches only."""
+
+    def __init__(self, patterns: List[str]):
+        self.patterns = [p.lower() for p in patterns]
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[int]] = [[]]
+        for idx, pattern in enumerate(self.patterns):
+            node = 0
+            for ch in pattern:
+                nxt = self._goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[node][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                node = nxt
+            self._out[node].append(idx)
+
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self._goto[node].items():
+                queue.append(nxt)
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def find(self, text: str) -> Iterator[Tuple[int, int]]:
+        """Yield (pattern_index, start_offset) for every whole-word occurrence in text."""
+        text = text.lower()
+        node = 0
+        for i, ch in enumerate(text):
+            while node and ch not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(ch, 0)
+            for idx in self._out[node]:
+                start = i - len(self.patterns[idx]) + 1
+                end = i + 1
+                if (start == 0 or not text[start - 1].isalnum()) and (end == len(text) or not text[end].isalnum()):
+                    yield idx, start
+
+
+@dataclass(frozen=True)
+class Posting:
+    doc_id: str
+    page: Optional[int]
+    chunk: int
+    chunk_id: str
+
+
+class MentionIndex:
+    """Catalog term -> postings for the chunks of one Library bucket."""
+
+    def __init__(self, terms: List[str]):
+        self.terms = list(terms)
+        self._matcher = AhoCorasick([_normalize(t) for t in self.terms])
+        self.postings: Dict[str, Set[Posting]] = defaultdict(set)
+        self._doc_terms: Dict[str, Set[str]] = defaultdict(set)
+
+    def add_chunk(self, doc_id: str, chunk: int, chunk_id: str, text: str, page: Optional[int] = None) -> None:
+        for idx, _ in self._matcher.find(_normalize(text)):
+            term = self.terms[idx]
+            self.postings[term].add(Posting(doc_id, page, chunk, chunk_id))
+            self._doc_terms[doc_id].add(term)
+
+    def remove_document(self, doc_id: str) -> None:
+        for term in self._doc_terms.pop(doc_id, set()):
+            remaining = {p for p in self.postings[term] if p.doc_id != doc_id}
+            if remaining:
+                self.postings[term] = remaining
+            else:
+                del self.postings[term]
+
+    def lookup(self, *terms: str) -> List[Posting]:
+        """Postings mentioning any of the terms, ordered by document and chunk."""
+        hits: Set[Posting] = set()
+        for term in terms:
+            hits |= self.postings.get(term, set())
+        return sorted(hits, key=lambda p: (p.doc_id, p.chunk))
+
+    def documents_mentioning(self, *terms: str) -> Dict[str, List[int]]:
+        """doc_id -> sorted pages on which any of the terms is mentioned."""
+        pages: Dict[str, Set[int]] = defaultdict(set)
+        for posting in self.lookup(*terms):
+            doc_pages = pages[posting.doc_id]
+            if posting.page is not None:
+                doc_pages.add(posting.page)
+        return {doc_id: sorted(p) for doc_id, p in pages.items()}
@@ -0,0 +1,247 @@
+# Process-wide metrics in Prometheus text format.
+#
+# Counters, gauges and histograms are kept in memory and rendered on demand; they are
+# also written to HPDFHUB_METRICS_FILE (for node_exporter's textfile collector) and,
+# with HPDFHUB_METRICS_PORT set, served over HTTP at /metrics.
+import os
+import threading
+import time
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from src.healthcare_pdf_hub.config import METRICS_FILE, METRICS_HOST, METRICS_PORT, METRICS_SESSION_TTL_SECONDS
+
+# Seconds; covers cached lookups (ms) up to slow LLM answers and large ingestions.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+# Texts per embedder call.
+BATCH_BUCKETS = (1, 4, 16, 32, 64, 128, 256, 512, 1024, 4096)
+FILE_WRITE_INTERVAL_SECONDS = 5.0
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _labels(labels: Dict[str, str]) -> Labels:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(labels: Labels, extra: Iterable[Tuple[str, str]] = ()) -> str:
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+class Histogram:
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+
+    def quantile(self, q: float) -> float:
+        """Upper bucket bound below which q of the observations fall (bucket resolution)."""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        for bound, n in zip(self.buckets, self.counts):
+            if n >= target:
+                return bound
+        return float("inf")
+
+
+class Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._help: Dict[str, Tuple[str, str]] = {}  # name -> (type, help)
+        self._counters: Dict[str, Dict[Labels, float]] = defaultdict(dict)
+        self._gauges: Dict[str, Dict[Labels, float]] = defaultdict(dict)
+        self._histograms: Dict[str, Dict[Labels, Histogram]] = defaultdict(dict)
+        self._collectors: List[Callable[["Metrics"], None]] = []
+        self._sessions: Dict[str, Tuple[float, int]] = {}  # session id -> (last seen, bytes)
+        self._last_file_write = 0.0
+
+    def describe(self, name: str, kind: str, help_text: str) -> None:
+        self._help.setdefault(name, (kind, help_text))
+
+    def inc(self, name: str, value: float = 1.0, **labels) -> None:
+        key = _labels(labels)
+        with self._lock:
+            self._counters[name][key] = self._counters[name].get(key, 0.0) + value
+
+    def set(self, name: str, value: float, **labels) -> None:
+        with self._lock:
+            self._gauges[name][_labels(labels)] = value
+
+    def set_counter(self, name: str, value: float, **labels) -> None:
+        """Copy a running total kept elsewhere (e.g. a cache's hit count) into a counter."""
+        with self._lock:
+            self._counters[name][_labels(labels)] = value
+
+    def observe(self, name: str, value: float, buckets: Tuple[float, ...] = LATENCY_BUCKETS, **labels) -> None:
+        key = _labels(labels)
+        with self._lock:
+            hist = self._histograms[name].get(key)
+            if hist is None:
+                hist = self._histograms[name][key] = Histogram(buckets)
+            hist.observe(value)
+
+    def value(self, name: str, **labels) -> Optional[float]:
+        """Current value of a counter or gauge (None if never set)."""
+        with self._lock:
+            key = _labels(labels)
+            return self._counters.get(name, {}).get(key, self._gauges.get(name, {}).get(key))
+
+    def histogram(self, name: str, **labels) -> Optional[Histogram]:
+        return self._histograms.get(name, {}).get(_labels(labels))
+
+    def histograms(self, name: str) -> Dict[Labels, Histogram]:
+        with self._lock:
+            return dict(self._histograms.get(name, {}))
+
+    def add_collector(self, collector: Callable[["Metrics"], None]) -> None:
+        """collector(metrics) runs before every render, e.g. to copy cache hit counts into gauges."""
+        self._collectors.append(collector)
+
+    def record_session_memory(self, session_id: str, n_bytes: int) -> None:
+        with self._lock:
+            self._sessions[session_id] = (time.time(), n_bytes)
+
+    def _collect_sessions(self) -> None:
+        cutoff = time.time() - METRICS_SESSION_TTL_SECONDS
+        with self._lock:
+            self._sessions = {sid: v for sid, v in self._sessions.items() if v[0] >= cutoff}
+            sizes = [n for _, n in self._sessions.values()]
+        self.set("hpdfhub_sessions_active", len(sizes))
+        self.set("hpdfhub_session_uploads_bytes_total", sum(sizes))
+        self.set("hpdfhub_session_uploads_bytes_max", max(sizes, default=0))
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        for collector in self._collectors:
+            try:
+                collector(self)
+            except Exception:
+                pass  # a broken collector must not take the metrics endpoint down
+        self._collect_sessions()
+        lines: List[str] = []
+        with self._lock:
+            for kind, series in (("counter", self._counters), ("gauge", self._gauges)):
+                for name in sorted(series):
+                    self._header(lines, name, kind)
+                    for labels, value in sorted(series[name].items()):
+                        lines.append(f"{name}{_format_labels(labels)} {value:g}")
+            for name in sorted(self._histograms):
+                self._header(lines, name, "histogram")
+                for labels, hist in sorted(self._histograms[name].items(), key=lambda item: item[0]):
+                    for bound, n in zip(hist.buckets, hist.counts):
+                        lines.append(f"{name}_bucket{_format_labels(labels, [('le', f'{bound:g}')])} {n}")
+                    lines.append(f"{name}_bucket{_format_labels(labels, [('le', '+Inf')])} {hist.count}")
+                    lines.append(f"{name}_sum{_format_labels(labels)} {hist.sum:g}")
+                    lines.append(f"{name}_count{_format_labels(labels)} {hist.count}")
+        return "\n".join(lines) + "\n"
+
+    def _header(self, lines: List[str], name: str, kind: str) -> None:
+        kind, help_text = self._help.get(name, (kind, ""))
+        if help_text:
+            lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+
+    def write_file(self, path: Optional[Path] = None, force: bool = False) -> None:
+        """Atomically rewrite the metrics file (at most every FILE_WRITE_INTERVAL_SECONDS)."""
+        path = path or METRICS_FILE
+        if path is None:
+            return
+        now = time.monotonic()
+        if not force and now - self._last_file_write < FILE_WRITE_INTERVAL_SECONDS:
+            return
+        self._last_file_write = now
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+            tmp.write_text(self.render(), encoding="utf-8")
+            os.replace(tmp, path)
+        except OSError:
+            pass
+
+
+_metrics: Optional[Metrics] = None
+_metrics_lock = threading.Lock()
+_server: Optional[ThreadingHTTPServer] = None
+
+
+def get_metrics() -> Metrics:
+    global _metrics
+    with _metrics_lock:
+        if _metrics is None:
+            _metrics = Metrics()
+            for name, kind, help_text in METRIC_HELP:
+                _metrics.describe(name, kind, help_text)
+    return _metrics
+
+
+def start_metrics_server(port: int = METRICS_PORT, host: str = METRICS_HOST) -> None:
+    """Serve /metrics on host:port on a daemon thread (once per process; no-op when port is 0)."""
+    global _server
+    if not port or _server is not None:
+        return
+    metrics = get_metrics()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = metrics.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    with _metrics_lock:
+        if _server is not None:
+            return
+        try:
+            _server = ThreadingHTTPServer((host, port), Handler)
+        except OSError:
+            return  # another worker already serves this port
+        threading.Thread(target=_server.serve_forever, name="metrics-server", daemon=True).start()
+
+
+METRIC_HELP = (
+    ("hpdfhub_stage_seconds", "histogram", "Wall time of one pipeline stage run."),
+    ("hpdfhub_stage_items_total", "counter", "Items (documents, pages, chunks, tokens) handled per stage."),
+    ("hpdfhub_stage_bytes_total", "counter", "Bytes processed per stage."),
+    ("hpdfhub_stage_cached_total", "counter", "Items served from a stage cache."),
+    ("hpdfhub_embed_document_chunks", "histogram",
+     "Chunks embedded per document (the model batches them by HPDFHUB_EMBEDDING_BATCH_SIZE)."),
+    ("hpdfhub_llm_seconds", "histogram", "Total time of one streamed LLM answer."),
+    ("hpdfhub_llm_first_token_seconds", "histogram", "Time to the first streamed LLM token."),
+    ("hpdfhub_llm_tokens_total", "counter", "Streamed LLM chunks (about one token each)."),
+    ("hpdfhub_context_tokens_total", "counter", "Estimated tokens of packed context sent to the LLM."),
+    ("hpdfhub_context_tokens_saved_total", "counter", "Estimated context tokens removed by packing."),
+    ("hpdfhub_llm_cache_hits_total", "counter", "Answer cache hits."),
+    ("hpdfhub_llm_cache_misses_total", "counter", "Answer cache misses."),
+    ("hpdfhub_index_cache_hits_total", "counter", "Per-PDF index cache hits."),
+    ("hpdfhub_index_cache_misses_total", "counter", "Per-PDF index cache misses."),
+    ("hpdfhub_retrieval_cache_hits_total", "counter", "Retrieval cache hits, by match (exact / semantic)."),
+    ("hpdfhub_retrieval_cache_misses_total", "counter", "Retrieval cache misses."),
+    ("hpdfhub_index_vectors", "gauge", "Vectors in the bucket index last rendered."),
+    ("hpdfhub_index_bytes", "gauge", "Bytes held by the bucket index last rendered."),
+    ("hpdfhub_sessions_active", "gauge", "Sessions seen within HPDFHUB_METRICS_SESSION_TTL_SECONDS."),
+    ("hpdfhub_session_uploads_bytes_total", "gauge", "Bytes held in uploads by all active sessions."),
+    ("hpdfhub_session_uploads_bytes_max", "gauge", "Bytes held in uploads by the largest active session."),
+)
@@ -0,0 +1,119 @@
+# Sentence embeddings on ONNX Runtime for CPU-only hosts.
+#
+# The sentence-transformers model is exported to ONNX once (and, by default, dynamically
+# quantized to int8) under CACHE_DIR/onnx, then run with a fixed intra-op thread count.
+# Inputs are sorted by length before batching so each batch pads to similar lengths, and
+# the outputs reproduce the sentence-transformers pipeline of all-MiniLM-L6-v2: truncate
+# to 256 tokens, mean-pool over the attention mask, L2-normalise.
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from src.healthcare_pdf_hub.config import CACHE_DIR
+
+try:
+    import onnxruntime as ort
+    from transformers import AutoTokenizer
+    HAS_ONNXRUNTIME = True
+except Exception:
+    HAS_ONNXRUNTIME = False
+
+logger = logging.getLogger(__name__)
+
+ONNX_DIR = CACHE_DIR / "onnx"
+MAX_SEQ_LENGTH = 256
+
+_export_lock = threading.Lock()
+
+
+def _model_dir(model_name: str) -> Path:
+    return ONNX_DIR / model_name.replace("/", "__")
+
+
+def export_onnx(model_name: str, quantize: bool = True) -> Path:
+    """Path of the (quantized) ONNX model, exporting it with torch on first use."""
+    out = _model_dir(model_name)
+    fp32, int8 = out / "model.onnx", out / "model.int8.onnx"
+    target = int8 if quantize else fp32
+    with _export_lock:
+        if target.exists():
+            return target
+        if not fp32.exists():
+            import torch
+            from transformers import AutoModel
+
+            logger.info("exporting %s to ONNX", model_name)
+            tokenizer = AutoTokenizer.from_pretrained(model_name)
+            model = AutoModel.from_pretrained(model_name).eval()
+            sample = tokenizer(["warm up"], return_tensors="pt")
+            out.mkdir(parents=True, exist_ok=True)
+            tmp = out / f".model.{os.getpid()}.onnx"
+            names = ["input_ids", "attention_mask", "token_type_ids"]
+            dynamic = {name: {0: "batch", 1: "sequence"} for name in names + ["last_hidden_state"]}
+            with torch.no_grad():
+                torch.onnx.export(model, tuple(sample[name] for name in names), str(tmp),
+                                  input_names=names, output_names=["last_hidden_state"],
+                                  dynamic_axes=dynamic, opset_version=14)
+            os.replace(tmp, fp32)
+        if quantize:
+            from onnxruntime.quantization import QuantType, quantize_dynamic
+
+            tmp = out / f".model.int8.{os.getpid()}.onnx"
+            quantize_dynamic(str(fp32), str(tmp), weight_type=QuantType.QInt8)
+            os.replace(tmp, int8)
+    return target
+
+
+class OnnxEmbeddings(Embeddings):
+    def __init__(self, model_name: str, batch_size: int = 32, threads: int = 0, quantize: bool = True):
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.inter_op_num_threads = 1
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(str(export_onnx(model_name, quantize)), options,
+                                            providers=["CPUExecutionProvider"])
+        self._inputs = {i.name for i in self.session.get_inputs()}
+        # Fast tokenizers raise "Already borrowed" when one instance is used by several threads
+        # (ingest workers, sessions, service connections); session.run() is thread-safe.
+        self._tokenizer_lock = threading.Lock()
+
+    def _embed_batch(self, texts: List[str]) -> np.ndarray:
+        with self._tokenizer_lock:
+            encoded = self.tokenizer(texts, padding=True, truncation=True, max_length=MAX_SEQ_LENGTH,
+                                     return_tensors="np")
+        feeds = {name: encoded[name].astype("int64") for name in self._inputs if name in encoded}
+        if "token_type_ids" in self._inputs and "token_type_ids" not in feeds:
+            feeds["token_type_ids"] = np.zeros_like(feeds["input_ids"])
+        hidden = self.session.run(None, feeds)[0]
+        mask = encoded["attention_mask"][..., None].astype("float32")
+        pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        return pooled / np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+
+    def embed_array(self, texts: List[str]) -> np.ndarray:
+        """float32 (n, dim) embeddings, computed in length-sorted batches, in input order."""
+        if not texts:
+            return np.zeros((0, 0), dtype="float32")
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        out: Optional[np.ndarray] = None
+        for start in range(0, len(order), self.batch_size):
+            idx = order[start:start + self.batch_size]
+            vectors = self._embed_batch([texts[i] for i in idx])
+            if out is None:
+                out = np.empty((len(texts), vectors.shape[1]), dtype="float32")
+            out[idx] = vectors
+        return out
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embed_array(list(texts)).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_array([text])[0].tolist()
@@ -1,7 +1,11 @@
 import base64
-import io, zipfile
+import io, os, tempfile, time, zipfile
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
 from pathlib import Path
 from datetime import datetime
+from typing import BinaryIO, Iterator, List, Optional, Tuple
 
 
 try:
@@ -74,13 +78,160 @@ def extract_text_from_pdf(pdf_bytes: bytes) -> str:
     except Exception:
         return ""
 
-def make_zip_from_items(items) -> bytes:
-    mem = io.BytesIO()
-    with zipfile.ZipFile(mem, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+# Below this many pages in a batch the process pool costs more than it saves.
+PARALLEL_MIN_PAGES = int(os.getenv("HPDFHUB_PARALLEL_MIN_PAGES", "32"))
+MIN_PAGES_PER_TASK = 8
+
+_extract_pool: Optional[ProcessPoolExecutor] = None
+_extract_workers = os.cpu_count() or 1
+
+@dataclass
+class ExtractionStats:
+    documents: int = 0
+    pages: int = 0
+    seconds: float = 0.0
+    parallel: bool = False
+
+    @property
+    def pages_per_second(self) -> float:
+        return self.pages / self.seconds if self.seconds > 0 else 0.0
+
+def set_extract_workers(workers: int) -> None:
+    """Size of the extraction process pool (takes effect before the pool is first used)."""
+    global _extract_workers
+    _extract_workers = max(1, workers)
+
+def _get_extract_pool() -> ProcessPoolExecutor:
+    global _extract_pool
+    if _extract_pool is None:
+        _extract_pool = ProcessPoolExecutor(max_workers=_extract_workers)
+    return _extract_pool
+
+def _discard_extract_pool(pool: ProcessPoolExecutor) -> None:
+    """Drop a broken pool (e.g. a worker was OOM-killed) so the next batch starts a fresh one."""
+    global _extract_pool
+    if _extract_pool is pool:
+        _extract_pool = None
+    pool.shutdown(wait=False)
+
+def _extract_page_range(pdf_bytes: bytes, start: int, stop: int) -> List[str]:
+    """Worker: text of pages [start, stop) of one PDF ("" for pages that fail)."""
+    try:
+        reader = PdfReader(io.BytesIO(pdf_bytes))
+    except Exception:
+        return [""] * (stop - start)
+    texts = []
+    for i in range(start, stop):
+        try:
+            texts.append(reader.pages[i].extract_text() or "")
+        except Exception:
+            texts.append("")
+    return texts
+
+def _count_pages(pdf_bytes: bytes) -> int:
+    try:
+        return len(PdfReader(io.BytesIO(pdf_bytes)).pages)
+    except Exception:
+        return 0
+
+def iter_extract_pages(pdf_blobs: List[bytes], stats: Optional[ExtractionStats] = None) -> Iterator[Tuple[int, int, str]]:
+    """
+    Yield (doc_index, page_index, text) for every page of every PDF, in document and page order.
+    Large batches are split by document and page range across a process pool and pages are
+    streamed back as soon as their range is done; small batches are extracted serially.
+    """
+    stats = stats if stats is not None else ExtractionStats()
+    stats.documents = len(pdf_blobs)
+    if not HAS_PYPDF:
+        return
+    started = time.perf_counter()
+    page_counts = [_count_pages(data) for data in pdf_blobs]
+    total_pages = sum(page_counts)
+    workers = _extract_workers
+
+    futures = None
+    if total_pages >= PARALLEL_MIN_PAGES and workers > 1:
+        # Roughly two tasks per worker for the whole batch, never tinier than MIN_PAGES_PER_TASK.
+        pages_per_task = max(MIN_PAGES_PER_TASK, -(-total_pages // (workers * 2)))
+        try:
+            pool = _get_extract_pool()
+            futures = [
+                (doc_idx, start, pool.submit(_extract_page_range, data, start, min(start + pages_per_task, n)))
+                for doc_idx, (data, n) in enumerate(zip(pdf_blobs, page_counts))
+                for start in range(0, n, pages_per_task)
+            ]
+        except BrokenProcessPool:
+            _discard_extract_pool(pool)
+            futures = None
+        except Exception:
+            futures = None  # e.g. no process support in this sandbox: fall back to serial
+
+    stats.parallel = futures is not None
+    if futures is not None:
+        failed = False
+        for doc_idx, start, future in futures:
+            texts = None
+            if not failed:
+                try:
+                    texts = future.result()
+                except Exception as exc:
+                    # Finish this range and the rest in this process rather than failing the ingest.
+                    failed = True
+                    if isinstance(exc, BrokenProcessPool):
+                        _discard_extract_pool(pool)
+            if texts is None:
+                texts = _extract_page_range(pdf_blobs[doc_idx], start, min(start + pages_per_task, page_counts[doc_idx]))
+            for offset, text in enumerate(texts):
+                stats.pages += 1
+                yield doc_idx, start + offset, text
+    else:
+        for doc_idx, (data, n) in enumerate(zip(pdf_blobs, page_counts)):
+            for offset, text in enumerate(_extract_page_range(data, 0, n)):
+                stats.pages += 1
+                yield doc_idx, offset, text
+    stats.seconds = time.perf_counter() - started
+
+def extract_pages_batch(pdf_blobs: List[bytes]) -> Tuple[List[List[str]], ExtractionStats]:
+    """Page texts of every PDF (in page order) plus throughput stats."""
+    stats = ExtractionStats()
+    pages: List[List[str]] = [[] for _ in pdf_blobs]
+    for doc_idx, _, text in iter_extract_pages(pdf_blobs, stats):
+        pages[doc_idx].append(text)
+    return pages, stats
+
+def extract_texts_batch(pdf_blobs: List[bytes]) -> Tuple[List[str], ExtractionStats]:
+    """Batch version of extract_text_from_pdf: one text per PDF plus throughput stats."""
+    pages, stats = extract_pages_batch(pdf_blobs)
+    return ["\n".join(parts).strip() for parts in pages], stats
+
+# PDFs (and other already-compressed files) gain almost nothing from DEFLATE.
+STORED_SUFFIXES = (".pdf", ".zip", ".png", ".jpg", ".jpeg")
+ZIP_SPOOL_MAX_BYTES = 16 * 1024 * 1024
+
+def write_zip(items, fileobj) -> None:
+    """Stream items into a ZIP archive on fileobj, one member at a time."""
+    with zipfile.ZipFile(fileobj, "w") as zf:
         for item in items:
             name = item.get("name", "document.pdf")
+            compress_type = zipfile.ZIP_STORED if name.lower().endswith(STORED_SUFFIXES) else zipfile.ZIP_DEFLATED
             data = item.get("data", b"")
             if data:
-                zf.writestr(name, data)
-    mem.seek(0)
-    return mem.getvalue()
+                zf.writestr(name, data, compress_type=compress_type)
+            elif item.get("path"):
+                # Folder entries carry a path instead of bytes; stream them from disk.
+                zf.write(item["path"], arcname=name, compress_type=compress_type)
+
+def make_zip_from_items(items) -> BinaryIO:
+    """
+    ZIP archive of items as an open file positioned at its start (st.download_button takes
+    it as is); the caller closes it. Spooled to disk past ZIP_SPOOL_MAX_BYTES so large
+    archives aren't held in RAM.
+    """
+    spool = tempfile.SpooledTemporaryFile(max_size=ZIP_SPOOL_MAX_BYTES)
+    try:
+        write_zip(items, spool)
+    except BaseException:
+        spool.close()
+        raise
+    spool.seek(0)
+    return spool
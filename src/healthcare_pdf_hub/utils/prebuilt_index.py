@@ -0,0 +1,114 @@
+# Prebuilt FAISS indexes for the resource folders.
+#
+# One directory per folder (bucket) holding:
+#   index.faiss     the search index (memory-mapped on load where FAISS supports it)
+#   vectors.npy     float32 vectors, row i <-> chunk i (reused by incremental builds)
+#   chunks.jsonl    one {"text", "source", "page", "chunk"} row per vector
+#   manifest.json   settings plus {name: {size, mtime, sha256, chunks}} per source PDF
+import json
+import os
+import shutil
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.healthcare_pdf_hub.config import PREBUILT_DIR
+
+# Manifests are read on every page load; FAISS / langchain only when an index is used.
+if TYPE_CHECKING:
+    import faiss
+    from langchain_community.vectorstores import FAISS
+
+
+def prebuilt_dir(bucket: str, root: Path = PREBUILT_DIR) -> Path:
+    return Path(root) / bucket
+
+
+def read_manifest(out_dir: Path) -> Optional[dict]:
+    try:
+        return json.loads((Path(out_dir) / "manifest.json").read_text(encoding="utf-8"))
+    except Exception:
+        return None
+
+
+def read_chunks(out_dir: Path) -> Tuple[List[dict], Optional[np.ndarray]]:
+    """Chunk rows and their float32 vectors (memory-mapped); ([], None) if nothing was built."""
+    out_dir = Path(out_dir)
+    try:
+        with open(out_dir / "chunks.jsonl", encoding="utf-8") as fh:
+            rows = [json.loads(line) for line in fh if line.strip()]
+        vectors = np.load(out_dir / "vectors.npy", mmap_mode="r")
+    except (OSError, ValueError):
+        return [], None
+    return rows, vectors
+
+
+def save_prebuilt(out_dir: Path, manifest: dict, rows: List[dict], vectors: np.ndarray,
+                  index: Optional["faiss.Index"]) -> None:
+    """Write all files to a temporary sibling directory, then swap it in."""
+    import faiss
+
+    out_dir = Path(out_dir)
+    out_dir.parent.mkdir(parents=True, exist_ok=True)
+    tmp = out_dir.with_name(f".{out_dir.name}.{os.getpid()}.tmp")
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir()
+    np.save(tmp / "vectors.npy", np.ascontiguousarray(vectors, dtype="float32"))
+    with open(tmp / "chunks.jsonl", "w", encoding="utf-8") as fh:
+        for row in rows:
+            fh.write(json.dumps(row, ensure_ascii=False) + "\n")
+    if index is not None:
+        faiss.write_index(index, str(tmp / "index.faiss"))
+    (tmp / "manifest.json").write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+
+    old = out_dir.with_name(f".{out_dir.name}.{os.getpid()}.old")
+    if out_dir.exists():
+        os.replace(out_dir, old)
+    os.replace(tmp, out_dir)
+    shutil.rmtree(old, ignore_errors=True)
+
+
+def _read_index(path: Path) -> "faiss.Index":
+    import faiss
+    from src.healthcare_pdf_hub.utils.faiss_utils import set_search_params
+
+    try:
+        index = faiss.read_index(str(path), faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+    except RuntimeError:
+        # Index types without mmap support are read into memory.
+        index = faiss.read_index(str(path))
+    return set_search_params(index)  # nprobe / efSearch are not stored in the file
+
+
+def load_prebuilt(out_dir: Path) -> Optional["FAISS"]:
+    """LangChain FAISS store over a prebuilt folder index, or None if there is none."""
+    from langchain_community.docstore.in_memory import InMemoryDocstore
+    from langchain_community.vectorstores import FAISS
+    from langchain_core.documents import Document
+    from src.healthcare_pdf_hub.utils.faiss_utils import get_embeddings
+
+    out_dir = Path(out_dir)
+    if not (out_dir / "index.faiss").exists():
+        return None
+    rows, _ = read_chunks(out_dir)
+    index = _read_index(out_dir / "index.faiss")
+    if index.ntotal != len(rows):
+        return None  # half-written or mismatched build; rebuild it with ingest
+    ids = [str(i) for i in range(len(rows))]
+    docstore = InMemoryDocstore({
+        _id: Document(page_content=row["text"],
+                      metadata={"source": row["source"], "page": row.get("page"), "chunk": row.get("chunk")})
+        for _id, row in zip(ids, rows)
+    })
+    return FAISS(get_embeddings(), index, docstore, dict(enumerate(ids)))
+
+
+def stale_files(manifest: Optional[dict], items: List[dict]) -> List[str]:
+    """Names of scanned folder items that are new or changed since the manifest was built."""
+    files: Dict[str, dict] = (manifest or {}).get("files", {})
+    return [
+        item["name"] for item in items
+        if item["name"] not in files
+        or (files[item["name"]]["size"], files[item["name"]]["mtime"]) != (item["size"], item["mtime"])
+    ]
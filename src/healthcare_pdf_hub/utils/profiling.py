@@ -0,0 +1,64 @@
+# Opt-in profiler for one request.
+#
+# Uses pyinstrument when it is installed and cProfile otherwise; the report is written
+# as text under PROFILE_DIR and only kept when the request took at least min_seconds.
+import cProfile
+import io
+import pstats
+import re
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator, Optional
+
+from src.healthcare_pdf_hub.config import PROFILE_DIR
+
+try:
+    from pyinstrument import Profiler
+    HAS_PYINSTRUMENT = True
+except Exception:
+    HAS_PYINSTRUMENT = False
+
+
+@dataclass
+class ProfileResult:
+    label: str
+    seconds: float = 0.0
+    path: Optional[Path] = None  # None when the request was faster than min_seconds
+
+
+@contextmanager
+def profile_request(label: str, min_seconds: float = 0.0, out_dir: Path = PROFILE_DIR) -> Iterator[ProfileResult]:
+    result = ProfileResult(label)
+    try:
+        if HAS_PYINSTRUMENT:
+            profiler = Profiler()
+            profiler.start()
+        else:
+            profiler = cProfile.Profile()
+            profiler.enable()
+    except (RuntimeError, ValueError):
+        # Another session's profile is still running (one profiler per process).
+        yield result
+        return
+    started = time.perf_counter()
+    try:
+        yield result
+    finally:
+        result.seconds = time.perf_counter() - started
+        if HAS_PYINSTRUMENT:
+            profiler.stop()
+        else:
+            profiler.disable()
+        if result.seconds >= min_seconds:
+            if HAS_PYINSTRUMENT:
+                report = profiler.output_text(unicode=True)
+            else:
+                buffer = io.StringIO()
+                pstats.Stats(profiler, stream=buffer).sort_stats("cumulative").print_stats(60)
+                report = buffer.getvalue()
+            out_dir.mkdir(parents=True, exist_ok=True)
+            name = re.sub(r"[^A-Za-z0-9_-]+", "_", label)
+            result.path = out_dir / f"{time.strftime('%Y%m%d-%H%M%S')}_{name}.txt"
+            result.path.write_text(f"{label}: {result.seconds:.3f}s\n\n{report}", encoding="utf-8")
@@ -0,0 +1,266 @@
+# Retrieval shared by all sessions and worker processes.
+#
+# LocalRetrieval holds the embedding model and the read-only prebuilt folder indexes
+# (memory-mapped, reloaded when a new build appears) in the current process. Run it as a
+# service (python -m src.healthcare_pdf_hub.retrieval_server) and set
+# HPDFHUB_RETRIEVAL_SERVICE so every Streamlit worker talks to that one process over a
+# local socket instead of loading the model itself; RetrievalClient has the same methods.
+# Per-session Library indexes stay in the sessions (they are private and mutable); only
+# their embedding calls go to the service.
+import ipaddress
+import logging
+import os
+import secrets
+import threading
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Connection, Listener, answer_challenge, deliver_challenge
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from src.healthcare_pdf_hub.config import (
+    RETRIEVAL_ALLOW_REMOTE, RETRIEVAL_AUTHKEY, RETRIEVAL_KEY_FILE, RETRIEVAL_SERVICE
+)
+from src.healthcare_pdf_hub.utils.prebuilt_index import load_prebuilt, prebuilt_dir, read_manifest
+
+logger = logging.getLogger(__name__)
+
+Address = Union[str, Tuple[str, int]]
+
+# Methods a client may call on the service.
+SERVICE_METHODS = ("embed_documents", "embed_query", "search", "info")
+
+
+def parse_address(address: str, allow_remote: bool = RETRIEVAL_ALLOW_REMOTE) -> Address:
+    """"host:port" for TCP (loopback unless allow_remote), anything else is a Unix socket path."""
+    host, sep, port = address.rpartition(":")
+    if sep and port.isdigit() and "/" not in address:
+        host = host or "127.0.0.1"
+        if not allow_remote and not _is_loopback(host):
+            raise ValueError(f"retrieval service address {address!r} is not on loopback; "
+                             "set HPDFHUB_RETRIEVAL_ALLOW_REMOTE=1 to allow it")
+        return host, int(port)
+    return address
+
+
+def _is_loopback(host: str) -> bool:
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host.strip("[]")).is_loopback
+    except ValueError:
+        return False
+
+
+def load_authkey(create: bool = False, key_file: Path = RETRIEVAL_KEY_FILE) -> bytes:
+    """
+    HPDFHUB_RETRIEVAL_AUTHKEY, else the key file. With create (the service), a missing key
+    file is created with a random key, readable only by its owner.
+    """
+    if RETRIEVAL_AUTHKEY:
+        return RETRIEVAL_AUTHKEY.encode("utf-8")
+    key_file = Path(key_file)
+    if create and not key_file.exists():
+        key_file.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            fd = os.open(key_file, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        except FileExistsError:
+            pass  # created by a concurrent start
+        else:
+            with os.fdopen(fd, "w", encoding="utf-8") as fh:
+                fh.write(secrets.token_hex(32))
+    try:
+        key = key_file.read_text(encoding="utf-8").strip()
+    except OSError:
+        key = ""
+    if not key:
+        raise RuntimeError("no retrieval service key: set HPDFHUB_RETRIEVAL_AUTHKEY or start the "
+                           f"retrieval service once to create {key_file}")
+    return key.encode("utf-8")
+
+
+def _rows(docs: List[Document]) -> List[dict]:
+    return [{"text": doc.page_content, "metadata": doc.metadata} for doc in docs]
+
+
+def _docs(rows: List[dict]) -> List[Document]:
+    return [Document(page_content=row["text"], metadata=row["metadata"]) for row in rows]
+
+
+class LocalRetrieval:
+    """In-process retrieval: the service's implementation, and a stand-in without one."""
+
+    def __init__(self, embeddings: Optional[Embeddings] = None, root: Optional[Path] = None):
+        self._embeddings = embeddings
+        self.root = root
+        self._stores: Dict[str, Tuple[str, object]] = {}  # bucket -> (built_at, FAISS store)
+        self._lock = threading.Lock()
+
+    @property
+    def embeddings(self) -> Embeddings:
+        if self._embeddings is None:
+            from src.healthcare_pdf_hub.utils.faiss_utils import get_embeddings
+            self._embeddings = get_embeddings()
+        return self._embeddings
+
+    def _dir(self, bucket: str) -> Path:
+        return prebuilt_dir(bucket) if self.root is None else prebuilt_dir(bucket, self.root)
+
+    def embed_documents(self, texts: List[str]) -> np.ndarray:
+        return np.asarray(self.embeddings.embed_documents(list(texts)), dtype="float32")
+
+    def embed_query(self, text: str) -> np.ndarray:
+        return np.asarray(self.embeddings.embed_query(text), dtype="float32")
+
+    def store(self, bucket: str):
+        """The bucket's prebuilt store, reloaded when the ingest writes a new build; None if unbuilt."""
+        manifest = read_manifest(self._dir(bucket))
+        if manifest is None:
+            return None
+        with self._lock:
+            built_at, store = self._stores.get(bucket, (None, None))
+            if built_at != manifest["built_at"]:
+                store = load_prebuilt(self._dir(bucket))
+                if store is not None:
+                    # Query embeddings go through this object (the service's model).
+                    store.embedding_function = self.embeddings
+                self._stores[bucket] = (manifest["built_at"], store)
+        return store
+
+    def search(self, bucket: str, query: str, k: int = 4) -> List[Document]:
+        store = self.store(bucket)
+        if store is None:
+            return []
+        return store.similarity_search(query, k=k)
+
+    def info(self) -> dict:
+        with self._lock:
+            loaded = {bucket: built_at for bucket, (built_at, store) in self._stores.items() if store is not None}
+        return {"pid": os.getpid(), "indexes": loaded}
+
+
+class RetrievalClient:
+    """LocalRetrieval's interface over a connection to the retrieval service (one per thread)."""
+
+    def __init__(self, address: Address, authkey: Optional[bytes] = None):
+        self.address = address
+        self.authkey = authkey if authkey is not None else load_authkey()
+        self._local = threading.local()
+
+    def _connection(self) -> Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = Client(self.address, authkey=self.authkey)
+        return conn
+
+    def _call(self, method: str, *args):
+        for attempt in (1, 2):
+            try:
+                conn = self._connection()
+                conn.send((method, args))
+                status, result = conn.recv()
+                break
+            except (EOFError, OSError):
+                self._local.conn = None  # service restarted: reconnect once
+                if attempt == 2:
+                    raise
+        if status != "ok":
+            raise RuntimeError(f"retrieval service: {result}")
+        return result
+
+    def embed_documents(self, texts: List[str]) -> np.ndarray:
+        return self._call("embed_documents", list(texts))
+
+    def embed_query(self, text: str) -> np.ndarray:
+        return self._call("embed_query", text)
+
+    def search(self, bucket: str, query: str, k: int = 4) -> List[Document]:
+        return _docs(self._call("search", bucket, query, k))
+
+    def info(self) -> dict:
+        return self._call("info")
+
+
+class ServiceEmbeddings(Embeddings):
+    """LangChain embeddings that delegate to a retrieval backend (the service's model)."""
+
+    def __init__(self, retrieval: Union[LocalRetrieval, RetrievalClient]):
+        self.retrieval = retrieval
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.retrieval.embed_documents(texts).tolist() if texts else []
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.retrieval.embed_query(text).tolist()
+
+
+def _handle(conn: Connection, backend: LocalRetrieval, authkey: bytes) -> None:
+    with conn:
+        # The same handshake Listener(authkey=...) does in accept(), but on this connection's
+        # thread: a client that never answers blocks only itself, not the accept loop.
+        try:
+            deliver_challenge(conn, authkey)
+            answer_challenge(conn, authkey)
+        except (AuthenticationError, EOFError, OSError) as exc:
+            logger.warning("retrieval service: rejected connection (%s)", type(exc).__name__)
+            return
+        while True:
+            try:
+                method, args = conn.recv()
+            except (EOFError, OSError):
+                return
+            try:
+                if method not in SERVICE_METHODS:
+                    raise ValueError(f"unknown method {method!r}")
+                result = getattr(backend, method)(*args)
+                conn.send(("ok", _rows(result) if method == "search" else result))
+            except Exception as exc:
+                logger.exception("retrieval service: %s failed", method)
+                conn.send(("error", f"{type(exc).__name__}: {exc}"))
+
+
+def _listen(address: Address) -> Listener:
+    if not isinstance(address, str):
+        return Listener(address)
+    if os.path.exists(address):
+        os.unlink(address)  # stale socket from an earlier run
+    # Create the socket owner-only from the start (no window with default permissions).
+    umask = os.umask(0o177)
+    try:
+        listener = Listener(address, family="AF_UNIX")
+    finally:
+        os.umask(umask)
+    os.chmod(address, 0o600)
+    return listener
+
+
+def serve(address: Address, backend: LocalRetrieval, authkey: bytes) -> None:
+    """Answer clients until interrupted; one thread per connection."""
+    if not authkey:
+        raise RuntimeError("refusing to serve retrieval without an authkey")
+    with _listen(address) as listener:
+        logger.info("retrieval service listening on %s", address)
+        while True:
+            try:
+                conn = listener.accept()
+            except (AuthenticationError, EOFError, OSError):
+                logger.warning("retrieval service: accept failed", exc_info=True)
+                continue
+            threading.Thread(target=_handle, args=(conn, backend, authkey), name="retrieval-conn",
+                             daemon=True).start()
+
+
+_retrieval: Optional[Union[LocalRetrieval, RetrievalClient]] = None
+_retrieval_lock = threading.Lock()
+
+
+def get_retrieval() -> Union[LocalRetrieval, RetrievalClient]:
+    """The service client when HPDFHUB_RETRIEVAL_SERVICE is set, else an in-process LocalRetrieval."""
+    global _retrieval
+    with _retrieval_lock:
+        if _retrieval is None:
+            _retrieval = RetrievalClient(parse_address(RETRIEVAL_SERVICE)) if RETRIEVAL_SERVICE else LocalRetrieval()
+    return _retrieval
@@ -0,0 +1,138 @@
+# Cache of retrieval results per bucket index.
+#
+# The Medicine and Hospital tabs build their queries from table selections, so the same
+# (or nearly the same) query comes in again and again. A query is answered from the cache
+# when its normalised text matches a cached one, or (for free-text queries that the search
+# would embed anyway) when its embedding is within HPDFHUB_RETRIEVAL_CACHE_SIMILARITY
+# (cosine) of a cached query's. Entries belong to one BucketIndex and are dropped when
+# its version changes (a document added or removed).
+import re
+import threading
+import weakref
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.healthcare_pdf_hub.config import RETRIEVAL_CACHE_MAX_ENTRIES, RETRIEVAL_CACHE_SIMILARITY
+from src.healthcare_pdf_hub.utils.catalog_terms import is_catalog_query
+
+_SPACES = re.compile(r"\s+")
+
+
+def normalise_query(query: str) -> str:
+    return _SPACES.sub(" ", query).strip().lower()
+
+
+@dataclass
+class _Entry:
+    docs: list
+    vector: Optional[np.ndarray] = None  # unit-length query embedding (semantic matching)
+
+
+@dataclass
+class _Scope:
+    version: int
+    entries: "OrderedDict[tuple, _Entry]" = field(default_factory=OrderedDict)
+
+
+class RetrievalCache:
+    def __init__(self, max_entries: int = RETRIEVAL_CACHE_MAX_ENTRIES,
+                 similarity: float = RETRIEVAL_CACHE_SIMILARITY,
+                 embed_query: Optional[Callable[[str], List[float]]] = None):
+        self.max_entries = max_entries  # per index
+        self.similarity = similarity    # >= 1.0 turns semantic matching off
+        self._embed_query = embed_query
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self._scopes: "weakref.WeakKeyDictionary[object, _Scope]" = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    @property
+    def hits(self) -> int:
+        return self.exact_hits + self.semantic_hits
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def embed(self, query: str) -> List[float]:
+        if self._embed_query is None:
+            from src.healthcare_pdf_hub.utils.faiss_utils import get_embeddings
+            return get_embeddings().embed_query(query)
+        return self._embed_query(query)
+
+    def _scope(self, index) -> _Scope:
+        scope = self._scopes.get(index)
+        if scope is None or scope.version != index.version:
+            scope = self._scopes[index] = _Scope(index.version)
+        return scope
+
+    def get(self, index, query: str, k: int, terms: Sequence[str] = ()) -> Tuple[Optional[list], Optional[List[float]]]:
+        """
+        (cached docs or None, query embedding or None). On a miss the embedding computed
+        for semantic matching is returned so the search itself does not embed again.
+        """
+        key = (normalise_query(query), k, tuple(terms))
+        with self._lock:
+            scope = self._scope(index)
+            entry = scope.entries.get(key)
+            if entry is not None:
+                scope.entries.move_to_end(key)
+                self.exact_hits += 1
+                return entry.docs, None
+            candidates = [(other, e) for other, e in scope.entries.items()
+                          if e.vector is not None and other[1:] == key[1:]]
+        # Mention lookups (terms given), catalog queries (answered by BM25 alone) and empty
+        # indexes are all cheaper than embedding the query, so they are matched exactly only.
+        if self.similarity >= 1.0 or terms or not index.num_chunks or is_catalog_query(query):
+            with self._lock:
+                self.misses += 1
+            return None, None
+        vector = self.embed(query)
+        if candidates:
+            unit = _unit(vector)
+            scores = np.stack([e.vector for _, e in candidates]) @ unit
+            best = int(np.argmax(scores))
+            if scores[best] >= self.similarity:
+                with self._lock:
+                    self.semantic_hits += 1
+                    if candidates[best][0] in scope.entries:
+                        scope.entries.move_to_end(candidates[best][0])
+                return candidates[best][1].docs, None
+        with self._lock:
+            self.misses += 1
+        return None, vector
+
+    def put(self, index, query: str, k: int, terms: Sequence[str], docs: list,
+            vector: Optional[List[float]] = None, version: Optional[int] = None) -> None:
+        """Remember docs retrieved from index at version (the version the search ran against)."""
+        key = (normalise_query(query), k, tuple(terms))
+        with self._lock:
+            scope = self._scope(index)
+            if version is not None and version != scope.version:
+                return  # the index changed while searching
+            scope.entries[key] = _Entry(list(docs), _unit(vector) if vector is not None else None)
+            scope.entries.move_to_end(key)
+            while len(scope.entries) > self.max_entries:
+                scope.entries.popitem(last=False)
+
+
+def _unit(vector) -> np.ndarray:
+    v = np.asarray(vector, dtype="float32")
+    return v / max(float(np.linalg.norm(v)), 1e-12)
+
+
+_retrieval_cache: Optional[RetrievalCache] = None
+_retrieval_cache_lock = threading.Lock()
+
+
+def get_retrieval_cache() -> RetrievalCache:
+    global _retrieval_cache
+    with _retrieval_cache_lock:
+        if _retrieval_cache is None:
+            _retrieval_cache = RetrievalCache()
+    return _retrieval_cache
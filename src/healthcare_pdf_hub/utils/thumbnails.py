@@ -0,0 +1,64 @@
+# Cached first-page thumbnails for the Library preview.
+#
+# Rendered with pypdfium2 when it is installed, at most once per document: uploads are
+# keyed by their blob handle (content hash), folder items by (path, size, mtime). The PNG
+# is a few tens of KB, so the preview no longer ships the whole PDF to the browser.
+import hashlib
+import os
+import threading
+from pathlib import Path
+from typing import Optional
+
+from src.healthcare_pdf_hub.config import CACHE_DIR
+from src.healthcare_pdf_hub.utils.blob_store import get_blob_store
+
+try:
+    import pypdfium2 as pdfium
+    HAS_PDFIUM = True
+except Exception:
+    HAS_PDFIUM = False
+
+THUMBNAIL_DIR = CACHE_DIR / "thumbnails"
+THUMBNAIL_WIDTH = 480
+
+_render_lock = threading.Lock()  # pdfium is not thread-safe
+
+
+def _thumbnail_path(entry: dict, width: int) -> Path:
+    if entry.get("blob"):
+        key = entry["blob"]
+    else:
+        key = hashlib.sha256(f"{entry['path']}|{entry['size']}|{entry.get('mtime', '')}".encode("utf-8")).hexdigest()
+    return THUMBNAIL_DIR / f"{key}-{width}.png"
+
+
+def _pdf_source(entry: dict):
+    if entry.get("blob"):
+        return str(get_blob_store().path(entry["blob"]))
+    if entry.get("data") is not None:
+        return entry["data"]
+    return entry["path"]
+
+
+def first_page_thumbnail(entry: dict, width: int = THUMBNAIL_WIDTH) -> Optional[Path]:
+    """PNG of the entry's first page (rendered once, then served from disk); None if unavailable."""
+    path = _thumbnail_path(entry, width)
+    if path.exists():
+        return path
+    if not HAS_PDFIUM:
+        return None
+    try:
+        with _render_lock:
+            pdf = pdfium.PdfDocument(_pdf_source(entry))
+            try:
+                page = pdf[0]
+                image = page.render(scale=width / page.get_width()).to_pil()
+            finally:
+                pdf.close()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        image.save(tmp, format="PNG", optimize=True)
+        os.replace(tmp, path)
+    except Exception:
+        return None
+    return path
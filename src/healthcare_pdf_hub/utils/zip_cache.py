@@ -0,0 +1,64 @@
+# Cached "Download ALL" archives for the resource folders.
+#
+# An archive is identified by the folder's manifest fingerprint (name, size, mtime of
+# every PDF), built on request by streaming files from disk, and reused until the
+# folder changes.
+import hashlib
+import os
+import threading
+from pathlib import Path
+from typing import List, Optional
+
+from src.healthcare_pdf_hub.config import CACHE_DIR
+from src.healthcare_pdf_hub.utils.pdf_utils import write_zip
+
+ZIP_CACHE_DIR = CACHE_DIR / "zips"
+
+_build_lock = threading.Lock()
+
+
+def folder_fingerprint(items: List[dict]) -> str:
+    h = hashlib.sha256()
+    for item in sorted(items, key=lambda it: it["name"]):
+        h.update(f"{item['name']}|{item['size']}|{item.get('mtime', '')}\n".encode("utf-8"))
+    return h.hexdigest()[:32]
+
+
+def _folder_prefix(folder: Path) -> str:
+    return hashlib.sha1(str(Path(folder).resolve()).encode("utf-8")).hexdigest()[:16]
+
+
+def _archive_path(folder: Path, items: List[dict]) -> Path:
+    return ZIP_CACHE_DIR / f"{_folder_prefix(folder)}-{folder_fingerprint(items)}.zip"
+
+
+def cached_folder_zip(folder: Path, items: List[dict]) -> Optional[Path]:
+    """Path of the finished archive for this folder state, or None if not built yet."""
+    path = _archive_path(folder, items)
+    return path if path.exists() else None
+
+
+def build_folder_zip(folder: Path, items: List[dict]) -> Path:
+    """Build (or reuse) the archive for this folder state and drop older ones for the folder."""
+    path = _archive_path(folder, items)
+    with _build_lock:
+        if path.exists():
+            return path
+        ZIP_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp, "wb") as fh:
+            write_zip(items, fh)
+        os.replace(tmp, path)
+        invalidate_folder_zips(folder, keep=path)
+    return path
+
+
+def invalidate_folder_zips(folder: Path, keep: Optional[Path] = None) -> None:
+    if not ZIP_CACHE_DIR.exists():
+        return
+    for old in ZIP_CACHE_DIR.glob(f"{_folder_prefix(folder)}-*.zip"):
+        if old != keep:
+            try:
+                old.unlink()
+            except OSError:
+                pass
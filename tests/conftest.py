@@ -0,0 +1,9 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Run from anywhere: the package is imported as src.healthcare_pdf_hub, and its caches
+# (CACHE_DIR is read at import) go to a scratch directory instead of the working tree.
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+os.environ.setdefault("HPDFHUB_CACHE_DIR", tempfile.mkdtemp(prefix="hpdfhub_test_"))
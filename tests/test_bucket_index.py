@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("faiss")
+pytest.importorskip("langchain_community")
+
+from langchain_core.embeddings import DeterministicFakeEmbedding  # noqa: E402
+
+from src.healthcare_pdf_hub.utils import bucket_index, faiss_utils  # noqa: E402
+from src.healthcare_pdf_hub.utils.bucket_index import BucketIndex  # noqa: E402
+
+DIM = 16
+CHUNKS_PER_DOC = 300  # two documents are past the IVF-PQ training minimum, one is not
+
+
+@pytest.fixture(autouse=True)
+def fake_embeddings():
+    faiss_utils.set_embeddings(DeterministicFakeEmbedding(size=DIM))
+    yield
+    faiss_utils.set_embeddings(None)
+
+
+def _force_kind(monkeypatch, kind):
+    monkeypatch.setattr(bucket_index, "choose_index_kind", lambda n: faiss_utils.choose_index_kind(n, kind))
+
+
+def _add(index, doc_id, rng, n=CHUNKS_PER_DOC):
+    vectors = rng.normal(size=(n, DIM)).astype("float32")
+    index.add_document(doc_id, f"{doc_id}.pdf", [f"{doc_id} chunk {i}" for i in range(n)], vectors.tolist())
+    return vectors
+
+
+@pytest.mark.parametrize("dtype", faiss_utils.VECTOR_DTYPES)
+@pytest.mark.parametrize("kind", faiss_utils.INDEX_KINDS)
+def test_add_remove_search(monkeypatch, kind, dtype):
+    _force_kind(monkeypatch, kind)
+    rng = np.random.default_rng(0)
+    index = BucketIndex(dtype=dtype)
+    _add(index, "a", rng)
+    assert faiss_utils.index_kind(index.vectorstore.index) == faiss_utils.choose_index_kind(CHUNKS_PER_DOC, kind)
+    kept = _add(index, "b", rng)
+    assert faiss_utils.index_kind(index.vectorstore.index) == kind
+
+    index.remove_document("a")
+    assert index.num_chunks == CHUNKS_PER_DOC
+    assert set(index.doc_chunks) == {"b"}
+    docs = index.vectorstore.similarity_search_by_vector(kept[7].tolist(), k=5)
+    assert docs and {doc.metadata["doc_id"] for doc in docs} == {"b"}
+    assert {doc.metadata["doc_id"] for doc in index.search("b chunk 7", k=5)} == {"b"}
+
+    index.remove_document("b")
+    assert index.num_chunks == 0
+    _add(index, "c", rng, n=5)
+    assert {doc.metadata["doc_id"] for doc in index.search("c chunk 1", k=3)} == {"c"}
+
+
+@pytest.mark.parametrize("kind", ["ivf", "ivfpq"])
+def test_small_first_upload_with_forced_kind(monkeypatch, kind):
+    _force_kind(monkeypatch, kind)
+    index = BucketIndex()
+    _add(index, "a", np.random.default_rng(1), n=5)
+    assert index.num_chunks == 5
+    assert set(index.doc_chunks) == {"a"}
+
+
+def test_failed_upgrade_leaves_bucket_unchanged(monkeypatch):
+    _force_kind(monkeypatch, "flat")
+    index = BucketIndex()
+    rng = np.random.default_rng(2)
+    _add(index, "a", rng, n=5)
+
+    def fail(*args, **kwargs):
+        raise RuntimeError("training failed")
+
+    _force_kind(monkeypatch, "hnsw")
+    monkeypatch.setattr(bucket_index, "build_faiss_index", fail)
+    with pytest.raises(RuntimeError):
+        _add(index, "b", rng, n=5)
+    assert index.num_chunks == 5
+    assert set(index.doc_chunks) == {"a"}
+    assert index.version == 1
@@ -0,0 +1,149 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+faiss = pytest.importorskip("faiss")
+np = pytest.importorskip("numpy")
+pytest.importorskip("langchain_community")
+
+from langchain_core.embeddings import DeterministicFakeEmbedding  # noqa: E402
+
+from src.healthcare_pdf_hub.config import FAISS_HNSW_EF_SEARCH, FAISS_IVF_NPROBE  # noqa: E402
+from src.healthcare_pdf_hub.utils import faiss_utils  # noqa: E402
+from src.healthcare_pdf_hub.utils.faiss_utils import (  # noqa: E402
+    INDEX_KINDS, IVFPQ_MIN_VECTORS, VECTOR_DTYPES, build_faiss_index, choose_index_kind,
+    index_dtype, index_kind, set_search_params, vectorstore_from_embeddings,
+)
+from src.healthcare_pdf_hub.utils.index_cache import IndexCache  # noqa: E402
+from src.healthcare_pdf_hub.utils.prebuilt_index import load_prebuilt, save_prebuilt  # noqa: E402
+
+ROOT = Path(__file__).resolve().parents[1]
+DIM = 16
+
+
+@pytest.fixture(autouse=True)
+def fake_embeddings():
+    faiss_utils.set_embeddings(DeterministicFakeEmbedding(size=DIM))
+    yield
+    faiss_utils.set_embeddings(None)
+
+
+def _vectors(n, seed=0):
+    return np.random.default_rng(seed).normal(size=(n, DIM)).astype("float32")
+
+
+def _search_params(index):
+    ivf = faiss.try_extract_index_ivf(index)
+    return (ivf.nprobe if ivf is not None else None,
+            index.hnsw.efSearch if hasattr(index, "hnsw") else None)
+
+
+def test_choose_index_kind():
+    assert choose_index_kind(10, "auto") == "flat"
+    assert choose_index_kind(faiss_utils.AUTO_HNSW_MIN_VECTORS, "auto") == "hnsw"
+    assert choose_index_kind(faiss_utils.AUTO_IVFPQ_MIN_VECTORS, "auto") == "ivfpq"
+    assert choose_index_kind(5, "hnsw") == "hnsw"
+    assert choose_index_kind(IVFPQ_MIN_VECTORS - 1, "ivfpq") == "ivf"
+    assert choose_index_kind(IVFPQ_MIN_VECTORS, "ivfpq") == "ivfpq"
+    assert choose_index_kind(0, "ivf") == "flat"
+
+
+@pytest.mark.parametrize("n", [1, 5, 50, 300])
+@pytest.mark.parametrize("dtype", VECTOR_DTYPES)
+@pytest.mark.parametrize("kind", INDEX_KINDS)
+def test_build_small_n(kind, dtype, n):
+    vectors = _vectors(n)
+    index = build_faiss_index(vectors, kind, dtype=dtype)
+    built = index_kind(index)
+    assert built == choose_index_kind(n, kind)
+    assert index.ntotal == n
+    assert index_dtype(index) == ("pq" if built == "ivfpq" else dtype)
+    _, ids = index.search(vectors[:3], 1)
+    assert ((ids >= 0) & (ids < n)).all()
+    if built == "flat" and dtype == "float32":
+        assert ids[:, 0].tolist() == list(range(min(n, 3)))
+
+
+def test_set_search_params():
+    ivf = build_faiss_index(_vectors(1000), "ivf")
+    nlist = faiss.extract_index_ivf(ivf).nlist
+    assert _search_params(ivf)[0] == min(FAISS_IVF_NPROBE, nlist)
+    set_search_params(ivf, nprobe=2)
+    assert _search_params(ivf)[0] == 2
+    set_search_params(ivf, nprobe=10_000)
+    assert _search_params(ivf)[0] == nlist
+
+    hnsw = build_faiss_index(_vectors(50), "hnsw", dtype="int8")
+    assert _search_params(hnsw)[1] == FAISS_HNSW_EF_SEARCH
+    set_search_params(hnsw, ef_search=5)
+    assert _search_params(hnsw)[1] == 5
+    set_search_params(build_faiss_index(_vectors(5), "flat"), nprobe=3, ef_search=3)  # no knobs: no-op
+
+
+@pytest.mark.parametrize("kind", INDEX_KINDS)
+def test_prebuilt_round_trip(tmp_path, kind):
+    vectors = _vectors(300)
+    index = build_faiss_index(vectors, kind, nprobe=1, ef_search=1)
+    rows = [{"text": f"chunk {i}", "source": "a.pdf", "page": 1, "chunk": i} for i in range(len(vectors))]
+    save_prebuilt(tmp_path / "medical", {"built_at": "now"}, rows, vectors, index)
+
+    store = load_prebuilt(tmp_path / "medical")
+    assert index_kind(store.index) == kind
+    assert store.index.ntotal == len(vectors)
+    nprobe, ef_search = _search_params(store.index)
+    if kind in ("ivf", "ivfpq"):
+        assert nprobe == min(FAISS_IVF_NPROBE, faiss.extract_index_ivf(store.index).nlist)
+    if kind == "hnsw":
+        assert ef_search == FAISS_HNSW_EF_SEARCH
+    docs = store.similarity_search_by_vector(vectors[42].tolist(), k=3)
+    assert len(docs) == 3 and all(doc.metadata["source"] == "a.pdf" for doc in docs)
+
+
+@pytest.mark.parametrize("dtype", VECTOR_DTYPES)
+@pytest.mark.parametrize("kind", INDEX_KINDS)
+def test_index_cache_round_trip(tmp_path, kind, dtype):
+    vectors = _vectors(300)
+    texts = [f"chunk {i}" for i in range(len(vectors))]
+    store = vectorstore_from_embeddings(texts, vectors, kind=kind, dtype=dtype)
+    set_search_params(store.index, nprobe=1, ef_search=1)
+    cache = IndexCache(tmp_path, max_bytes=1 << 30)
+    cache.save("key", store)
+
+    loaded = cache.load("key", faiss_utils.get_embeddings())
+    assert loaded is not None and cache.hits == 1
+    assert index_kind(loaded.index) == kind
+    assert index_dtype(loaded.index) == index_dtype(store.index)
+    nprobe, ef_search = _search_params(loaded.index)
+    if kind in ("ivf", "ivfpq"):
+        assert nprobe == min(FAISS_IVF_NPROBE, faiss.extract_index_ivf(loaded.index).nlist)
+    if kind == "hnsw":
+        assert ef_search == FAISS_HNSW_EF_SEARCH
+    assert loaded.similarity_search_by_vector(vectors[0].tolist(), k=1)[0].page_content in texts
+
+
+def test_search_param_env_overrides(tmp_path):
+    # The settings are read at import, so they are checked in a fresh interpreter.
+    vectors = _vectors(1000)
+    for kind in ("ivf", "hnsw"):
+        faiss.write_index(build_faiss_index(vectors, kind), str(tmp_path / f"{kind}.faiss"))
+    script = (
+        "import json, sys\n"
+        "from pathlib import Path\n"
+        "from src.healthcare_pdf_hub.utils.faiss_utils import build_faiss_index\n"
+        "from src.healthcare_pdf_hub.utils.prebuilt_index import _read_index\n"
+        "import faiss, numpy as np\n"
+        "tmp = Path(sys.argv[1])\n"
+        "ivf, hnsw = _read_index(tmp / 'ivf.faiss'), _read_index(tmp / 'hnsw.faiss')\n"
+        "built = build_faiss_index(np.load(tmp / 'vectors.npy'), 'ivf')\n"
+        "print(json.dumps({'ivf': faiss.extract_index_ivf(ivf).nprobe, 'hnsw': hnsw.hnsw.efSearch,\n"
+        "                  'built': faiss.extract_index_ivf(built).nprobe}))\n"
+    )
+    np.save(tmp_path / "vectors.npy", vectors)
+    env = {**os.environ, "HPDFHUB_FAISS_IVF_NPROBE": "3", "HPDFHUB_FAISS_HNSW_EF_SEARCH": "7"}
+    out = subprocess.run([sys.executable, "-c", script, str(tmp_path)], cwd=ROOT, env=env,
+                         capture_output=True, text=True, check=True)
+    assert json.loads(out.stdout.strip().splitlines()[-1]) == {"ivf": 3, "hnsw": 7, "built": 3}